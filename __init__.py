@@ -42,17 +42,17 @@ from .panel import Anton_PT_Panel
 from .properties import AntonPropertyGroup, ForcePropertyGroup
 from .initializer import Anton_OT_ForceUpdater, Anton_OT_Initializer
 from .definer import Anton_OT_DirectionUpdater, Anton_OT_Definer
-from .processor import Anton_OT_Processor
-from .visualizer import Anton_OT_Visualizer
+from .processor import Anton_OT_Processor, Anton_OT_Sweep, Anton_OT_Monitor, Anton_OT_Cancel
+from .visualizer import Anton_OT_Visualizer, Anton_OT_BatchVisualizer
 
-classes = [Anton_PT_Panel, Anton_OT_Processor, AntonPropertyGroup,
-            ForcePropertyGroup, Anton_OT_ForceUpdater, Anton_OT_Visualizer,
-            Anton_OT_Initializer, Anton_OT_DirectionUpdater, Anton_OT_Definer]
+classes = [Anton_PT_Panel, Anton_OT_Processor, Anton_OT_Sweep, Anton_OT_Monitor, Anton_OT_Cancel,
+            AntonPropertyGroup, ForcePropertyGroup, Anton_OT_ForceUpdater, Anton_OT_Visualizer,
+            Anton_OT_BatchVisualizer, Anton_OT_Initializer, Anton_OT_DirectionUpdater, Anton_OT_Definer]
 
 def register():
     """Registers Preferences, Installer, Panel, PropertyGroup, ForcePropertyGroup,
-    ForceUpdater, Initializer, DirectionUpdater, Definer, Processor, and
-    Visualizer classes and instantiates scene variables load, forced_magnitudes
+    ForceUpdater, Initializer, DirectionUpdater, Definer, Processor, Sweep, Monitor, Cancel,
+    Visualizer and BatchVisualizer classes and instantiates scene variables load, forced_magnitudes
     and forced_direction_signs that are used by Processor.
     """
 
@@ -68,8 +68,8 @@ def register():
 
 def unregister():
     """Unregisters Preferences, Installer, Panel, PropertyGroup, ForcePropertyGroup,
-    ForceUpdater, Initializer, DirectionUpdater, Definer, Processor, and
-    Visualizer classes and deletes all the scene variables used by Processor.
+    ForceUpdater, Initializer, DirectionUpdater, Definer, Processor, Sweep, Monitor, Cancel,
+    Visualizer and BatchVisualizer classes and deletes all the scene variables used by Processor.
     """
     for _class in classes:
         bpy.utils.unregister_class(_class)
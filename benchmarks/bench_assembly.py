@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""Stiffness assembly of the native solver with the cached sparsity pattern against building the
+COO matrix and slicing out the free DOFs every iteration.
+
+    python3 benchmarks/bench_assembly.py --problem bracket --res 32 64 96
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from scipy import sparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from core.problem import read_problem, PROBLEM_NAME
+from core.simp import SIMPOptimizer
+from problems import PROBLEMS, write
+
+def prepared(workspace_path, name, res):
+    """Native optimizer of problem ``name`` with its domain and boundary conditions set up."""
+    directory = write(workspace_path, name, res)
+    problem = read_problem(os.path.join(directory, PROBLEM_NAME))
+    opt = SIMPOptimizer(working_directory=workspace_path, filename=name, E=1.0, nu=0.3, **problem.parameters)
+    opt.import_mesh(os.path.join(directory, name + '.obj'))
+    opt.filter_domain()
+    opt.add_customplane_dirichlet_bcs('xyz', problem.fixed, regions=problem.fixed_regions)
+    for i in range(problem.number_of_forces):
+        opt.add_customplane_loads(problem.force_vectors[i], problem.force(i), regions=problem.force_region_offsets(i))
+    opt.density = np.where(opt.domain, 0.4, 0.0)
+    return opt
+
+def coo_assembly(opt, moduli, iK, jK):
+    values = (opt.KE.reshape(1, -1) * moduli[:, None]).reshape(-1)
+    K = sparse.coo_matrix((values, (iK, jK)), shape=(opt.number_of_dofs,) * 2).tocsr()
+    return K[opt.free_dofs, :][:, opt.free_dofs]
+
+def main():
+    parser = argparse.ArgumentParser(description='Stiffness assembly benchmark.')
+    parser.add_argument('--problem', type=str, default='cantilever', choices=sorted(PROBLEMS))
+    parser.add_argument('--res', type=int, nargs='+', default=[32, 64])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('{:>6} {:>9} {:>10} {:>12} {:>12} {:>12} {:>10}'.format('res', 'elements', 'nnz', 'setup [s]', 'cached [s]', 'coo [s]', 'cache [MB]'))
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as workspace_path:
+        for res in args.res:
+            opt = prepared(workspace_path, args.problem, res)
+            start = time.perf_counter()
+            opt.prepare()
+            setup = time.perf_counter() - start
+
+            moduli = 1e-9 + rng.random(len(opt.elements)) ** 3
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                K = opt.stiffness(moduli)
+            cached = (time.perf_counter() - start) / args.repeat
+
+            iK = np.repeat(opt.edofmat, 24, axis=1).reshape(-1)
+            jK = np.tile(opt.edofmat, (1, 24)).reshape(-1)
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                reference = coo_assembly(opt, moduli, iK, jK)
+            coo = (time.perf_counter() - start) / args.repeat
+
+            assert abs(reference - K).max() <= 1e-12 * abs(reference).max()
+            print('{:6d} {:9d} {:10d} {:12.3f} {:12.4f} {:12.4f} {:10.1f}'.format(res, len(opt.elements), K.nnz, setup, cached, coo,
+                                                                                opt.assembly.nbytes / 2**20))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Wall time and final objective of a coarse-to-fine continuation against a single run at the finest
+resolution, on a problem defined in a workspace. Needs the taichi backend of ``optimizer.py``.
+
+    python3 benchmarks/bench_continuation.py /tmp/ anton --schedule 64 128 256
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from core.continuation import submit_continuation
+from core.manifest import RunManifest
+from core.problem import PROBLEM_NAME, read_problem, write_problem
+from core.scheduler import Scheduler, DONE
+
+def finished_runs(workspace_path, filename, since):
+    return [run for run in RunManifest.of_problem(workspace_path, filename).results()
+                if run['start_time'] >= since and 'end_time' in run]
+
+def main():
+    parser = argparse.ArgumentParser(description='Coarse-to-fine continuation benchmark.')
+    parser.add_argument('workspace_path', type=str)
+    parser.add_argument('filename', type=str)
+    parser.add_argument('--schedule', type=int, nargs='+', default=[64, 128, 256])
+    args = parser.parse_args()
+
+    schedule = sorted(args.schedule)
+    scheduler = Scheduler(args.workspace_path)
+
+    print('{:>14} {:>6} {:>10} {:>10} {:>14}'.format('mode', 'res', 'iters', 'time [s]', 'objective'))
+
+    start = time.time()
+    _, jobs = submit_continuation(scheduler, args.filename, schedule)
+    scheduler.run()
+    continuation_time = time.time() - start
+
+    runs = finished_runs(args.workspace_path, args.filename, start)
+    for run in runs:
+        print('{:>14} {:6d} {:10d} {:10.1f} {:14.6g}'.format('stage', run['parameters']['res'][0], run['iterations'],
+                                                               run['end_time'] - run['start_time'], run['objective']))
+    states = {job['id']: job['state'] for job in scheduler.jobs()}
+    if any(states.get(job['id']) != DONE for job in jobs) or not runs:
+        sys.exit('continuation failed')
+    print('{:>14} {:6d} {:10d} {:10.1f} {:14.6g}'.format('continuation', schedule[-1], sum(run['iterations'] for run in runs),
+                                                           continuation_time, runs[-1]['objective']))
+
+    problem = read_problem(os.path.join(args.workspace_path, args.filename, PROBLEM_NAME), mmap=False)
+    problem.parameters['res'] = schedule[-1]
+    path = os.path.join(args.workspace_path, args.filename, 'single_r{:04d}.anton'.format(schedule[-1]))
+    write_problem(path, problem)
+
+    start = time.time()
+    job = scheduler.submit(args.filename, path)
+    os.remove(path)
+    scheduler.run()
+    single_time = time.time() - start
+
+    runs = finished_runs(args.workspace_path, args.filename, start)
+    if dict((job['id'], job['state']) for job in scheduler.jobs()).get(job['id']) != DONE or not runs:
+        sys.exit('single resolution run failed')
+    print('{:>14} {:6d} {:10d} {:10.1f} {:14.6g}'.format('single', schedule[-1], runs[-1]['iterations'],
+                                                           single_time, runs[-1]['objective']))
+    print('speedup {:.2f}x'.format(single_time / continuation_time))
+
+if __name__ == '__main__':
+    main()
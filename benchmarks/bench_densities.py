@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+"""Throughput of the ``*.densities.txt`` parser against the line-by-line loop it replaced.
+
+    python3 benchmarks/bench_densities.py --res 64 128
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from core.mesher import read_densities
+
+def write_dump(path, res, seed=0):
+    """Writes a synthetic dump in the ``convert_fem_solve`` layout: one section per ``8^3`` block
+    of a ``res^3`` grid, the ball inscribed in the grid being dense.
+    """
+    rng = np.random.default_rng(seed)
+    local = np.indices((8, 8, 8)).reshape(3, -1).T
+    number_of_voxels = 0
+
+    with open(path, 'w') as f:
+        for base in np.indices((res // 8,) * 3).reshape(3, -1).T * 8:
+            voxels = base + local
+            radius = np.linalg.norm(voxels + 0.5 - res / 2, axis=1) / (res / 2)
+            densities = np.clip(1.0 - radius + 0.1 * rng.random(len(voxels)), 0.0, 1.0)
+
+            f.write('base_coordinates: [{}, {}, {}]\n'.format(*(base + 8)))
+            f.write(''.join('[{},{},{}]: {:.6f}\n'.format(v[0], v[1], v[2], d) for v, d in zip(local, densities)))
+            number_of_voxels += len(voxels)
+
+    return number_of_voxels
+
+def legacy_read_densities(inp_path):
+    section_pattern = re.compile(r'base_coordinates: \[(?P<X>[.eE\+\-\d]*), (?P<Y>[.eE\+\-\d]*), (?P<Z>[.eE\+\-\d]*)\]')
+    coord_pattern = re.compile(r'\[(?P<X>[.eE\+\-\d]*),(?P<Y>[.eE\+\-\d]*),(?P<Z>[.eE\+\-\d]*)\]:\s(?P<DENSITY>[.eE\+\-\d]*)')
+
+    verts = []
+    densities = []
+
+    with open(inp_path, 'r') as f:
+        base_coord = np.array([0, 0, 0], dtype=int)
+        line = f.readline()
+
+        while(line):
+            section_match = section_pattern.search(line)
+            coord_match = coord_pattern.search(line)
+            if section_match:
+                base_coord = np.array(list(map(int, [section_match.group('X'), section_match.group('Y'), section_match.group('Z')]))) - 8
+
+            if coord_match:
+                _coord = base_coord + np.array(list(map(int, [coord_match.group('X'), coord_match.group('Y'), coord_match.group('Z')])))
+                verts.append(_coord)
+                densities.append(float(coord_match.group('DENSITY')))
+
+            line = f.readline()
+
+    return np.array(verts, dtype=int), np.array(densities)
+
+def main():
+    parser = argparse.ArgumentParser(description='Density dump parser benchmark.')
+    parser.add_argument('--res', type=int, nargs='+', default=[32, 64])
+    parser.add_argument('--skip-legacy', action='store_true', help='only time the bulk parser')
+    args = parser.parse_args()
+
+    print('{:>6} {:>12} {:>16} {:>16} {:>8}'.format('res', 'voxels', 'legacy vox/s', 'bulk vox/s', 'speedup'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for res in args.res:
+            path = os.path.join(tmp, '{:04d}.densities.txt'.format(res))
+            number_of_voxels = write_dump(path, res)
+
+            start = time.perf_counter()
+            coords, densities = read_densities(path)
+            bulk = time.perf_counter() - start
+
+            if args.skip_legacy:
+                print('{:>6} {:>12} {:>16} {:>16.0f} {:>8}'.format(res, number_of_voxels, '-', number_of_voxels / bulk, '-'))
+                continue
+
+            start = time.perf_counter()
+            _coords, _densities = legacy_read_densities(path)
+            legacy = time.perf_counter() - start
+
+            assert np.array_equal(coords, _coords) and np.array_equal(densities, _densities)
+            print('{:>6} {:>12} {:>16.0f} {:>16.0f} {:>7.1f}x'.format(res, number_of_voxels, number_of_voxels / legacy,
+                                                                   number_of_voxels / bulk, legacy / bulk))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+"""Surfacing time of the blocked marching cubes engine against a single dense grid, checking that
+both give the same surface.
+
+    python3 benchmarks/bench_march.py --res 128 --brick-size 64 --workers 1 2 4
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from core.mesher import march
+
+def lattice(res):
+    """Dense voxel block whose densities describe a thick gyroid lattice."""
+    coords = np.indices((res,) * 3).reshape(3, -1).T
+    x, y, z = (coords * (6 * np.pi / res)).T
+    densities = 0.5 + 0.5 * (np.sin(x) * np.cos(y) + np.sin(y) * np.cos(z) + np.sin(z) * np.cos(x)) / 1.5
+    return coords.astype(np.int32), densities
+
+def same_surface(dense, blocked, tolerance=1e-4):
+    """Whether two ``(vertices, faces, normals)`` meshes have the same vertices, up to ``tolerance``, and the same triangles."""
+    (vertices, faces, _), (other_vertices, other_faces, _) = dense, blocked
+    if len(vertices) != len(other_vertices) or len(faces) != len(other_faces):
+        return False
+    distance, index = cKDTree(vertices).query(other_vertices)
+    if len(distance) and distance.max() > tolerance:
+        return False
+    faces, other_faces = np.sort(faces, axis=1), np.sort(index[other_faces], axis=1)
+    return np.array_equal(faces[np.lexsort(faces.T)], other_faces[np.lexsort(other_faces.T)])
+
+def main():
+    parser = argparse.ArgumentParser(description='Blocked marching cubes benchmark.')
+    parser.add_argument('--res', type=int, nargs='+', default=[96])
+    parser.add_argument('--brick-size', type=int, default=32)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count()])
+    parser.add_argument('--scalar-field', action='store_true')
+    args = parser.parse_args()
+
+    print('{:>6} {:>10} {:>8} {:>10} {:>14} {:>10} {:>6}'.format('res', 'engine', 'workers', 'time [s]', 'grid [MB]', 'triangles', 'same'))
+    for res in args.res:
+        coords, densities = lattice(res)
+
+        start = time.perf_counter()
+        dense = march(coords, densities, 0.5, scalar_field=args.scalar_field)
+        print('{:>6} {:>10} {:>8} {:>10.3f} {:>14.1f} {:>10} {:>6}'.format(res, 'dense', 1, time.perf_counter() - start,
+                                                                         4 * (res + 3)**3 / 2**20, len(dense[1]), '-'))
+
+        for workers in args.workers:
+            start = time.perf_counter()
+            blocked = march(coords, densities, 0.5, scalar_field=args.scalar_field, brick_size=args.brick_size, workers=workers)
+            elapsed = time.perf_counter() - start
+            same = same_surface(dense, blocked)
+            print('{:>6} {:>10} {:>8} {:>10.3f} {:>14.1f} {:>10} {:>6}'.format(res, 'blocked', workers, elapsed,
+                                                                             4 * (args.brick_size + 1)**3 / 2**20, len(blocked[1]), str(same)))
+            if not same:
+                sys.exit('the blocked surface differs from the dense one')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+"""Memory and solve time of the native solver with the assembled stiffness matrix and with the
+matrix-free element operator, for one displacement solve of the uniform initial densities.
+
+    python3 benchmarks/bench_matrixfree.py --problem bracket --res 32 64 96
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from bench_assembly import prepared
+from problems import PROBLEMS
+
+def measure(opt, matrix_free):
+    """Prepares ``opt`` and solves once, returning the stiffness memory, the traced peak, the solve time and the compliance."""
+    opt.parameters['matrix_free'] = matrix_free
+    tracemalloc.start()
+    opt.prepare()
+    x = opt.density[tuple(opt.elements.T)]
+    moduli = opt.parameters['minimum_stiffness'] + x ** opt.parameters['penalty']
+    start = time.perf_counter()
+    K = opt.stiffness(moduli, x > opt.parameters['minimum_density'])
+    displacements = opt.solve(K, moduli)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    stored = opt.operator.nbytes if matrix_free else opt.assembly.nbytes + opt.edofmat.nbytes
+    return stored, peak, elapsed, float(displacements @ opt.forces)
+
+def main():
+    parser = argparse.ArgumentParser(description='Matrix-free operator benchmark.')
+    parser.add_argument('--problem', type=str, default='cantilever', choices=sorted(PROBLEMS))
+    parser.add_argument('--res', type=int, nargs='+', default=[32, 64])
+    args = parser.parse_args()
+
+    print('{:>6} {:>9} {:>14} {:>12} {:>12} {:>12}'.format('res', 'elements', 'operator', 'stored [MB]', 'peak [MB]', 'solve [s]'))
+    with tempfile.TemporaryDirectory() as workspace_path:
+        for res in args.res:
+            compliances = []
+            for matrix_free in (False, True):
+                opt = prepared(workspace_path, args.problem, res)
+                stored, peak, elapsed, compliance = measure(opt, matrix_free)
+                compliances.append(compliance)
+                print('{:6d} {:9d} {:>14} {:12.1f} {:12.1f} {:12.3f}'.format(res, len(opt.elements), 'matrix-free' if matrix_free else 'assembled',
+                                                                           stored / 2**20, peak / 2**20, elapsed))
+            assert np.isclose(*compliances, rtol=1e-6)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""CG iterations and solve time of the native displacement solve preconditioned with Jacobi and with
+the multigrid V-cycle, on the assembled matrix and on the matrix-free operator, against a sparse
+direct solve. The densities alternate between solid and ``--void`` in blocks of ``--block`` cells,
+which gives the stiffness contrast of an optimized design. Before timing, the V-cycle is built as an
+explicit matrix on the small grids of ``--check-res`` with a deep hierarchy and checked to be symmetric
+positive definite, as CG requires.
+
+    python3 benchmarks/bench_multigrid.py --problem bracket --res 32 48 64
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from scipy.sparse.linalg import spsolve
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from core.assembly import grid_nodes
+from core.multigrid import MultigridPreconditioner
+from core.simp import _cg
+from bench_assembly import prepared
+from problems import PROBLEMS
+
+SOLVERS = (('jacobi', False), ('multigrid', False), ('jacobi', True), ('multigrid', True), ('direct', False))
+
+def moduli_of(opt, void, block):
+    x = np.where((opt.elements // block).sum(axis=1) % 2 == 0, 1.0, void)
+    return opt.parameters['minimum_stiffness'] + x ** opt.parameters['penalty']
+
+def smallest_eigenvalue(opt, res, void, block, coarsest_dofs=30):
+    """Smallest eigenvalue of the symmetric part of the V-cycle, built column by column on a hierarchy
+    coarsened down to ``coarsest_dofs``, and the largest deviation from symmetry."""
+    opt.parameters.update(preconditioner='jacobi', matrix_free=False)
+    opt.prepare()
+    moduli = moduli_of(opt, void, block)
+    K = opt.stiffness(moduli)
+    nodes, _ = grid_nodes(opt.elements, res)
+    M = MultigridPreconditioner(opt.elements, nodes, opt.free_dofs, res, opt.KE, coarsest_dofs=coarsest_dofs).update(K, moduli)
+    M = np.column_stack([M @ column for column in np.eye(K.shape[0])])
+    return np.linalg.eigvalsh(0.5 * (M + M.T)).min(), abs(M - M.T).max() / abs(M).max()
+
+def solve(opt, preconditioner, matrix_free, void, block, tolerance, max_iterations):
+    """Solves once from zero, returning the setup and solve times, the CG iterations and the compliance."""
+    opt.parameters.update(preconditioner=preconditioner, matrix_free=matrix_free)
+    start = time.perf_counter()
+    opt.prepare()
+    moduli = moduli_of(opt, void, block)
+    K = opt.stiffness(moduli)
+    forces = opt.forces[opt.free_dofs]
+    if preconditioner == 'direct':
+        setup = time.perf_counter() - start
+        start = time.perf_counter()
+        u, iterations = spsolve(K.tocsc(), forces), 0
+    else:
+        M = opt.preconditioner(K, moduli)
+        setup = time.perf_counter() - start
+        start = time.perf_counter()
+        u, iterations = _cg(K, forces, None, tolerance, max_iterations, M)
+    return setup, time.perf_counter() - start, iterations, float(u @ forces)
+
+def main():
+    parser = argparse.ArgumentParser(description='Multigrid preconditioner benchmark.')
+    parser.add_argument('--problem', type=str, default='cantilever', choices=sorted(PROBLEMS))
+    parser.add_argument('--res', type=int, nargs='+', default=[32, 48])
+    parser.add_argument('--void', type=float, default=0.05, help='density of the void blocks')
+    parser.add_argument('--block', type=int, default=3, help='size of the solid and void blocks in cells')
+    parser.add_argument('--tolerance', type=float, default=1e-6)
+    parser.add_argument('--max-iterations', type=int, default=20000)
+    parser.add_argument('--check-res', type=int, nargs='*', default=[8, 12, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workspace_path:
+        for res in args.check_res:
+            for void in (1.0, args.void):
+                eigenvalue, asymmetry = smallest_eigenvalue(prepared(workspace_path, args.problem, res), res, void, args.block)
+                print('res {:3d} void {:8.2g}: smallest eigenvalue of the V-cycle {:.3g}, asymmetry {:.1g}'.format(res, void, eigenvalue, asymmetry))
+                if eigenvalue <= 0:
+                    sys.exit('the V-cycle is not positive definite')
+
+    print('{:>6} {:>9} {:>12} {:>12} {:>11} {:>11} {:>11} {:>14}'.format('res', 'DOFs', 'solver', 'operator', 'setup [s]', 'solve [s]',
+                                                                         'iterations', 'compliance'))
+    with tempfile.TemporaryDirectory() as workspace_path:
+        for res in args.res:
+            opt = prepared(workspace_path, args.problem, res)
+            for preconditioner, matrix_free in SOLVERS:
+                setup, elapsed, iterations, compliance = solve(opt, preconditioner, matrix_free, args.void, args.block,
+                                                               args.tolerance, args.max_iterations)
+                print('{:6d} {:9d} {:>12} {:>12} {:11.3f} {:11.3f} {:11d} {:14.6g}'.format(res, len(opt.free_dofs), preconditioner,
+                                                                                         'matrix-free' if matrix_free else 'assembled',
+                                                                                         setup, elapsed, iterations, compliance))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+"""Times every stage of the define -> optimize -> visualize pipeline on the canonical problems, without
+Blender and with the deterministic stand-in optimizer, and records the peak memory each stage allocates.
+
+    python3 benchmarks/bench_pipeline.py --res 32 64 --iterations 10 --output pipeline.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from core.batch import export_iteration
+from core.metrics import peak_rss
+from core.problem import DEFAULT_PARAMETERS, PROBLEM_NAME, Problem, read_problem, write_problem
+from core.standin import StandinOptimizer
+from core.voxelize import write_obj
+from problems import PROBLEMS, generate
+
+STAGES = ('generate', 'define', 'voxelize', 'filter', 'boundary', 'optimize', 'visualize')
+
+class Stages:
+    """Measures the wall time and the peak of the memory allocated through Python of consecutive stages."""
+    def __init__(self):
+        self.results = {}
+
+    def __call__(self, stage, function, *args, **kwargs):
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.results[stage] = {'time': time.perf_counter() - start, 'memory': tracemalloc.get_traced_memory()[1]}
+        return result
+
+def pipeline(workspace_path, name, res, iterations):
+    stages = Stages()
+    directory = os.path.join(workspace_path, name)
+    os.makedirs(directory, exist_ok=True)
+
+    def define(fixed, forces, force_vectors):
+        problem = Problem.from_faces(fixed, forces, force_vectors, {'name': 'Steel-S275JR', 'youngs': 210000.0, 'poisson': 0.3},
+                                        dict(DEFAULT_PARAMETERS, res=res, max_iterations=iterations))
+        write_problem(os.path.join(directory, PROBLEM_NAME), problem)
+        return read_problem(os.path.join(directory, PROBLEM_NAME))
+
+    def boundary(opt, problem):
+        parameters = problem.parameters
+        opt.add_customplane_dirichlet_bcs('xyz', problem.fixed, parameters['fixed_epsilon'], problem.fixed_regions)
+        for i in range(problem.number_of_forces):
+            opt.add_customplane_loads(problem.force_vectors[i], problem.force(i), parameters['forced_epsilon'],
+                                        problem.force_region_offsets(i))
+
+    def write_mesh():
+        vertices, faces, fixed, forces, force_vectors = generate(name)
+        write_obj(os.path.join(directory, name + '.obj'), vertices, faces)
+        return fixed, forces, force_vectors
+
+    fixed, forces, force_vectors = stages('generate', write_mesh)
+    problem = stages('define', define, fixed, forces, force_vectors)
+
+    opt = StandinOptimizer(working_directory=workspace_path, filename=name, task_id='bench',
+                            E=problem.material['youngs'], nu=problem.material['poisson'], **problem.parameters)
+    stages('voxelize', opt.import_mesh, os.path.join(directory, name + '.obj'))
+    stages('filter', opt.filter_domain)
+    stages('boundary', boundary, opt, problem)
+    objective = stages('optimize', opt.run)
+    stl = stages('visualize', export_iteration, opt.working_directory, directory, iterations, resolution=res, name=name)
+
+    return {'problem': name,
+            'res': res,
+            'cells': int(opt.domain.sum()),
+            'fixed_cells': int(opt.fixed_cells.sum()),
+            'loaded_cells': int(opt.loaded_cells.sum()),
+            'objective': objective,
+            'stl': stl is not None,
+            'stages': stages.results}
+
+def main():
+    parser = argparse.ArgumentParser(description='Pipeline benchmark on the canonical problems.')
+    parser.add_argument('--problems', type=str, nargs='+', default=sorted(PROBLEMS), choices=sorted(PROBLEMS))
+    parser.add_argument('--res', type=int, nargs='+', default=[32, 64])
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--output', type=str, help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    results = []
+    print('{:>12} {:>6} {:>9} '.format('problem', 'res', 'cells') + ' '.join('{:>17}'.format(stage + ' [s/MB]') for stage in STAGES) + ' {:>12}'.format('objective'))
+
+    with tempfile.TemporaryDirectory() as workspace_path:
+        for res in args.res:
+            for name in args.problems:
+                result = pipeline(workspace_path, name, res, args.iterations)
+                results.append(result)
+                print('{:>12} {:6d} {:9d} '.format(name, res, result['cells'])
+                        + ' '.join('{:9.3f}/{:7.1f}'.format(result['stages'][stage]['time'], result['stages'][stage]['memory'] / 2**20) for stage in STAGES)
+                        + ' {:12.6g}'.format(result['objective']))
+
+    print('peak RSS {:.1f} MB'.format(peak_rss() / 2**20))
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results, 'peak_rss': peak_rss(), 'numpy': np.__version__}, f, indent=1)
+
+if __name__ == '__main__':
+    main()
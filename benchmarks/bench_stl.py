@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""Write time and file size of the STL writer against the per-triangle ASCII loop it replaced.
+
+    python3 benchmarks/bench_stl.py --res 64 128
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from skimage import measure
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from core.mesher import write_stl, STL_FACET
+
+def gyroid(res):
+    x, y, z = np.mgrid[0:res, 0:res, 0:res] * (4 * np.pi / res)
+    field = np.sin(x) * np.cos(y) + np.sin(y) * np.cos(z) + np.sin(z) * np.cos(x)
+    return measure.marching_cubes(field, level=0.0)[:3]
+
+def legacy_write_stl(output_path, vertices, faces, normals):
+    with open(output_path, 'w') as f:
+        f.write('GENERATED BY ANTON\n')
+        for i, tri in enumerate(faces):
+            normal = normals[tri[0]] + normals[tri[1]] + normals[tri[2]]
+            f.write('facet normal {} {} {}\n'.format(
+                                                    normal[0],
+                                                    normal[1],
+                                                    normal[2]))
+
+            f.write('outer loop\n')
+            for vertex_id in tri:
+                f.write('vertex {} {} {}\n'.format(
+                                                    vertices[vertex_id][0],
+                                                    vertices[vertex_id][1],
+                                                    vertices[vertex_id][2]))
+
+            f.write('endloop\n')
+            f.write('endfacet\n')
+
+        f.write('endsolid\n')
+
+def read_ascii_vertices(path):
+    with open(path) as f:
+        return np.array([line.split()[1:] for line in f if line.startswith('vertex')], dtype=np.float32)
+
+def main():
+    parser = argparse.ArgumentParser(description='STL writer benchmark.')
+    parser.add_argument('--res', type=int, nargs='+', default=[32, 64])
+    args = parser.parse_args()
+
+    print('{:>6} {:>10} {:>18} {:>18} {:>18}'.format('res', 'triangles', 'legacy s / MB', 'ascii s / MB', 'binary s / MB'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for res in args.res:
+            vertices, faces, normals = gyroid(res)
+            vertices = vertices.astype(np.float64)
+            timings = []
+
+            for name, writer in [('legacy', lambda p: legacy_write_stl(p, vertices, faces, normals)),
+                                 ('ascii', lambda p: write_stl(p, vertices, faces, normals, binary=False)),
+                                 ('binary', lambda p: write_stl(p, vertices, faces, normals, binary=True))]:
+                path = os.path.join(tmp, '{}_{}.stl'.format(name, res))
+                start = time.perf_counter()
+                writer(path)
+                timings.append((time.perf_counter() - start, os.path.getsize(path) / 2**20))
+
+            # All three files carry the same triangles
+            expected = vertices[faces].reshape(-1, 3).astype(np.float32)
+            facets = np.frombuffer(open(os.path.join(tmp, 'binary_{}.stl'.format(res)), 'rb').read()[84:], dtype=STL_FACET)
+            assert np.array_equal(facets['vertices'].reshape(-1, 3), expected)
+            assert np.array_equal(read_ascii_vertices(os.path.join(tmp, 'ascii_{}.stl'.format(res))), expected)
+            assert np.array_equal(read_ascii_vertices(os.path.join(tmp, 'legacy_{}.stl'.format(res))), expected)
+
+            print('{:>6} {:>10} {}'.format(res, len(faces), ' '.join('{:>9.3f} / {:>6.1f}'.format(*t) for t in timings)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+"""Canonical problems of the benchmark suite, generated procedurally: the design space of each is a
+union of unit blocks, written as an OBJ file, and its boundary conditions are picked among the faces
+of its surface, written as a problem file.
+
+    python3 benchmarks/problems.py /tmp/ --problems cantilever bracket --res 64
+"""
+import argparse
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from core.problem import DEFAULT_PARAMETERS, PROBLEM_NAME, Problem, write_problem
+from core.voxelize import write_obj
+
+BLOCK = 0.5
+
+def block_mesh(blocks, block=BLOCK):
+    """Surface of a union of unit blocks, two triangles per exposed block face, centered at the origin.
+
+    :param blocks: Occupancy of the blocks (``nx x ny x nz``, ``bool``)
+    :type blocks: *numpy.array*
+
+    :return: Vertices, triangles, and the outward normal and center of the face of every triangle
+    :rtype: ``tuple`` of *numpy.array*
+    """
+    padded = np.pad(blocks, 1)
+    offset = (np.array(blocks.shape) * block) / 2
+    vertices, faces, normals, centers = [], [], [], []
+
+    for axis in range(3):
+        u, v = [k for k in range(3) if k != axis]
+        for side in (-1, 1):
+            neighbour = np.roll(padded, -side, axis=axis)[1:-1, 1:-1, 1:-1]
+            for cell in np.argwhere(blocks & ~neighbour):
+                normal = np.zeros(3)
+                normal[axis] = side
+                center = (cell + 0.5) * block - offset + normal * block / 2
+
+                corners = []
+                for du, dv in ((-1, -1), (1, -1), (1, 1), (-1, 1)):
+                    corner = center.copy()
+                    corner[u] += du * block / 2
+                    corner[v] += dv * block / 2
+                    corners.append(corner)
+                if np.dot(np.cross(corners[1] - corners[0], corners[2] - corners[0]), normal) < 0:
+                    corners.reverse()
+
+                start = len(vertices)
+                vertices.extend(corners)
+                faces.extend([[start, start + 1, start + 2], [start, start + 2, start + 3]])
+                normals.extend([normal, normal])
+                centers.extend([center, center])
+
+    return np.array(vertices), np.array(faces, dtype=np.int64), np.array(normals), np.array(centers)
+
+def _blocks(shape, *boxes):
+    blocks = np.zeros(shape, dtype=bool)
+    for lower, upper in boxes:
+        blocks[lower[0]:upper[0], lower[1]:upper[1], lower[2]:upper[2]] = True
+    return blocks
+
+def cantilever():
+    """Beam fixed at one end and loaded downwards at the lower edge of the other."""
+    blocks = _blocks((16, 6, 6), ((0, 0, 0), (16, 6, 6)))
+    return blocks, lambda n, c: n[:, 0] < -0.5, [(lambda n, c: (n[:, 0] > 0.5) & (c[:, 2] < c[:, 2].min() + BLOCK), (0.0, 0.0, -1.0))]
+
+def mbb_beam():
+    """Simply supported beam loaded at the middle of its top."""
+    blocks = _blocks((18, 4, 6), ((0, 0, 0), (18, 4, 6)))
+    return (blocks,
+            lambda n, c: (n[:, 2] < -0.5) & (np.abs(c[:, 0]) > c[:, 0].max() - BLOCK),
+            [(lambda n, c: (n[:, 2] > 0.5) & (np.abs(c[:, 0]) < BLOCK), (0.0, 0.0, -1.0))])
+
+def bridge():
+    """Deck on two piers fixed at their feet, loaded along the whole deck."""
+    blocks = _blocks((18, 6, 8), ((0, 0, 5), (18, 6, 8)), ((3, 0, 0), (5, 6, 5)), ((13, 0, 0), (15, 6, 5)))
+    return (blocks,
+            lambda n, c: (n[:, 2] < -0.5) & (c[:, 2] < c[:, 2].min() + BLOCK / 2),
+            [(lambda n, c: n[:, 2] > 0.5, (0.0, 0.0, -1.0))])
+
+def bracket():
+    """L-shaped bracket fixed at its back plate, with three forces on its arm."""
+    blocks = _blocks((12, 6, 12), ((0, 0, 0), (2, 6, 12)), ((0, 0, 9), (12, 6, 12)))
+    return (blocks,
+            lambda n, c: n[:, 0] < -0.5,
+            [(lambda n, c: (n[:, 2] > 0.5) & (c[:, 0] > c[:, 0].max() - BLOCK), (0.0, 0.0, -1.0)),
+             (lambda n, c: n[:, 0] > 0.5, (0.5, 0.0, 0.0)),
+             (lambda n, c: (n[:, 1] > 0.5) & (np.abs(c[:, 0] - 1.5) < BLOCK), (0.0, 0.5, 0.0))])
+
+PROBLEMS = {'cantilever': cantilever, 'mbb_beam': mbb_beam, 'bridge': bridge, 'bracket': bracket}
+
+def generate(name):
+    """Builds the design space and the boundary conditions of problem ``name``.
+
+    :return: Vertices, triangles, fixed triangles, triangles of every force and the force vectors
+    :rtype: ``tuple``
+    """
+    blocks, fixed, forces = PROBLEMS[name]()
+    vertices, faces, normals, centers = block_mesh(blocks)
+    triangles = vertices[faces]
+
+    return (vertices, faces, triangles[fixed(normals, centers)],
+            [triangles[selection(normals, centers)] for selection, _ in forces],
+            np.array([vector for _, vector in forces]) * 100.0)
+
+def write(workspace_path, name, res, material=None):
+    """Writes ``<workspace>/<name>/<name>.obj`` and ``<workspace>/<name>/problem.anton`` for resolution ``res``.
+
+    :return: Directory of the problem
+    :rtype: ``str``
+    """
+    vertices, faces, fixed, forces, force_vectors = generate(name)
+    directory = os.path.join(workspace_path, name)
+    os.makedirs(directory, exist_ok=True)
+
+    write_obj(os.path.join(directory, name + '.obj'), vertices, faces)
+    write_problem(os.path.join(directory, PROBLEM_NAME),
+                    Problem.from_faces(fixed, forces, force_vectors,
+                                        material or {'name': 'Steel-S275JR', 'youngs': 210000.0, 'poisson': 0.3},
+                                        dict(DEFAULT_PARAMETERS, res=res)))
+    return directory
+
+def main():
+    parser = argparse.ArgumentParser(description='Writes the canonical benchmark problems.')
+    parser.add_argument('workspace_path', type=str)
+    parser.add_argument('--problems', type=str, nargs='+', default=sorted(PROBLEMS), choices=sorted(PROBLEMS))
+    parser.add_argument('--res', type=int, default=64)
+    args = parser.parse_args()
+
+    for name in args.problems:
+        print(write(args.workspace_path, name, args.res))
+
+if __name__ == '__main__':
+    main()
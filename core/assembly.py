@@ -0,0 +1,66 @@
+import numpy as np
+from scipy import sparse
+
+CORNERS = np.indices((2, 2, 2)).reshape(3, -1).T
+
+def grid_nodes(elements, res):
+    """Numbers the nodes of the voxel elements at the integer positions ``elements`` of a ``res^3`` grid.
+
+    :return: Flat indices of the used nodes in the ``(res + 1)^3`` node grid, sorted, and the positions
+        of the ``8`` corners of every element among them, in the order of ``CORNERS``
+    :rtype: ``tuple`` of *numpy.array*
+    """
+    corners = np.ravel_multi_index((elements[:, None, :] + CORNERS[None, :, :]).transpose(2, 0, 1), (res + 1,) * 3)
+    used, element_nodes = np.unique(corners, return_inverse=True)
+    return used, element_nodes.reshape(-1, 8)
+
+class StiffnessAssembly:
+    """Assembly of the global stiffness matrix of a voxel domain, restricted to its free DOFs. On a
+    regular grid every element matrix is the reference matrix ``KE`` scaled by the element's modulus
+    and the sparsity pattern never changes, so the pattern is built once per domain: the element
+    entries that couple two free DOFs are kept and each is mapped to its slot in the data array of a
+    CSR matrix. The mapping is stored as a sparse ``slots x elements`` matrix holding the ``KE``
+    entries, so that assembling is a single product with the element moduli written into the
+    preallocated data array; no index array is built per iteration.
+
+    :ivar matrix: Stiffness matrix of the free DOFs, whose data is overwritten by every ``assemble``
+    :vartype matrix: *scipy.sparse.csr_matrix*
+    :ivar scatter: Contribution of each element's modulus to each slot of ``matrix.data``
+    :vartype scatter: *scipy.sparse.csr_matrix*
+
+    \\
+    """
+    def __init__(self, edofmat, free_dofs, number_of_dofs, KE):
+        number_of_elements = len(edofmat)
+        n = len(free_dofs)
+        free_index = np.full(number_of_dofs, -1, dtype=np.int64)
+        free_index[free_dofs] = np.arange(n)
+
+        rows = np.repeat(free_index[edofmat], 24, axis=1)
+        cols = np.tile(free_index[edofmat], (1, 24))
+        kept = (rows >= 0) & (cols >= 0)
+        element, local = np.nonzero(kept)
+        pattern, slots = np.unique(rows[kept] * n + cols[kept], return_inverse=True)
+        del rows, cols, kept
+
+        index_dtype = np.int32 if max(len(pattern), n, number_of_elements) < 2**31 else np.int64
+        self.scatter = sparse.csr_matrix((np.asarray(KE, dtype=np.float64).reshape(-1)[local],
+                                            (slots.reshape(-1), element)), shape=(len(pattern), number_of_elements))
+
+        indptr = np.zeros(n + 1, dtype=index_dtype)
+        np.cumsum(np.bincount(pattern // n, minlength=n), out=indptr[1:])
+        self.matrix = sparse.csr_matrix((np.zeros(len(pattern)), (pattern % n).astype(index_dtype), indptr), shape=(n, n))
+
+    @property
+    def nbytes(self):
+        """Memory held by the cached pattern and the matrix, in bytes."""
+        return (self.scatter.data.nbytes + self.scatter.indices.nbytes + self.scatter.indptr.nbytes
+                + self.matrix.data.nbytes + self.matrix.indices.nbytes + self.matrix.indptr.nbytes)
+
+    def assemble(self, moduli):
+        """Fills ``matrix`` for the element moduli ``moduli``.
+
+        :rtype: *scipy.sparse.csr_matrix*
+        """
+        self.matrix.data[:] = self.scatter @ moduli
+        return self.matrix
@@ -0,0 +1,290 @@
+import os
+import time
+import numpy as np
+from .boundary import tag_cells
+from .continuation import upsample
+from .manifest import RunManifest, MANIFEST_NAME
+from .metrics import MetricsLog, METRICS_NAME
+from .problem import DEFAULT_PARAMETERS
+from .regions import connected_components
+from .tcb import FEMFormatError, load_voxels, write_fem
+from .voxelize import read_obj, voxelize
+
+class Backend:
+    """Interface ``optimizer.py`` drives an optimization through. A backend is constructed with the
+    keyword arguments ``optimizer.py`` builds from the problem (``res``, ``scale``, ``filename``,
+    ``working_directory``, ``volume_fraction``, ``penalty``, ``E``, ``nu``, ``max_iterations``, the stop
+    parameters and the advanced parameters), imports and filters the design space, takes the boundary
+    conditions and runs. Every backend writes a run directory
+    ``<workspace>/<filename>/output/<task_id>_<suffix>`` with a manifest record, ``log.txt``,
+    ``metrics.jsonl`` and the densities of every iteration as ``fem/<iteration>.tcb.zip``, which
+    the visualizer, the sweeps and the metrics reader rely on.
+
+    \\
+    """
+    def import_mesh(self, filename, adaptive=False):
+        """Fills the design space with the cells inside the OBJ mesh ``filename``."""
+        raise NotImplementedError
+
+    def filter_domain(self):
+        """Drops the cells that are not connected to the largest part of the design space."""
+        raise NotImplementedError
+
+    def add_customplane_dirichlet_bcs(self, axis_to_fix, triangles, thresh=0.00001, regions=None):
+        """Fixes the ``axis_to_fix`` displacements of the nodes near ``triangles``. The grid backends tag
+        the cells of all triangles in one pass with ``core.boundary.tag_cells``; ``TopoOpt`` has no such
+        pass and scans its grid once per triangle action, as it always did.
+        """
+        raise NotImplementedError
+
+    def add_customplane_loads(self, force, triangles, thresh=0.00001, regions=None):
+        """Applies ``force`` to the nodes near ``triangles``."""
+        raise NotImplementedError
+
+    def save_domain(self, fn):
+        """Saves the filtered design space with its boundary conditions, before any iteration."""
+        raise NotImplementedError
+
+    def load_domain(self, fn, overrides):
+        """Starts from a design space saved by ``save_domain``, with the parameters in ``overrides`` replaced."""
+        raise NotImplementedError
+
+    def load_initial_density(self, fn, res=None):
+        """Starts from the densities of a ``*.tcb.zip`` file written at resolution ``res``.
+
+        :raises FEMFormatError: The file cannot be decoded; the run fails rather than starting from the
+            uniform density
+        """
+        raise NotImplementedError
+
+    def save_final_density(self, fn):
+        """Copies the densities of the last iteration to ``fn``."""
+        raise NotImplementedError
+
+    def run(self):
+        """Iterates until a stop rule applies and records the end of the run in the manifest."""
+        raise NotImplementedError
+
+class StopRule:
+    """Early stop rules shared by the backends: after ``min_iterations``, the relative change of the
+    objective over the last four iterations has to stay below ``stop_tolerance`` (never if ``0``) for
+    ``stop_patience`` iterations, and the run stops once ``time_budget`` seconds (unlimited if ``0``)
+    have passed. Both rules are off by default, so a run goes to ``max_iterations`` as it always did.
+
+    \\
+    """
+    def __init__(self, stop_tolerance=0.0, stop_patience=1, min_iterations=10, time_budget=0):
+        self.stop_tolerance = stop_tolerance
+        self.stop_patience = stop_patience
+        self.min_iterations = min_iterations
+        self.time_budget = time_budget
+        self.start_time = time.time()
+        self.objectives = []
+        self.converged = 0
+        self.change = None
+
+    def update(self, i, objective):
+        """Records the objective of iteration ``i``.
+
+        :return: ``'converged'`` or ``'time_budget'`` if the run should stop, ``None`` otherwise
+        :rtype: ``str``
+        """
+        objectives = self.objectives
+        objectives.append(objective)
+        self.change = None
+        if i > self.min_iterations and len(objectives) >= 4:
+            self.change = abs((objectives[-1] + objectives[-2] - objectives[-3] - objectives[-4]) / (objectives[-1] + objectives[-2]))
+            self.converged = self.converged + 1 if self.change < self.stop_tolerance else 0
+            if self.converged >= self.stop_patience:
+                return 'converged'
+
+        if self.time_budget and time.time() - self.start_time >= self.time_budget:
+            return 'time_budget'
+        return None
+
+def _face_neighbours(mask):
+    """Pairs of flat indices of face-adjacent cells that are both set in ``mask``."""
+    index = np.arange(mask.size).reshape(mask.shape)
+    pairs = []
+    for axis in range(3):
+        lower = [slice(None)] * 3
+        upper = [slice(None)] * 3
+        lower[axis], upper[axis] = slice(None, -1), slice(1, None)
+        both = mask[tuple(lower)] & mask[tuple(upper)]
+        pairs.append((index[tuple(lower)][both], index[tuple(upper)][both]))
+    return np.concatenate([a for a, _ in pairs]), np.concatenate([b for _, b in pairs])
+
+class GridBackend(Backend):
+    """Base of the backends that optimize on a dense ``res^3`` cell grid in this process. It voxelizes
+    the design space with ``core.voxelize``, tags the boundary condition cells with
+    ``core.boundary.tag_cells``, keeps the densities of the design space cells and runs the iteration
+    loop with its bookkeeping; subclasses implement ``iterate``.
+
+    :ivar res: Resolution of the grid
+    :vartype res: ``int``
+    :ivar parameters: Solver parameters, the defaults of ``core.problem.DEFAULT_PARAMETERS`` updated with the keyword arguments
+    :vartype parameters: ``dict``
+    :ivar domain: Design space cells (``res x res x res``, ``bool``)
+    :vartype domain: *numpy.array*
+    :ivar density: Densities of the grid cells (``res x res x res``, ``float64``)
+    :vartype density: *numpy.array*
+    :ivar fixed: Fixed cells and the axes fixed there, ``list`` of ``(axis_to_fix, flat cell indices)``
+    :vartype fixed: ``list``
+    :ivar loads: Loaded cells and their force, ``list`` of ``(force, flat cell indices)``
+    :vartype loads: ``list``
+
+    \\
+    """
+    name = 'grid'
+
+    def __init__(self, **kwargs):
+        res = kwargs['res']
+        self.res = res[0] if isinstance(res, (tuple, list)) else res
+        self.scale = kwargs.get('scale', 0.1)
+        self.parameters = dict(DEFAULT_PARAMETERS, **{key: value for key, value in kwargs.items() if key != 'res'})
+        self.parameters['res'] = self.res
+        self.max_iterations = self.parameters['max_iterations']
+
+        self.task_id = kwargs.get('task_id') or '{}-{:05d}'.format(time.strftime('%Y-%m-%d-%H-%M-%S'), os.getpid() % 100000)
+        self.suffix = '{}_r{:04d}'.format(self.name, self.res) + kwargs.get('suffix', '')
+        self.filename = kwargs.get('filename', 'anton')
+        self.working_directory = os.path.join(kwargs.get('working_directory', os.getcwd()), self.filename, 'output',
+                                                self.task_id + '_' + self.suffix)
+        self.fem_directory = os.path.join(self.working_directory, 'fem')
+        os.makedirs(self.fem_directory, exist_ok=True)
+
+        self.log_file = open(os.path.join(self.working_directory, 'log.txt'), 'a')
+        self.manifest = RunManifest(os.path.join(os.path.dirname(self.working_directory), MANIFEST_NAME))
+        self.manifest.start(self.task_id, self.suffix, self.working_directory,
+                            dict({key: value for key, value in kwargs.items() if key != 'working_directory'}, backend=self.name))
+
+        self.domain = np.zeros((self.res,) * 3, dtype=bool)
+        self.density = None
+        self.fixed = []
+        self.loads = []
+        self.phases = {}
+        self.last_iteration = None
+
+    def log(self, message):
+        self.log_file.write(message + '\n')
+        self.log_file.flush()
+
+    def get_fem_file_name(self, i):
+        return os.path.join(self.fem_directory, '{:05d}.tcb.zip'.format(i))
+
+    def import_mesh(self, filename, adaptive=False):
+        vertices, faces = read_obj(filename)
+        self.domain = voxelize(vertices[faces], self.res, self.scale)
+        self.log('Imported {} cells from {}'.format(int(self.domain.sum()), filename))
+
+    def filter_domain(self):
+        a, b = _face_neighbours(self.domain)
+        labels = connected_components(self.domain.size, a, b)[self.domain.reshape(-1)]
+        if len(labels):
+            largest = np.bincount(labels).argmax()
+            self.domain.reshape(-1)[np.flatnonzero(self.domain)[labels != largest]] = False
+
+    def add_customplane_dirichlet_bcs(self, axis_to_fix, triangles, thresh=0.00001, regions=None):
+        cells = tag_cells(np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3), self.res, self.scale, thresh, regions)
+        self.fixed.append((axis_to_fix, cells))
+
+    def add_customplane_loads(self, force, triangles, thresh=0.00001, regions=None):
+        cells = tag_cells(np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3), self.res, self.scale, thresh, regions)
+        self.loads.append((tuple(force), cells))
+
+    def save_domain(self, fn):
+        with open(fn, 'wb') as f:
+            np.savez(f, domain=self.domain,
+                        fixed_axes=np.array([axis for axis, _ in self.fixed], dtype=str),
+                        fixed_offsets=np.cumsum([0] + [len(cells) for _, cells in self.fixed]),
+                        fixed_cells=np.concatenate([cells for _, cells in self.fixed] + [np.empty(0, dtype=np.int64)]),
+                        forces=np.array([force for force, _ in self.loads], dtype=np.float64).reshape(-1, 3),
+                        load_offsets=np.cumsum([0] + [len(cells) for _, cells in self.loads]),
+                        load_cells=np.concatenate([cells for _, cells in self.loads] + [np.empty(0, dtype=np.int64)]))
+        self.manifest.end(self.task_id, 0, stop_reason='domain')
+
+    def load_domain(self, fn, overrides):
+        with np.load(fn) as saved:
+            self.domain = saved['domain']
+            offsets = saved['fixed_offsets']
+            self.fixed = [(str(axis), saved['fixed_cells'][start:end])
+                            for axis, start, end in zip(saved['fixed_axes'], offsets[:-1], offsets[1:])]
+            offsets = saved['load_offsets']
+            self.loads = [(tuple(force), saved['load_cells'][start:end])
+                            for force, start, end in zip(saved['forces'], offsets[:-1], offsets[1:])]
+        self.parameters.update(overrides)
+
+    def load_initial_density(self, fn, res=None):
+        voxels = load_voxels(fn, os.path.join(self.working_directory, 'initial_density.densities.txt'))
+        if voxels is None:
+            raise FEMFormatError('{}: cannot be decoded as the initial density'.format(fn))
+        coords, densities = voxels
+        if res is not None and res != self.res:
+            coords, densities = upsample(coords, densities, res, self.res)
+        inside = np.all((coords >= 0) & (coords < self.res), axis=1)
+        self.density = np.zeros((self.res,) * 3)
+        self.density[tuple(coords[inside].T)] = densities[inside]
+        self.log('Initial density from {}'.format(fn))
+
+    def save_final_density(self, fn):
+        if self.last_iteration is not None:
+            with open(self.get_fem_file_name(self.last_iteration), 'rb') as source, open(fn, 'wb') as target:
+                target.write(source.read())
+
+    def write_density(self, i):
+        write_fem(self.get_fem_file_name(i), np.argwhere(self.domain).astype(np.int32), self.density[self.domain])
+
+    def prepare(self):
+        """Sets up what the iterations share once the domain and the boundary conditions are known."""
+
+    def iterate(self, i):
+        """Runs iteration ``i`` on ``self.density``, recording phase times in ``self.phases``.
+
+        :return: Objective
+        :rtype: ``float``
+        """
+        raise NotImplementedError
+
+    def run(self):
+        parameters = self.parameters
+        if self.density is None:
+            self.density = np.where(self.domain, parameters['volume_fraction'], 0.0)
+        else:
+            self.density = np.where(self.domain, np.clip(self.density, 0.0, 1.0), 0.0)
+
+        start = time.time()
+        self.prepare()
+        self.log('Prepared {} cells in {:.3f} s'.format(int(self.domain.sum()), time.time() - start))
+
+        stop = StopRule(parameters['stop_tolerance'], parameters['stop_patience'], parameters['min_iterations'], parameters['time_budget'])
+        metrics = MetricsLog(os.path.join(self.working_directory, METRICS_NAME))
+        stop_reason = 'max_iterations'
+        objective = None
+
+        for i in range(self.max_iterations):
+            self.log('Starting Iteration {}...'.format(i))
+            self.phases = {}
+            objective = float(self.iterate(i))
+
+            start = time.time()
+            self.write_density(i)
+            self.phases['save'] = time.time() - start
+            self.last_iteration = i
+
+            metrics.write(i, objective, None, self.phases)
+            self.log('\n**** Iteration {} finished.\n*** (objective = {:6.3f})'.format(i, objective))
+
+            reason = stop.update(i, objective)
+            if stop.change is not None:
+                self.log('r = {:4.2f}%'.format(stop.change * 100))
+            if reason is not None:
+                self.log('*************** Stopped ({}), final objective: {}'.format(reason, objective))
+                stop_reason = reason
+                break
+
+        metrics.close()
+        volume = None if self.density is None else float(self.density[self.domain].mean())
+        self.manifest.end(self.task_id, 0 if self.last_iteration is None else self.last_iteration + 1,
+                            objective=objective, volume=volume, stop_reason=stop_reason)
+        self.log_file.close()
+        return objective
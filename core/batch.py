@@ -0,0 +1,88 @@
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .mesher import march, object_space, write_stl
+from .tcb import load_voxels
+
+def available_iterations(run_directory):
+    """Lists the iterations (counted from ``1`` like ``viz_iteration``) that have a ``fem`` file."""
+    return sorted(int(os.path.basename(path).split('.')[0]) + 1
+                    for path in glob.glob(os.path.join(run_directory, 'fem', '*.tcb.zip')))
+
+def export_iteration(run_directory, output_directory, iteration, resolution=100, density_thresh=0.2,
+                        scalar_field=False, binary=True, name='anton'):
+    """Converts and surfaces one iteration of a run and writes it as ``<name>_<iteration>.stl``.
+
+    :return: Path to the written STL file, ``None`` if the iteration could not be converted or is empty
+    :rtype: ``str``
+    """
+    fem_file = os.path.join(run_directory, 'fem', '{:05d}.tcb.zip'.format(iteration - 1))
+    density_file = os.path.join(output_directory, '{}_{:05d}.densities.txt'.format(name, iteration))
+    stl_file = os.path.join(output_directory, '{}_{:05d}.stl'.format(name, iteration))
+
+    voxels = load_voxels(fem_file, density_file)
+    if voxels is None or not (voxels[1] >= density_thresh).any():
+        return None
+
+    vertices, faces, normals = march(*voxels, density_thresh=density_thresh, scalar_field=scalar_field)
+    write_stl(stl_file, object_space(vertices, resolution), faces, normals, binary=binary)
+    return stl_file
+
+def export_iterations(run_directory, output_directory, iterations=None, every=1, resolution=100, density_thresh=0.2,
+                        scalar_field=False, binary=True, name='anton', workers=None):
+    """Converts and surfaces a range of iterations of a run in a pool of ``workers`` processes, one
+    iteration per task, and writes one STL file per iteration. Works without Blender.
+
+    :param run_directory: Run directory holding the ``fem`` folder
+    :type run_directory: ``str``
+    :param output_directory: Folder the STL files are written to
+    :type output_directory: ``str``
+    :param iterations: Iterations to export, every available iteration if ``None``
+    :type iterations: ``list`` of ``int``
+    :param every: Export every n-th iteration only (``1``)
+    :type every: ``int``
+    :param workers: Number of worker processes, all cores if ``None``
+    :type workers: ``int``
+
+    :return: ``(iteration, stl_path)`` pairs in iteration order, ``stl_path`` being ``None`` for failed iterations
+    :rtype: ``list`` of ``tuple``
+
+    \\
+    """
+    if iterations is None:
+        iterations = available_iterations(run_directory)
+    iterations = list(iterations)[::every]
+    os.makedirs(output_directory, exist_ok=True)
+
+    arguments = [(run_directory, output_directory, iteration, resolution, density_thresh, scalar_field, binary, name)
+                    for iteration in iterations]
+
+    if workers == 1 or len(arguments) < 2:
+        paths = [export_iteration(*_arguments) for _arguments in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(export_iteration, *zip(*arguments)))
+
+    return list(zip(iterations, paths))
+
+def main():
+    parser = argparse.ArgumentParser(description='Exports every iteration of an anton run as STL.')
+    parser.add_argument('run_directory', type=str)
+    parser.add_argument('output_directory', type=str)
+    parser.add_argument('--every', type=int, default=1, help='export every n-th iteration')
+    parser.add_argument('--res', type=int, default=100, help='resolution of the run')
+    parser.add_argument('--density', type=float, default=0.2, help='density threshold')
+    parser.add_argument('--smooth', action='store_true', help='surface the density field')
+    parser.add_argument('--ascii', action='store_true', help='write ASCII STL files')
+    parser.add_argument('--name', type=str, default='anton')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    for iteration, path in export_iterations(args.run_directory, args.output_directory, every=args.every,
+                                                resolution=args.res, density_thresh=args.density, scalar_field=args.smooth,
+                                                binary=not args.ascii, name=args.name, workers=args.workers):
+        print('{:5d} {}'.format(iteration, path))
+
+if __name__ == '__main__':
+    main()
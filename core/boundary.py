@@ -0,0 +1,170 @@
+import numpy as np
+
+def lattice_coordinates(points, res, scale=0.1):
+    """Maps object-space points to lattice units of a ``res`` grid, the way ``TopoOpt.import_mesh``
+    places the mesh: scaled by ``scale`` and centered at ``0.5`` in the unit cube.
+    """
+    return (np.asarray(points, dtype=np.float64) * scale + 0.5) * res
+
+def _cross(a, b):
+    return np.stack((a[..., 1] * b[..., 2] - a[..., 2] * b[..., 1],
+                     a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2],
+                     a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]), axis=-1)
+
+def _separated(vertices, axis, eps):
+    """Tests the separating ``axis`` between triangles ``vertices`` (relative to the cell centers) and unit cells."""
+    projections = np.einsum('nkj,nj->nk', vertices, axis)
+    radius = 0.5 * np.abs(axis).sum(axis=1) + eps * np.linalg.norm(axis, axis=1)
+    return (projections.min(axis=1) > radius) | (projections.max(axis=1) < -radius)
+
+def _ragged(counts):
+    """Expands ``counts`` into the owner and the position within its owner of every element."""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    return owner, np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+def _candidates(lower, upper):
+    """Expands the inclusive cell ranges ``lower``..``upper`` of each triangle into ``(triangle, cell)`` pairs."""
+    extent = upper - lower + 1
+    triangle, local = _ragged(extent.prod(axis=1))
+
+    extent = extent[triangle]
+    cells = np.empty((len(local), 3), dtype=np.int64)
+    cells[:, 2] = local % extent[:, 2]
+    local //= extent[:, 2]
+    cells[:, 1] = local % extent[:, 1]
+    cells[:, 0] = local // extent[:, 1]
+    return triangle, cells + lower[triangle]
+
+def _overlapping(vertices, cells, eps):
+    """Separating axis test of triangles ``vertices`` (lattice units) against the unit ``cells``, pair by pair."""
+    relative = vertices - (cells + 0.5)[:, None, :]
+
+    keep = ~np.any((relative.min(axis=1) > 0.5 + eps) | (relative.max(axis=1) < -0.5 - eps), axis=1)
+    edges = np.roll(relative, -1, axis=1) - relative
+    keep &= ~_separated(relative, _cross(edges[:, 0], edges[:, 1]), eps)
+    for k in range(3):
+        for j in range(3):
+            axis = np.zeros((len(relative), 3))
+            axis[:, j] = 1.0
+            keep &= ~_separated(relative, _cross(axis, edges[:, k]), eps)
+    return keep
+
+def _bounds(vertices, res, eps):
+    lower = np.clip(np.floor(vertices.min(axis=1) - eps), 0, res - 1).astype(np.int64)
+    upper = np.clip(np.floor(vertices.max(axis=1) + eps), 0, res - 1).astype(np.int64)
+    inside = np.all(vertices.max(axis=1) + eps >= 0, axis=1) & np.all(vertices.min(axis=1) - eps <= res, axis=1)
+    return lower, upper, inside
+
+def _region_candidates(vertices, res, eps):
+    """Scans the plane of a region of coplanar triangles once: the cells within reach of the plane are
+    enumerated column by column along the dominant axis of the normal and paired with the triangles
+    whose bounding box covers them.
+    """
+    lower, upper, inside = _bounds(vertices, res, eps)
+    normal = np.cross(vertices[:, 1] - vertices[:, 0], vertices[:, 2] - vertices[:, 0]).sum(axis=0)
+    triangles = np.flatnonzero(inside)
+    if len(triangles) == 0 or np.linalg.norm(normal) == 0:
+        triangle, cells = _candidates(lower[triangles], upper[triangles])
+        return triangles[triangle], cells
+
+    normal /= np.linalg.norm(normal)
+    origin = vertices.reshape(-1, 3).mean(axis=0)
+    reach = 0.5 * np.abs(normal).sum() + eps + np.abs((vertices.reshape(-1, 3) - origin) @ normal).max()
+
+    d = int(np.argmax(np.abs(normal)))
+    u, v = [axis for axis in range(3) if axis != d]
+    region_lower, region_upper = lower[inside].min(axis=0), upper[inside].max(axis=0)
+
+    columns = np.stack(np.meshgrid(np.arange(region_lower[u], region_upper[u] + 1),
+                                   np.arange(region_lower[v], region_upper[v] + 1), indexing='ij'), axis=-1).reshape(-1, 2)
+    height = normal @ origin - normal[u] * (columns[:, 0] + 0.5) - normal[v] * (columns[:, 1] + 0.5)
+    ends = np.sort(np.stack(((height - reach) / normal[d], (height + reach) / normal[d]), axis=1), axis=1)
+    first = np.maximum(np.ceil(ends[:, 0] - 0.5), region_lower[d]).astype(np.int64)
+    last = np.minimum(np.floor(ends[:, 1] - 0.5), region_upper[d]).astype(np.int64)
+
+    column_counts = np.maximum(last - first + 1, 0)
+    column_starts = np.cumsum(column_counts) - column_counts
+    column, local = _ragged(column_counts)
+    slab = first[column] + local
+
+    span = region_upper[v] - region_lower[v] + 1
+    flat_lower = np.stack((lower[triangles][:, u] - region_lower[u], lower[triangles][:, v] - region_lower[v], np.zeros(len(triangles), dtype=np.int64)), axis=1)
+    flat_upper = np.stack((upper[triangles][:, u] - region_lower[u], upper[triangles][:, v] - region_lower[v], np.zeros(len(triangles), dtype=np.int64)), axis=1)
+    triangle, covered = _candidates(flat_lower, flat_upper)
+    covered = covered[:, 0] * span + covered[:, 1]
+
+    pair, local = _ragged(column_counts[covered])
+    triangle, covered = triangles[triangle[pair]], covered[pair]
+    cells = np.empty((len(pair), 3), dtype=np.int64)
+    cells[:, u] = columns[covered, 0]
+    cells[:, v] = columns[covered, 1]
+    cells[:, d] = slab[column_starts[covered] + local]
+
+    within = (cells[:, d] >= lower[triangle, d]) & (cells[:, d] <= upper[triangle, d])
+    return triangle[within], cells[within]
+
+def intersected_cells(triangles, res, scale=0.1, epsilon=1e-5, regions=None, chunk_size=1 << 22):
+    """Tags the cells of a ``res`` grid that the triangles pass through, for all triangles at once.
+    Candidate cells are tested with the separating axis test of a triangle against a box (box axes,
+    triangle plane and the nine edge cross products), so no pass over the whole grid is made.
+
+    Without ``regions`` the candidates of a triangle are the cells of its bounding box. With
+    ``regions``, the offsets of runs of coplanar triangles as built by ``core.regions.merge_regions``,
+    each region is scanned once against its plane and only the cells within reach of the plane are
+    tested against the triangles of the region, which tags the same cells.
+
+    :param triangles: Object-space triangles (``N x 3 x 3``)
+    :type triangles: *numpy.array*
+    :param res: Resolution of the grid
+    :type res: ``int``
+    :param scale: Scale the mesh was imported with
+    :type scale: ``float``
+    :param epsilon: Tolerance in normalized grid units, i.e. relative to the domain size
+    :type epsilon: ``float``
+    :param regions: Offsets of the regions of coplanar triangles
+    :type regions: *numpy.array* of ``int``
+    :param chunk_size: Number of triangle-cell pairs tested at a time
+    :type chunk_size: ``int``
+
+    :return: Indices of the triangle (``M``) and of the cell (``M x 3``) of every intersecting pair
+    :rtype: ``tuple`` of *numpy.array*
+
+    \\
+    """
+    vertices = lattice_coordinates(np.asarray(triangles).reshape(-1, 3, 3), res, scale)
+    eps = epsilon * res
+
+    triangle_indices, cell_indices = [np.empty(0, dtype=np.int64)], [np.empty((0, 3), dtype=np.int64)]
+
+    if regions is not None:
+        for start, end in zip(regions[:-1], regions[1:]):
+            triangle, cells = _region_candidates(vertices[start:end], res, eps)
+            keep = _overlapping(vertices[start:end][triangle], cells, eps)
+            triangle_indices.append(triangle[keep] + start)
+            cell_indices.append(cells[keep])
+
+        return np.concatenate(triangle_indices), np.concatenate(cell_indices)
+
+    lower, upper, inside = _bounds(vertices, res, eps)
+    counts = np.where(inside, (upper - lower + 1).prod(axis=1), 0)
+
+    cumulative = np.cumsum(counts)
+    start = 0
+    while start < len(counts):
+        end = max(np.searchsorted(cumulative, cumulative[start] - counts[start] + chunk_size, side='right'), start + 1)
+        chunk = np.arange(start, end)[inside[start:end]]
+        start = end
+        if len(chunk) == 0:
+            continue
+
+        triangle, cells = _candidates(lower[chunk], upper[chunk])
+        keep = _overlapping(vertices[chunk][triangle], cells, eps)
+        triangle_indices.append(chunk[triangle[keep]])
+        cell_indices.append(cells[keep])
+
+    return np.concatenate(triangle_indices), np.concatenate(cell_indices)
+
+def tag_cells(triangles, res, scale=0.1, epsilon=1e-5, regions=None):
+    """Returns the flat indices (``C`` order) of the cells of a ``res`` grid touched by any of ``triangles``."""
+    _, cells = intersected_cells(triangles, res, scale, epsilon, regions)
+    return np.unique(np.ravel_multi_index(cells.T, (res,) * 3))
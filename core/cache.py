@@ -0,0 +1,109 @@
+import json
+import os
+import time
+import numpy as np
+
+class VoxelCache:
+    """Per-run cache of the sparse voxels of each iteration. Coordinates and densities are stored
+    as compact ``.npy`` files that are memory-mapped on access. Entries are keyed by iteration and
+    by the modification time of the file they were converted from, and the least recently used
+    entries are evicted once the cache grows beyond ``budget`` bytes.
+
+    :ivar directory: Cache directory, usually ``<run>/voxels``
+    :vartype directory: ``str``
+    :ivar budget: Size budget in bytes (``1 GiB``)
+    :vartype budget: ``int``
+
+    \\
+    """
+    index_name = 'index.json'
+
+    def __init__(self, directory, budget=1 << 30):
+        self.directory = directory
+        self.budget = budget
+        self.index_path = os.path.join(directory, self.index_name)
+        os.makedirs(directory, exist_ok=True)
+
+        try:
+            with open(self.index_path, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, iteration, source_path):
+        """Returns the cached ``(coords, densities)`` of ``iteration``, or ``None`` if the iteration is
+        not cached or ``source_path`` changed since it was.
+        """
+        key = self.key(iteration)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        if not os.path.isfile(source_path) or os.path.getmtime(source_path) != entry['mtime']:
+            self.evict(key)
+            self.save_index()
+            return None
+
+        try:
+            coords = np.load(self.path(key, 'coords'), mmap_mode='r')
+            densities = np.load(self.path(key, 'densities'), mmap_mode='r')
+        except (OSError, ValueError):
+            self.evict(key)
+            self.save_index()
+            return None
+
+        entry['accessed'] = time.time()
+        self.save_index()
+        return coords, densities
+
+    def put(self, iteration, source_path, coords, densities):
+        """Stores the voxels of ``iteration`` converted from ``source_path`` and evicts least recently
+        used iterations beyond the budget. Coordinates are narrowed to ``int16`` when they fit and
+        densities to ``float32``.
+
+        :return: The stored ``(coords, densities)``, memory-mapped
+        :rtype: ``tuple`` of *numpy.memmap*
+        """
+        key = self.key(iteration)
+        coords = np.asarray(coords)
+        if coords.size == 0 or (coords.min() >= np.iinfo(np.int16).min and coords.max() <= np.iinfo(np.int16).max):
+            coords = coords.astype(np.int16)
+        else:
+            coords = coords.astype(np.int32)
+
+        size = 0
+        for name, array in (('coords', coords), ('densities', np.asarray(densities, dtype=np.float32))):
+            tmp_path = self.path(key, name) + '.tmp.npy'
+            np.save(tmp_path, array)
+            os.replace(tmp_path, self.path(key, name))
+            size += os.path.getsize(self.path(key, name))
+
+        self.entries[key] = {'mtime': os.path.getmtime(source_path), 'size': size, 'accessed': time.time()}
+
+        for _key in sorted(self.entries, key=lambda k: self.entries[k]['accessed']):
+            if sum(entry['size'] for entry in self.entries.values()) <= self.budget:
+                break
+            if _key != key:
+                self.evict(_key)
+
+        self.save_index()
+        return np.load(self.path(key, 'coords'), mmap_mode='r'), np.load(self.path(key, 'densities'), mmap_mode='r')
+
+    def evict(self, key):
+        self.entries.pop(key, None)
+        for name in ('coords', 'densities'):
+            if os.path.isfile(self.path(key, name)):
+                os.remove(self.path(key, name))
+
+    def save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.index_path)
+
+    def path(self, key, name):
+        return os.path.join(self.directory, '{}.{}.npy'.format(key, name))
+
+    @staticmethod
+    def key(iteration):
+        return '{:05d}'.format(iteration)
@@ -0,0 +1,113 @@
+"""Coarse-to-fine continuation: the problem is optimized on a schedule of increasing resolutions, each
+stage starting from the final density of the previous one upsampled onto its grid::
+
+    python -m core.continuation /tmp/ anton 64 128 256
+"""
+import argparse
+import os
+import time
+import numpy as np
+from .mesher import density_grid
+from .problem import PROBLEM_NAME, read_problem, write_problem
+from .scheduler import Scheduler
+
+def _resample_axis(grid, axis, positions):
+    """Linearly interpolates ``grid`` along ``axis`` at the fractional ``positions``, clamping at the ends."""
+    lower = np.clip(np.floor(positions).astype(np.int64), 0, grid.shape[axis] - 1)
+    upper = np.minimum(lower + 1, grid.shape[axis] - 1)
+    weight = np.clip(positions - lower, 0.0, 1.0).astype(grid.dtype)
+
+    shape = [1] * grid.ndim
+    shape[axis] = -1
+    weight = weight.reshape(shape)
+    return np.take(grid, lower, axis=axis) * (1 - weight) + np.take(grid, upper, axis=axis) * weight
+
+def upsample(coords, densities, source_res, target_res):
+    """Trilinearly resamples sparse voxel densities of a ``source_res`` grid onto a ``target_res`` grid.
+    Both grids span the same domain, so the center of fine voxel ``v`` lies at coarse coordinate
+    ``(v + 0.5) * source_res / target_res - 0.5``. Interpolation is done one axis at a time on the
+    bounding box of the coarse voxels, and fine voxels without density are dropped.
+
+    :return: Voxel coordinates (``N x 3``, ``int32``) and densities (``N``, ``float64``) on the fine grid
+    :rtype: ``tuple`` of *numpy.array*
+
+    \\
+    """
+    coords = np.asarray(coords, dtype=np.int64)
+    lower, upper = coords.min(axis=0), coords.max(axis=0) + 1
+    grid = density_grid(coords, np.asarray(densities), lower, upper)
+
+    ratio = target_res / source_res
+    fine_lower = np.floor(lower * ratio).astype(np.int64)
+    fine_upper = np.ceil(upper * ratio).astype(np.int64)
+
+    for axis in range(3):
+        positions = (np.arange(fine_lower[axis], fine_upper[axis]) + 0.5) / ratio - 0.5 - lower[axis]
+        grid = _resample_axis(grid, axis, positions)
+
+    indices = np.argwhere(grid > 0)
+    return (indices + fine_lower).astype(np.int32), np.clip(grid[tuple(indices.T)], 0.0, 1.0).astype(np.float64)
+
+def continuation_directory(workspace_path, filename, continuation_id):
+    return os.path.join(workspace_path, filename, 'continuations', continuation_id)
+
+def submit_continuation(scheduler, filename, schedule, problem_path=None):
+    """Queues one job per resolution of ``schedule`` with ``scheduler``, each depending on the previous one.
+    Every stage saves its final density, and the next stage upsamples it onto its grid before its first
+    iteration. Upsampling needs a native backend: a taichi stage cannot read upsampled densities and
+    fails, which fails the later stages, instead of silently starting from the uniform density.
+
+    :param scheduler: Scheduler of the workspace
+    :type scheduler: *core.scheduler.Scheduler*
+    :param filename: Problem to optimize
+    :type filename: ``str``
+    :param schedule: Increasing resolutions, e.g. ``[64, 128, 256]``
+    :type schedule: ``list`` of ``int``
+
+    :return: Identifier of the continuation and its jobs
+    :rtype: ``tuple``
+
+    \\
+    """
+    workspace_path = scheduler.workspace_path
+    continuation_id = '{}_{}'.format(filename, time.strftime('%Y%m%d-%H%M%S'))
+    directory = continuation_directory(workspace_path, filename, continuation_id)
+    os.makedirs(directory, exist_ok=True)
+
+    if problem_path is None:
+        problem_path = os.path.join(workspace_path, filename, PROBLEM_NAME)
+
+    jobs, previous = [], None
+    for stage, res in enumerate(schedule):
+        problem = read_problem(problem_path, mmap=False)
+        problem.parameters.update(res=res, continuation=continuation_id)
+        path = os.path.join(directory, 'stage_r{:04d}.anton'.format(res))
+        write_problem(path, problem)
+
+        final_density = os.path.join(directory, 'stage_r{:04d}.tcb.zip'.format(res))
+        arguments = ['--final-density', final_density]
+        if previous is not None:
+            arguments += ['--initial-density', previous[1], '--initial-res', str(previous[0])]
+
+        jobs.append(scheduler.submit(filename, path, arguments=arguments, after=[jobs[-1]['id']] if jobs else [],
+                                        continuation=continuation_id, stage=stage))
+        os.remove(path)
+        previous = (res, final_density)
+
+    return continuation_id, jobs
+
+def main():
+    parser = argparse.ArgumentParser(description='Optimizes an anton problem on increasing resolutions.')
+    parser.add_argument('workspace_path', type=str)
+    parser.add_argument('filename', type=str)
+    parser.add_argument('schedule', type=int, nargs='+', help='resolutions, coarsest first')
+    parser.add_argument('--memory', type=int, default=0, help='memory budget in MB, unlimited if 0')
+    args = parser.parse_args()
+
+    scheduler = Scheduler(args.workspace_path, memory_budget=args.memory * 2**20)
+    continuation_id, _ = submit_continuation(scheduler, args.filename, sorted(args.schedule))
+    print(continuation_id)
+    scheduler.run()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import json
+import os
+import time
+from .metrics import peak_rss
+
+MANIFEST_NAME = 'manifest.jsonl'
+
+_cache = {}
+
+class RunManifest:
+    """Append-only index of the optimization runs of a problem, stored as JSON lines next to the run
+    directories (``<workspace>/<filename>/output/manifest.jsonl``). A run writes a ``start`` record
+    when it is created and an ``end`` record when it finishes, so finding a run never has to list or
+    stat the run directories.
+
+    :ivar path: Path to the manifest file
+    :vartype path: ``str``
+
+    \\
+    """
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def of_problem(cls, workspace_path, filename):
+        return cls(os.path.join(workspace_path, filename, 'output', MANIFEST_NAME))
+
+    def append(self, record):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+
+    def start(self, task_id, suffix, directory, parameters):
+        """Records the start of run ``task_id`` whose outputs go to ``directory``."""
+        self.append({'event': 'start',
+                     'task_id': task_id,
+                     'suffix': suffix,
+                     'directory': directory,
+                     'parameters': parameters,
+                     'pid': os.getpid(),
+                     'start_time': time.time()})
+
+    def end(self, task_id, iterations, **kwargs):
+        """Records the end of run ``task_id`` after ``iterations`` iterations, with the peak memory of the
+        process in bytes. Extra keyword arguments are stored with the record.
+        """
+        record = {'event': 'end', 'task_id': task_id, 'iterations': iterations, 'end_time': time.time(), 'peak_memory': peak_rss()}
+        record.update(kwargs)
+        self.append(record)
+
+    def runs(self):
+        """Returns every run, oldest first, as a ``dict`` merging its start and end records. The parsed
+        manifest is kept in memory until the file changes.
+
+        :rtype: ``list`` of ``dict``
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return []
+
+        key = (stat.st_mtime, stat.st_size)
+        if self.path in _cache and _cache[self.path][0] == key:
+            return _cache[self.path][1]
+
+        runs = {}
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                record.pop('event', None)
+                runs.setdefault(record.get('task_id'), {}).update(record)
+
+        runs = sorted((run for run in runs.values() if 'start_time' in run), key=lambda run: run['start_time'])
+        _cache[self.path] = (key, runs)
+        return runs
+
+    def results(self):
+        """Returns the runs that optimize, leaving out the runs that only prepare a domain for a sweep."""
+        return [run for run in self.runs() if run.get('stop_reason') != 'domain']
+
+    def latest(self):
+        """Returns the most recently started run that optimizes, ``None`` if there is none."""
+        runs = self.results()
+        return runs[-1] if runs else None
+
+    def of_job(self, job_id):
+        """Returns the run started by scheduler job ``job_id``, ``None`` if it has not started yet."""
+        for run in reversed(self.runs()):
+            if (run.get('parameters') or {}).get('job') == job_id:
+                return run
+        return None
+
+    def get(self, task_id):
+        """Returns run ``task_id``, ``None`` if it is not in the manifest."""
+        for run in reversed(self.runs()):
+            if run['task_id'] == task_id:
+                return run
+        return None
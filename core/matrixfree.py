@@ -0,0 +1,95 @@
+import numpy as np
+from scipy.sparse.linalg import LinearOperator
+
+BATCH_SIZE = 1 << 15
+
+class ElementOperator(LinearOperator):
+    """Stiffness operator of the free DOFs that is never assembled. On a voxel grid every element matrix
+    is the reference matrix ``KE`` scaled by the element's modulus, so ``K u`` is computed element by
+    element: the ``24`` displacements of a batch of elements are gathered from their ``8`` nodes,
+    multiplied by ``KE`` and the moduli and scattered back. Within a batch no two elements share the
+    node at the same corner, so the scatter is ``8`` plain indexed additions. Apart from the element
+    node map (``elements x 8``) the operator only keeps the moduli, which cuts the memory of the
+    stiffness matrix by more than an order of magnitude.
+
+    Only the design space cells are elements, and elements that ``update`` marks inactive are skipped.
+    DOFs that no active element touches get an identity row, which keeps their displacement at ``0``
+    as long as no force acts on them.
+
+    :ivar nodes: Node indices of the element corners in the order of ``core.simp.CORNERS`` (``elements x 8``)
+    :vartype nodes: *numpy.array* of ``int32``
+
+    \\
+    """
+    def __init__(self, element_nodes, free_dofs, number_of_dofs, KE):
+        index_dtype = np.int32 if number_of_dofs < 2**31 else np.int64
+        self.nodes = np.ascontiguousarray(element_nodes, dtype=index_dtype)
+        self.free_dofs = free_dofs
+        self.number_of_dofs = number_of_dofs
+        self.KE = np.asarray(KE, dtype=np.float64)
+        self.moduli = np.zeros(len(self.nodes))
+        self.active = np.arange(len(self.nodes))
+        self.orphans = np.zeros(len(free_dofs))
+        super().__init__(np.float64, (len(free_dofs), len(free_dofs)))
+
+    @property
+    def nbytes(self):
+        """Memory held by the operator, in bytes."""
+        return self.nodes.nbytes + self.moduli.nbytes + self.active.nbytes + self.orphans.nbytes + self.free_dofs.nbytes
+
+    def _batches(self):
+        for start in range(0, len(self.active), BATCH_SIZE):
+            elements = self.active[start:start + BATCH_SIZE]
+            yield self.nodes[elements], self.moduli[elements]
+
+    def update(self, moduli, active=None):
+        """Sets the element Young's moduli ``moduli``; elements where ``active`` is ``False`` are skipped.
+
+        :return: The operator
+        :rtype: *ElementOperator*
+        """
+        self.moduli = np.asarray(moduli, dtype=np.float64)
+        self.active = np.arange(len(self.nodes)) if active is None else np.flatnonzero(active)
+        touched = np.zeros(self.number_of_dofs // 3, dtype=bool)
+        touched[self.nodes[self.active]] = True
+        self.orphans = (~np.repeat(touched, 3)[self.free_dofs]).astype(np.float64)
+        return self
+
+    def diagonal(self):
+        """Diagonal of the operator, for a Jacobi preconditioner.
+
+        :rtype: *numpy.array*
+        """
+        diagonal = np.zeros((self.number_of_dofs // 3, 3))
+        corner_diagonal = self.KE.diagonal().reshape(8, 3)
+        for nodes, moduli in self._batches():
+            for corner in range(8):
+                diagonal[nodes[:, corner]] += moduli[:, None] * corner_diagonal[corner]
+        return diagonal.reshape(-1)[self.free_dofs] + self.orphans
+
+    def energy(self, displacements):
+        """Products ``u_e^T KE u_e`` of every element for the displacements of all DOFs.
+
+        :rtype: *numpy.array*
+        """
+        displacements = displacements.reshape(-1, 3)
+        energy = np.empty(len(self.nodes))
+        for start in range(0, len(self.nodes), BATCH_SIZE):
+            nodes = self.nodes[start:start + BATCH_SIZE]
+            u = displacements[nodes].reshape(len(nodes), 24)
+            energy[start:start + len(nodes)] = ((u @ self.KE) * u).sum(axis=1)
+        return energy
+
+    def _matvec(self, x):
+        displacements = np.zeros((self.number_of_dofs // 3, 3))
+        displacements.reshape(-1)[self.free_dofs] = x.reshape(-1)
+        result = np.zeros_like(displacements)
+        for nodes, moduli in self._batches():
+            forces = (displacements[nodes].reshape(len(nodes), 24) @ self.KE) * moduli[:, None]
+            forces = forces.reshape(len(nodes), 8, 3)
+            for corner in range(8):
+                result[nodes[:, corner]] += forces[:, corner]
+        return result.reshape(-1)[self.free_dofs] + self.orphans * x.reshape(-1)
+
+    def _rmatvec(self, x):
+        return self._matvec(x)
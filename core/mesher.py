@@ -0,0 +1,326 @@
+import re
+import warnings
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+SECTION_KEY = b'base_coordinates'
+SECTION_OFFSET = 8
+
+_section_pattern = re.compile(rb'base_coordinates: \[([\-\+\d]+), ([\-\+\d]+), ([\-\+\d]+)\]')
+_coord_pattern = re.compile(rb'\[([\-\+\d]+),([\-\+\d]+),([\-\+\d]+)\]:\s([.eE\+\-\d]+)')
+_delimiters = bytes.maketrans(b'[],:', b'    ')
+
+def read_densities(inp_path, chunk_size=1 << 24):
+    """Parses a ``*.densities.txt`` dump written by ``ti run convert_fem_solve``. The file is read
+    in chunks of ``chunk_size`` bytes and every chunk is converted to numbers in one pass, section
+    headers included, instead of matching two regular expressions per line.
+
+    :param inp_path: Path to the density dump
+    :type inp_path: ``str``
+    :param chunk_size: Number of bytes read at once
+    :type chunk_size: ``int``
+
+    :return: Voxel coordinates (``N x 3``, ``int32``) and their densities (``N``, ``float64``)
+    :rtype: ``tuple`` of *numpy.array*
+
+    \\
+    """
+    coords = []
+    densities = []
+    base_coord = np.zeros(3, dtype=np.int64)
+    tail = b''
+
+    with open(inp_path, 'rb') as f:
+        while True:
+            block = f.read(chunk_size)
+            if block:
+                block = tail + block
+                cut = block.rfind(b'\n') + 1
+                block, tail = block[:cut], block[cut:]
+            else:
+                block, tail = tail, b''
+
+            if block:
+                _coords, _densities, base_coord = _parse_chunk(block, base_coord)
+                coords.append(_coords)
+                densities.append(_densities)
+
+            if not tail and not block:
+                break
+
+    if not coords:
+        return np.empty((0, 3), dtype=np.int32), np.empty(0, dtype=np.float64)
+
+    return np.concatenate(coords).astype(np.int32), np.concatenate(densities)
+
+def _parse_chunk(chunk, base_coord):
+    """Converts one newline-terminated chunk of the density dump. Headers are rewritten to
+    ``nan x y z`` and records to ``x y z density`` so that the whole chunk parses as a flat
+    array of quadruples. Chunks that carry anything else fall back to a regular expression scan.
+    """
+    number_of_sections = chunk.count(SECTION_KEY)
+    number_of_records = chunk.count(b']:')
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            values = np.fromstring(chunk.replace(SECTION_KEY, b'nan').translate(_delimiters), dtype=np.float64, sep=' ')
+    except ValueError:
+        values = np.empty(0)
+
+    if values.size == 4 * (number_of_sections + number_of_records):
+        values = values.reshape(-1, 4)
+        is_section = np.isnan(values[:, 0])
+        sections = values[is_section, 1:].astype(np.int64) - SECTION_OFFSET
+        records = values[~is_section]
+    else:
+        sections, records, is_section = _scan_chunk(chunk)
+
+    # Index of the section every row belongs to, 0 being the section carried over from the previous chunk
+    bases = np.vstack([base_coord[None, :], sections])
+    owner = np.cumsum(is_section)[~is_section]
+
+    coords = records[:, :3].astype(np.int64) + bases[owner]
+    return coords, records[:, 3].copy(), bases[-1]
+
+def _scan_chunk(chunk):
+    matches = sorted([(m.start(), True, m.groups()) for m in _section_pattern.finditer(chunk)] +
+                     [(m.start(), False, m.groups()) for m in _coord_pattern.finditer(chunk)], key=lambda m: m[0])
+
+    is_section = np.array([m[1] for m in matches], dtype=bool)
+    sections = np.array([m[2] for m in matches if m[1]], dtype=bytes).astype(np.int64).reshape(-1, 3) - SECTION_OFFSET
+    records = np.array([m[2] for m in matches if not m[1]], dtype=bytes).astype(np.float64).reshape(-1, 4)
+    return sections, records, is_section
+
+def density_grid(coords, values, lower_bound, upper_bound):
+    """Scatters sparse voxel values into a dense grid spanning ``[lower_bound, upper_bound)`` in one
+    fancy-indexing operation. Voxels outside the box are dropped.
+
+    :return: Dense grid (``float32``)
+    :rtype: *numpy.array*
+
+    \\
+    """
+    grid = np.zeros(np.asarray(upper_bound - lower_bound, dtype=int), dtype=np.float32)
+    indices = coords - lower_bound
+    inside = np.all((indices >= 0) & (indices < grid.shape), axis=1)
+    grid[tuple(indices[inside].T)] = values[inside]
+    return grid
+
+def march(coords, densities, density_thresh=0.1, scalar_field=False, brick_size=0, workers=None):
+    """Extracts the surface of the voxels whose density reaches ``density_thresh``. By default the
+    voxels are reduced to a 0/1 occupancy grid; with ``scalar_field`` the densities themselves are
+    surfaced at ``level=density_thresh``, which gives a smooth surface.
+
+    With a non-zero ``brick_size`` the padded bounding box is split into bricks of
+    ``brick_size^3`` cells that share one layer of voxels with their neighbours. The bricks are
+    surfaced in a pool of ``workers`` processes and the seam vertices are welded, so peak memory
+    is bounded by the brick size instead of the bounding box.
+
+    :param coords: Voxel coordinates (``N x 3``)
+    :type coords: *numpy.array* of ``int``
+    :param densities: Voxel densities (``N``)
+    :type densities: *numpy.array* of ``float``
+    :param density_thresh: Density threshold (``0.1``)
+    :type density_thresh: ``float``
+    :param scalar_field: Surface the densities instead of the occupancy? (``False``)
+    :type scalar_field: ``bool``
+    :param brick_size: Edge length of a brick in cells, ``0`` surfaces one dense grid (``0``)
+    :type brick_size: ``int``
+    :param workers: Number of worker processes, all cores if ``None``
+    :type workers: ``int``
+
+    :return: Vertices in voxel coordinates, faces and vertex normals
+    :rtype: ``tuple`` of *numpy.array*
+
+    \\
+    """
+    coords = np.asarray(coords, dtype=np.int32)
+    densities = np.asarray(densities)
+    solid = densities >= density_thresh
+    pts = coords[solid]
+    lower_bound = np.min(pts, axis=0) - 2
+    upper_bound = np.max(pts, axis=0) + 2
+
+    if scalar_field:
+        inside = np.all((coords >= lower_bound) & (coords < upper_bound), axis=1)
+        samples, values, level = coords[inside], densities[inside], density_thresh
+    else:
+        samples, values, level = pts, np.ones(len(pts), dtype=np.float32), 0.5
+
+    if brick_size > 0 and np.any(upper_bound - lower_bound > brick_size + 1):
+        vertices, faces, normals = _march_bricks(samples - lower_bound, values, level, upper_bound - lower_bound, brick_size, workers)
+    else:
+        vertices, faces, normals = _march_brick(np.zeros(3, dtype=int), upper_bound - lower_bound,
+                                                samples - lower_bound, values, level)[:3]
+
+    return vertices + lower_bound + 0.5, faces, normals
+
+def object_space(vertices, resolution):
+    """Maps vertices from voxel coordinates back to object space, undoing the ``scale=0.1`` and
+    ``translate=0.5`` the optimizer applies when it voxelizes the design space.
+    """
+    return 10 * vertices / resolution - 5
+
+def _march_brick(origin, shape, indices, values, level, grid_shape=None, brick_size=0):
+    """Surfaces one brick. Returns vertices, faces and normals in the coordinates of the enclosing
+    grid and, if ``grid_shape`` is given, a key identifying the sample or, on a seam plane between
+    bricks, the grid edge every vertex lies on. The other vertices get the key ``-1``.
+    """
+    from skimage import measure
+
+    empty = np.empty((0, 3)), np.empty((0, 3), dtype=int), np.empty((0, 3)), np.empty(0, dtype=np.int64)
+    data = density_grid(indices, values, origin, origin + shape)
+    if not data.min() <= level <= data.max():
+        return empty
+
+    try:
+        vertices, faces, normals, _ = measure.marching_cubes(data, level=level, allow_degenerate=False)
+    except RuntimeError:
+        # Samples that touch the level without crossing it only give degenerate triangles
+        return empty
+    vertices = vertices.astype(np.float64) + origin
+
+    if grid_shape is None:
+        return vertices, faces, normals, None
+
+    # A vertex on a grid edge has two integral coordinates and the third one between the samples of the
+    # edge, or three integral ones on a sample, which every cube around the sample may emit. Lewiner's
+    # method also places vertices inside cubes, which have no counterpart in the neighbouring brick.
+    # skimage interpolates in float32, so a vertex on a sample may sit a rounding error off it
+    integral = np.abs(vertices - np.rint(vertices)) < 1e-5
+    axis = np.where(integral.all(axis=1), 3, np.argmin(integral, axis=1))
+    on_grid = integral.sum(axis=1) >= 2
+    on_seam = np.zeros(len(vertices), dtype=bool)
+    for seam_axis in range(3):
+        position = np.rint(vertices[:, seam_axis])
+        on_seam |= integral[:, seam_axis] & (position % brick_size == 0) & (position > 0) & (position < grid_shape[seam_axis] - 1)
+    welded = (on_grid & on_seam) | (axis == 3)
+
+    edge = np.where(integral, np.rint(vertices), np.floor(vertices))[welded].astype(np.int64)
+    keys = np.full(len(vertices), -1, dtype=np.int64)
+    keys[welded] = np.ravel_multi_index((edge[:, 0], edge[:, 1], edge[:, 2], axis[welded]), tuple(grid_shape) + (4,))
+
+    return vertices, faces, normals, keys
+
+def _march_bricks(indices, values, level, grid_shape, brick_size, workers):
+    grid_shape = np.asarray(grid_shape, dtype=int)
+    number_of_bricks = np.maximum((grid_shape - 2) // brick_size + 1, 1)
+
+    # Samples on a brick boundary belong to the bricks on both sides of it
+    owners = np.minimum(indices // brick_size, number_of_bricks - 1)
+    for axis in range(3):
+        shared = (indices[:, axis] % brick_size == 0) & (indices[:, axis] > 0) & \
+                    (indices[:, axis] // brick_size == owners[:, axis])
+        neighbours = owners[shared].copy()
+        neighbours[:, axis] -= 1
+        indices = np.vstack([indices, indices[shared]])
+        values = np.concatenate([values, values[shared]])
+        owners = np.vstack([owners, neighbours])
+
+    brick_ids = np.ravel_multi_index(tuple(owners.T), tuple(number_of_bricks))
+    order = np.argsort(brick_ids, kind='stable')
+    brick_ids, indices, values = brick_ids[order], indices[order], values[order]
+    splits = np.flatnonzero(np.diff(brick_ids)) + 1
+
+    tasks = []
+    for _ids, _indices, _values in zip(np.split(brick_ids, splits), np.split(indices, splits), np.split(values, splits)):
+        origin = np.array(np.unravel_index(_ids[0], tuple(number_of_bricks))) * brick_size
+        shape = np.minimum(origin + brick_size + 1, grid_shape) - origin
+        tasks.append((origin, shape, _indices, _values, level, grid_shape, brick_size))
+
+    if workers == 1 or len(tasks) == 1:
+        results = [_march_brick(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_march_brick, *zip(*tasks)))
+
+    offsets = np.cumsum([0] + [len(result[0]) for result in results])
+    vertices = np.vstack([result[0] for result in results])
+    normals = np.vstack([result[2] for result in results])
+    faces = np.vstack([result[1] + offset for result, offset in zip(results, offsets)])
+    keys = np.concatenate([result[3] for result in results])
+    unwelded = keys < 0
+    keys[unwelded] = 4 * np.prod(grid_shape) + np.arange(unwelded.sum())
+
+    # Weld the seam vertices that neighbouring bricks both produced
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    faces = inverse.reshape(-1)[faces]
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])]
+
+    return vertices[first], faces, normals[first]
+
+STL_HEADER = b'GENERATED BY ANTON'
+STL_ASCII_CHUNK = 65536
+_stl_vertex_pattern = re.compile(rb'vertex\s+(\S+)\s+(\S+)\s+(\S+)')
+STL_FACET = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+def stl_facets(vertices, faces, normals):
+    """Packs a triangle mesh into the record layout of a binary STL file. The facet normal is the sum
+    of the normals of its three vertices.
+
+    :param vertices: Vertex positions (``V x 3``)
+    :type vertices: *numpy.array* of ``float``
+    :param faces: Vertex indices of each triangle (``F x 3``)
+    :type faces: *numpy.array* of ``int``
+    :param normals: Vertex normals (``V x 3``)
+    :type normals: *numpy.array* of ``float``
+
+    :return: One ``STL_FACET`` record per triangle
+    :rtype: *numpy.array*
+
+    \\
+    """
+    facets = np.zeros(len(faces), dtype=STL_FACET)
+    facets['normal'] = normals[faces].sum(axis=1)
+    facets['vertices'] = vertices[faces]
+    return facets
+
+def write_stl(output_path, vertices, faces, normals, binary=True):
+    """Writes a triangle mesh as an STL file. Binary files are written from one structured array
+    with a single buffer write; ASCII files are formatted ``STL_ASCII_CHUNK`` facets at a time.
+
+    :param output_path: Path to the STL file
+    :type output_path: ``str``
+    :param binary: Write binary STL? (``True``)
+    :type binary: ``bool``
+
+    \\
+    """
+    facets = stl_facets(vertices, faces, normals)
+
+    if binary:
+        with open(output_path, 'wb') as f:
+            f.write(STL_HEADER.ljust(80, b'\0'))
+            f.write(np.uint32(len(facets)).tobytes())
+            f.write(facets.tobytes())
+    else:
+        values = np.hstack([facets['normal'], facets['vertices'].reshape(-1, 9)]).astype(np.float64)
+        facet = 'facet normal %.9g %.9g %.9g\nouter loop\n' + 'vertex %.9g %.9g %.9g\n' * 3 + 'endloop\nendfacet\n'
+        with open(output_path, 'w') as f:
+            f.write('solid {}\n'.format(STL_HEADER.decode()))
+            for start in range(0, len(values), STL_ASCII_CHUNK):
+                chunk = values[start:start + STL_ASCII_CHUNK]
+                f.write((facet * len(chunk)) % tuple(chunk.ravel()))
+            f.write('endsolid {}\n'.format(STL_HEADER.decode()))
+
+def read_stl(inp_path):
+    """Reads a binary or ASCII STL file and welds coincident vertices. A file is binary if its size
+    matches the facet count in its header, since binary headers may start with ``solid`` as well.
+
+    :return: Vertices (``V x 3``, ``float32``) and faces (``F x 3``)
+    :rtype: ``tuple`` of *numpy.array*
+
+    \\
+    """
+    with open(inp_path, 'rb') as f:
+        data = f.read()
+
+    number_of_facets = int(np.frombuffer(data[80:84], dtype='<u4')[0]) if len(data) >= 84 else -1
+    if len(data) == 84 + number_of_facets * STL_FACET.itemsize:
+        corners = np.frombuffer(data, dtype=STL_FACET, count=number_of_facets, offset=84)['vertices'].reshape(-1, 3)
+    else:
+        corners = np.array(_stl_vertex_pattern.findall(data), dtype=np.float64).astype(np.float32).reshape(-1, 3)
+
+    vertices, inverse = np.unique(corners, axis=0, return_inverse=True)
+    return vertices, inverse.reshape(-1, 3)
@@ -0,0 +1,119 @@
+"""Per-iteration metrics of an optimization, one JSON record per line in ``<run directory>/metrics.jsonl``,
+and a reader that loads them into numpy arrays for plots and regression checks::
+
+    python -m core.metrics /tmp/anton/output/<task_id>_<suffix>
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+METRICS_NAME = 'metrics.jsonl'
+PHASE_PREFIX = 'phase_'
+
+_integer_pattern = re.compile(r'\d+')
+
+def peak_rss():
+    """Returns the peak resident set size of this process in bytes, ``None`` where ``resource`` is unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def block_count(blocks):
+    """Returns the number of active blocks in the text returned by ``get_block_counts``, its first integer."""
+    match = _integer_pattern.search(blocks or '')
+    return int(match.group()) if match else None
+
+class MetricsLog:
+    """Writer of the metrics of one run. Every record is flushed as it is written, so a running
+    optimization can be followed, and a run cut short keeps the records of its finished iterations.
+
+    :ivar path: Path to the metrics file
+    :vartype path: ``str``
+
+    \\
+    """
+    def __init__(self, path):
+        self.path = path
+        self.start_time = time.time()
+        self.previous = None
+        self.file = open(path, 'a')
+
+    def write(self, iteration, objective, blocks=None, phases=None):
+        """Appends the record of ``iteration``: objective, its change relative to the previous iteration,
+        active blocks, peak memory, the seconds spent in each of ``phases`` and the wall time since the
+        log was opened.
+        """
+        relative_change = None
+        if self.previous is not None and self.previous != 0:
+            relative_change = abs(objective - self.previous) / abs(self.previous)
+        self.previous = objective
+
+        record = {'iteration': iteration,
+                  'objective': objective,
+                  'relative_change': relative_change,
+                  'active_blocks': block_count(blocks),
+                  'peak_rss': peak_rss(),
+                  'phases': dict(phases or {}),
+                  'wall_time': time.time() - self.start_time}
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def read_metrics(path):
+    """Loads the metrics of a run into one array per field, ``nan`` where a record has no value.
+    The time of each phase is in the array ``phase_<name>``.
+
+    :param path: Run directory or metrics file
+    :type path: ``str``
+
+    :return: Arrays of ``iteration``, ``objective``, ``relative_change``, ``active_blocks``, ``peak_rss``,
+        ``wall_time`` and the phases, one entry per iteration in order
+    :rtype: ``dict`` of *numpy.array*
+
+    \\
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, METRICS_NAME)
+
+    records = []
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+
+    phases = sorted(set(phase for record in records for phase in record.get('phases', {})))
+    for record in records:
+        record.update((PHASE_PREFIX + phase, value) for phase, value in record.pop('phases', {}).items())
+
+    metrics = {'iteration': np.array([record['iteration'] for record in records], dtype=np.int64)}
+    for key in ['objective', 'relative_change', 'active_blocks', 'peak_rss', 'wall_time'] + [PHASE_PREFIX + phase for phase in phases]:
+        metrics[key] = np.array([np.nan if record.get(key) is None else record[key] for record in records], dtype=np.float64)
+    return metrics
+
+def main():
+    parser = argparse.ArgumentParser(description='Prints the per-iteration metrics of an anton run.')
+    parser.add_argument('path', type=str, help='run directory or metrics file')
+    args = parser.parse_args()
+
+    metrics = read_metrics(args.path)
+    keys = [key for key in metrics if key != 'iteration']
+    print(' '.join('{:>16}'.format(key) for key in ['iteration'] + keys))
+    for i, iteration in enumerate(metrics['iteration']):
+        print(' '.join(['{:16d}'.format(iteration)] + ['{:16.6g}'.format(metrics[key][i]) for key in keys]))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import LinearOperator, splu
+from .assembly import StiffnessAssembly, grid_nodes
+
+COARSEST_DOFS = 4000
+POWER_ITERATIONS = 10
+
+def jacobi_weights(A, iterations=POWER_ITERATIONS):
+    """Damped Jacobi weights ``1 / (lambda d)`` of the diagonal ``d`` of ``A``, ``lambda`` being the
+    largest eigenvalue of ``D^-1 A`` estimated with ``iterations`` power iterations. The weight depends on
+    the element and the densities, between ``4`` and ``5`` for voxel elasticity, and keeps the smoother from amplifying
+    the error as a fixed weight above ``2 / lambda`` would, which would make the V-cycle indefinite.
+
+    :rtype: *numpy.array*
+    """
+    diagonal = A.diagonal()
+    inverse_diagonal = 1.0 / np.where(diagonal > 0, diagonal, 1.0)
+    x = np.random.default_rng(0).random(A.shape[0])
+    eigenvalue = 1.0
+    for _ in range(iterations):
+        y = inverse_diagonal * (A @ x)
+        eigenvalue = np.linalg.norm(y) / np.linalg.norm(x)
+        x = y
+    return inverse_diagonal / eigenvalue
+
+def prolongation(fine_nodes, coarse_nodes, res):
+    """Trilinear interpolation from the nodes of the grid of ``ceil(res / 2)^3`` cells to the nodes of
+    the ``res^3`` grid. A fine node at an even position coincides with a coarse node, one at an odd
+    position takes half of each coarse neighbour along that axis.
+
+    :param fine_nodes: Flat indices of the used nodes in the ``(res + 1)^3`` node grid
+    :type fine_nodes: *numpy.array*
+    :param coarse_nodes: Flat indices of the used nodes in the coarse node grid, sorted
+    :type coarse_nodes: *numpy.array*
+    :rtype: *scipy.sparse.csr_matrix* (``fine nodes x coarse nodes``)
+    """
+    coarse_grid = ((res + 1) // 2 + 1,) * 3
+    positions = np.array(np.unravel_index(fine_nodes, (res + 1,) * 3)).T
+    rows, cols = [], []
+    for choice in np.indices((2, 2, 2)).reshape(3, -1).T:
+        # Taking (p + choice) // 2 on every axis visits both neighbours of an odd position and the coinciding node twice
+        rows.append(np.arange(len(fine_nodes)))
+        cols.append(np.searchsorted(coarse_nodes, np.ravel_multi_index(((positions + choice) // 2).T, coarse_grid)))
+    return sparse.csr_matrix((np.full(8 * len(fine_nodes), 0.125), (np.concatenate(rows), np.concatenate(cols))),
+                             shape=(len(fine_nodes), len(coarse_nodes)))
+
+class Level:
+    """Coarse level of the hierarchy: the grid of ``res^3`` cells whose elements are the parents of the
+    elements of the next finer level.
+
+    :ivar parents: Element of this level each finer element belongs to
+    :vartype parents: *numpy.array*
+    :ivar transfer: Prolongation from the free DOFs of this level to the free DOFs of the finer level
+    :vartype transfer: *scipy.sparse.csr_matrix*
+    :ivar assembly: Stiffness assembly of the free DOFs of this level
+    :vartype assembly: *core.assembly.StiffnessAssembly*
+
+    \\
+    """
+    def __init__(self, elements, nodes, fixed, res, KE):
+        self.res = (res + 1) // 2
+        self.elements, self.parents = np.unique(elements // 2, axis=0, return_inverse=True)
+        self.parents = self.parents.reshape(-1)
+        self.nodes, element_nodes = grid_nodes(self.elements, self.res)
+
+        interpolation = prolongation(nodes, self.nodes, res)
+        # A coarse DOF is fixed if it interpolates to a fixed fine DOF, which keeps every level as constrained as the finest
+        self.fixed = (interpolation.T @ fixed.reshape(-1, 3).astype(np.float64) > 0).reshape(-1)
+        free_dofs = np.flatnonzero(~self.fixed)
+        transfer = sparse.kron(interpolation, sparse.identity(3), format='csr')
+        self.transfer = transfer[np.flatnonzero(~fixed)][:, free_dofs]
+
+        # The stiffness of a trilinear element grows linearly with its size
+        self.KE = 2 * KE
+        edofmat = (3 * element_nodes[:, :, None] + np.arange(3)).reshape(-1, 24)
+        self.assembly = StiffnessAssembly(edofmat, free_dofs, 3 * len(self.nodes), self.KE)
+
+class MultigridPreconditioner(LinearOperator):
+    """Geometric multigrid V-cycle on the voxel hierarchy, as the preconditioner of the CG
+    displacement solve. Every level halves the resolution: its elements are the parents of the
+    ``2^3`` blocks of finer elements and their modulus is the mean of the children's moduli, cells
+    outside the design space counting as void, so that the coarse stiffness follows the densities
+    instead of smearing the solid members into the void. The levels are connected by trilinear
+    prolongation and its transpose as restriction, each level is smoothed with damped Jacobi before
+    and after the coarse correction, weighted by ``jacobi_weights``, and the coarsest level, the first
+    below ``4000`` DOFs, is factorized.
+    The same number of pre- and post-smoothing steps keeps the cycle symmetric as CG requires.
+
+    :ivar levels: Coarse levels, finest first
+    :vartype levels: ``list`` of *Level*
+    :ivar smoothing_steps: Jacobi steps before and after each coarse correction (``2``)
+    :vartype smoothing_steps: ``int``
+
+    \\
+    """
+    def __init__(self, elements, nodes, free_dofs, res, KE, smoothing_steps=2, coarsest_dofs=COARSEST_DOFS):
+        self.smoothing_steps = smoothing_steps
+        self.levels = []
+        fixed = np.ones(3 * len(nodes), dtype=bool)
+        fixed[free_dofs] = False
+        # At least one coarse level, as the finest operator may not be assembled
+        while res > 2 and (not self.levels or (~fixed).sum() > coarsest_dofs):
+            level = Level(elements, nodes, fixed, res, KE)
+            self.levels.append(level)
+            elements, nodes, fixed, res, KE = level.elements, level.nodes, level.fixed, level.res, level.KE
+        super().__init__(np.float64, (len(free_dofs), len(free_dofs)))
+
+    def update(self, A, moduli):
+        """Coarsens the element moduli ``moduli`` of the finest level, reassembles the coarse levels and
+        refactorizes the coarsest one for the operator ``A`` of the finest level.
+
+        :return: The preconditioner
+        :rtype: *MultigridPreconditioner*
+        """
+        self.operators = [A]
+        self.inverse_diagonals = [jacobi_weights(A)]
+        for level in self.levels:
+            moduli = np.bincount(level.parents, weights=moduli, minlength=len(level.elements)) / 8
+            K = level.assembly.assemble(moduli)
+            self.operators.append(K)
+            self.inverse_diagonals.append(jacobi_weights(K))
+        self.coarsest = splu(self.operators[-1].tocsc())
+        return self
+
+    def cycle(self, b, depth=0):
+        """Approximately solves ``A x = b`` on level ``depth`` with one V-cycle started from zero."""
+        if depth == len(self.levels):
+            return self.coarsest.solve(b)
+        A, inverse_diagonal = self.operators[depth], self.inverse_diagonals[depth]
+        x = inverse_diagonal * b
+        for _ in range(self.smoothing_steps - 1):
+            x += inverse_diagonal * (b - A @ x)
+        transfer = self.levels[depth].transfer
+        x += transfer @ self.cycle(transfer.T @ (b - A @ x), depth + 1)
+        for _ in range(self.smoothing_steps):
+            x += inverse_diagonal * (b - A @ x)
+        return x
+
+    def _matvec(self, b):
+        return self.cycle(b.reshape(-1))
+
+    def _rmatvec(self, b):
+        return self._matvec(b)
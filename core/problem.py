@@ -0,0 +1,242 @@
+import json
+import os
+import struct
+import numpy as np
+from .regions import merge_regions
+
+PROBLEM_NAME = 'problem.anton'
+MAGIC = b'ANTONPRB'
+VERSION = 2
+ALIGNMENT = 64
+
+# Solver parameters of a problem defined with the panel's default settings
+DEFAULT_PARAMETERS = {'max_iterations': 30,
+                      'stop_tolerance': 0.0,
+                      'stop_patience': 1,
+                      'min_iterations': 10,
+                      'time_budget': 0.0,
+                      'res': 100,
+                      'volume_fraction': 0.4,
+                      'penalty': 3.0,
+                      'fix_cells_near_force': False,
+                      'fix_cells_at_dirichlet': False,
+                      'fixed_cell_density': 0.1,
+                      'wireframe': False,
+                      'wireframe_grid_size': 32,
+                      'wireframe_thickness': 4,
+                      'minimum_density': 0.0,
+                      'minimum_stiffness': 1e-9,
+                      'fraction_to_keep': 1.0,
+                      'cg_tolerance': 1e-4,
+                      'active_threshold': 1e-6,
+                      'cg_max_iterations': 50,
+                      'boundary_smoothing_iters': 3,
+                      'smoothing_iters': 1,
+                      'objective_threshold': 0.5,
+                      'step_limit': 0.2,
+                      'matrix_free': False,
+                      'preconditioner': 'jacobi',
+                      'exclude_fixed_cells': True,
+                      'fixed_epsilon': 0.00001,
+                      'forced_epsilon': 0.00001,
+                      'advanced': False}
+
+_preamble = struct.Struct('<8sIQ')
+
+class ProblemFormatError(ValueError):
+    """Raised when a problem file is not a problem container ``read_problem`` understands."""
+
+class Problem:
+    """Boundary conditions, material and solver parameters of an optimization problem. Triangles are
+    stored flat: ``fixed`` holds the fixed triangles and ``force_triangles`` the triangles of every
+    force one after the other, force ``i`` owning ``force_triangles[force_offsets[i]:force_offsets[i + 1]]``.
+    Within each set, connected coplanar triangles are stored next to each other and ``fixed_regions``
+    and ``force_regions`` hold the offsets of these regions, so that boundary conditions can be
+    applied one region at a time.
+
+    :ivar fixed: Fixed triangles (``N x 3 x 3``, ``float32``)
+    :vartype fixed: *numpy.array*
+    :ivar force_triangles: Triangles of all forces (``M x 3 x 3``, ``float32``)
+    :vartype force_triangles: *numpy.array*
+    :ivar force_offsets: Start of each force in ``force_triangles`` and the total count (``int64``)
+    :vartype force_offsets: *numpy.array*
+    :ivar force_vectors: Force vector of each force (``float64``)
+    :vartype force_vectors: *numpy.array*
+    :ivar fixed_regions: Offsets of the regions of coplanar triangles in ``fixed`` (``int64``)
+    :vartype fixed_regions: *numpy.array*
+    :ivar force_regions: Offsets of the regions of coplanar triangles in ``force_triangles``, a region never
+        spanning two forces (``int64``)
+    :vartype force_regions: *numpy.array*
+    :ivar material: Material name and properties
+    :vartype material: ``dict``
+    :ivar parameters: Solver parameters
+    :vartype parameters: ``dict``
+
+    \\
+    """
+    def __init__(self, fixed, force_triangles, force_offsets, force_vectors, material=None, parameters=None,
+                    fixed_regions=None, force_regions=None):
+        self.fixed = fixed
+        self.force_triangles = force_triangles
+        self.force_offsets = force_offsets
+        self.force_vectors = force_vectors
+        self.material = material or {}
+        self.parameters = parameters or {}
+        self.fixed_regions = np.arange(len(fixed) + 1, dtype=np.int64) if fixed_regions is None else fixed_regions
+        self.force_regions = np.arange(len(force_triangles) + 1, dtype=np.int64) if force_regions is None else force_regions
+
+    @classmethod
+    def from_faces(cls, fixed, forces, force_vectors, material=None, parameters=None, merge=True):
+        """Builds a problem from the fixed triangles and a list with the triangles of each force. With
+        ``merge`` the triangles of each set are grouped into regions with ``core.regions.merge_regions``.
+        """
+        fixed = np.asarray(fixed, dtype=np.float32).reshape(-1, 3, 3)
+        forces = [np.asarray(_force, dtype=np.float32).reshape(-1, 3, 3) for _force in forces]
+        force_offsets = np.zeros(len(forces) + 1, dtype=np.int64)
+        force_offsets[1:] = np.cumsum([len(_force) for _force in forces])
+
+        fixed_regions = force_regions = None
+        if merge:
+            (fixed,), fixed_regions = merge_regions([fixed])
+            forces, force_regions = merge_regions(forces)
+
+        return cls(fixed,
+                    np.concatenate(forces) if forces else np.empty((0, 3, 3), dtype=np.float32),
+                    force_offsets,
+                    np.asarray(force_vectors, dtype=np.float64).reshape(-1, 3),
+                    material, parameters, fixed_regions, force_regions)
+
+    @property
+    def number_of_forces(self):
+        return len(self.force_offsets) - 1
+
+    def force(self, i):
+        """Returns the triangles of force ``i`` as a view into ``force_triangles``."""
+        return self.force_triangles[self.force_offsets[i]:self.force_offsets[i + 1]]
+
+    def force_region_offsets(self, i):
+        """Returns the offsets of the regions of force ``i`` relative to ``force(i)``."""
+        start, end = np.searchsorted(self.force_regions, self.force_offsets[i:i + 2])
+        return self.force_regions[start:end + 1] - self.force_offsets[i]
+
+    def arrays(self):
+        return (('fixed', np.ascontiguousarray(self.fixed, dtype=np.float32)),
+                ('force_triangles', np.ascontiguousarray(self.force_triangles, dtype=np.float32)),
+                ('force_offsets', np.ascontiguousarray(self.force_offsets, dtype=np.int64)),
+                ('force_vectors', np.ascontiguousarray(self.force_vectors, dtype=np.float64)),
+                ('fixed_regions', np.ascontiguousarray(self.fixed_regions, dtype=np.int64)),
+                ('force_regions', np.ascontiguousarray(self.force_regions, dtype=np.int64)))
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def write_problem(path, problem):
+    """Writes ``problem`` as a single versioned container: a preamble (magic, version, header size), a
+    JSON header describing each array and holding the material and parameters, and the raw
+    little-endian arrays, each aligned to ``64`` bytes so that they can be memory-mapped. The file is
+    written next to ``path`` and moved in place once complete.
+
+    :param path: Path to the problem file, usually ``<workspace>/<filename>/problem.anton``
+    :type path: ``str``
+    :param problem: Problem to write
+    :type problem: *Problem*
+
+    \\
+    """
+    arrays = problem.arrays()
+
+    header = {'version': VERSION, 'material': problem.material, 'parameters': problem.parameters, 'arrays': {}}
+    # Offsets depend on the header size, so they are laid out against a header padded to the next
+    # alignment boundary and recomputed until the header fits.
+    header_size = ALIGNMENT
+    while True:
+        offset = _aligned(_preamble.size + header_size)
+        for name, array in arrays:
+            header['arrays'][name] = {'dtype': array.dtype.newbyteorder('<').str, 'shape': array.shape, 'offset': offset}
+            offset = _aligned(offset + array.nbytes)
+
+        encoded = json.dumps(header, sort_keys=True).encode('utf-8')
+        if len(encoded) <= header_size:
+            break
+        header_size = _aligned(len(encoded))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_preamble.pack(MAGIC, VERSION, header_size))
+        f.write(encoded.ljust(header_size, b' '))
+        for name, array in arrays:
+            f.seek(header['arrays'][name]['offset'])
+            f.write(array.astype(array.dtype.newbyteorder('<'), copy=False).tobytes())
+        f.truncate(offset)
+    os.replace(tmp_path, path)
+
+def read_problem(path, mmap=True):
+    """Reads a problem written by ``write_problem``. The arrays are memory-mapped read-only unless
+    ``mmap`` is ``False``, so opening a problem does not read its triangles.
+
+    :raises ProblemFormatError: The file is not a problem container or was written by a newer version
+
+    :rtype: *Problem*
+    """
+    with open(path, 'rb') as f:
+        preamble = f.read(_preamble.size)
+        if len(preamble) != _preamble.size:
+            raise ProblemFormatError('{}: truncated preamble'.format(path))
+
+        magic, version, header_size = _preamble.unpack(preamble)
+        if magic != MAGIC:
+            raise ProblemFormatError('{}: not a problem file'.format(path))
+        if version > VERSION:
+            raise ProblemFormatError('{}: version {} is newer than {}'.format(path, version, VERSION))
+
+        try:
+            header = json.loads(f.read(header_size).decode('utf-8'))
+        except ValueError as error:
+            raise ProblemFormatError('{}: {}'.format(path, error))
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        shape = tuple(spec['shape'])
+        if mmap and int(np.prod(shape)) > 0:
+            arrays[name] = np.memmap(path, dtype=np.dtype(spec['dtype']), mode='r', offset=spec['offset'], shape=shape)
+        else:
+            arrays[name] = np.fromfile(path, dtype=np.dtype(spec['dtype']), count=int(np.prod(shape)), offset=spec['offset']).reshape(shape)
+
+    return Problem(arrays['fixed'], arrays['force_triangles'], arrays['force_offsets'], arrays['force_vectors'],
+                    header.get('material'), header.get('parameters'), arrays.get('fixed_regions'), arrays.get('force_regions'))
+
+def update_parameters(directory, material=None, parameters=None):
+    """Replaces the material and merges ``parameters`` into the solver parameters of the problem defined
+    in ``directory``, keeping its arrays. A problem still stored in the legacy ``.npy`` files is written
+    to ``problem.anton``.
+    """
+    problem = load_problem(directory, mmap=False)
+    if material is not None:
+        problem.material = material
+    if parameters is not None:
+        problem.parameters.update(parameters)
+    write_problem(os.path.join(directory, PROBLEM_NAME), problem)
+
+def read_legacy_problem(directory):
+    """Reads the pickled ``fixed.npy``, ``forces.npy`` and ``force_vectors.npy`` written by earlier versions
+    of the definer.
+
+    :rtype: *Problem*
+    """
+    fixed = np.load(os.path.join(directory, 'fixed.npy'), allow_pickle=True)
+    forces = np.load(os.path.join(directory, 'forces.npy'), allow_pickle=True)
+    force_vectors = np.load(os.path.join(directory, 'force_vectors.npy'), allow_pickle=True)
+
+    return Problem.from_faces(np.array(list(fixed), dtype=np.float32), list(forces), np.array(list(force_vectors), dtype=np.float64))
+
+def load_problem(directory, mmap=True):
+    """Loads the problem defined in ``directory``, from ``problem.anton`` if there is one and from the
+    legacy ``.npy`` files otherwise.
+
+    :rtype: *Problem*
+    """
+    path = os.path.join(directory, PROBLEM_NAME)
+    if os.path.isfile(path):
+        return read_problem(path, mmap=mmap)
+
+    return read_legacy_problem(directory)
@@ -0,0 +1,163 @@
+import numpy as np
+
+def triangle_normals(triangles):
+    """Returns the unit normal of each triangle, ``nan`` for degenerate triangles."""
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return normals / np.linalg.norm(normals, axis=1)[:, None]
+
+def shared_edges(triangles):
+    """Finds the pairs of triangles sharing an edge, vertices being matched by their exact coordinates.
+
+    :return: Indices of the two triangles of each pair
+    :rtype: ``tuple`` of *numpy.array*
+    """
+    _, vertex_ids = np.unique(triangles.reshape(-1, 3), axis=0, return_inverse=True)
+    vertex_ids = vertex_ids.reshape(-1, 3)
+
+    edges = np.sort(np.stack((vertex_ids, np.roll(vertex_ids, -1, axis=1)), axis=2).reshape(-1, 2), axis=1)
+    owners = np.repeat(np.arange(len(triangles)), 3)
+
+    order = np.lexsort((edges[:, 1], edges[:, 0]))
+    edges, owners = edges[order], owners[order]
+    same = np.all(edges[1:] == edges[:-1], axis=1)
+    return owners[:-1][same], owners[1:][same]
+
+def connected_components(number_of_nodes, a, b):
+    """Labels the connected components of the graph with edges ``a[i]``-``b[i]`` by their smallest node."""
+    labels = np.arange(number_of_nodes)
+    while True:
+        updated = labels.copy()
+        np.minimum.at(updated, a, labels[b])
+        np.minimum.at(updated, b, labels[a])
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+def merge_coplanar(triangles, angle_tolerance=1e-6, distance_tolerance=1e-6):
+    """Groups the triangles into regions of edge-connected, coplanar triangles. Two neighbours are
+    coplanar when their normals agree within ``angle_tolerance`` (``1 - cos``) and the vertices of one
+    lie within ``distance_tolerance`` of the plane of the other.
+
+    :param triangles: Triangles (``N x 3 x 3``)
+    :type triangles: *numpy.array*
+
+    :return: Order that makes each region contiguous and the offsets of the regions in that order
+    :rtype: ``tuple`` of *numpy.array*
+
+    \\
+    """
+    triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    if len(triangles) == 0:
+        return np.empty(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+
+    normals = triangle_normals(triangles)
+    a, b = shared_edges(triangles)
+
+    with np.errstate(invalid='ignore'):
+        coplanar = np.einsum('ij,ij->i', normals[a], normals[b]) >= 1.0 - angle_tolerance
+        distances = np.einsum('ikj,ij->ik', triangles[b] - triangles[a][:, None, 0], normals[a])
+        coplanar &= np.all(np.abs(distances) <= distance_tolerance, axis=1)
+
+    labels = connected_components(len(triangles), a[coplanar], b[coplanar])
+    order = np.argsort(labels, kind='stable')
+    _, counts = np.unique(labels[order], return_counts=True)
+    return order, np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+def merge_regions(triangle_sets, angle_tolerance=1e-6, distance_tolerance=1e-6):
+    """Merges coplanar triangles within each of ``triangle_sets``, never across sets.
+
+    :return: The triangles of each set reordered by region, and the offsets of all regions into their
+        concatenation
+    :rtype: ``tuple`` of ``list`` and *numpy.array*
+    """
+    ordered, offsets, start = [], [np.zeros(1, dtype=np.int64)], 0
+    for triangles in triangle_sets:
+        triangles = np.asarray(triangles).reshape(-1, 3, 3)
+        order, region_offsets = merge_coplanar(triangles, angle_tolerance, distance_tolerance)
+        ordered.append(triangles[order])
+        offsets.append(region_offsets[1:] + start)
+        start += len(triangles)
+
+    return ordered, np.concatenate(offsets)
+
+def _convex_hull(points):
+    """Indices of the convex hull of 2D ``points`` in counter-clockwise order, without collinear points."""
+    order = np.lexsort((points[:, 1], points[:, 0]))
+    def chain(indices):
+        hull = []
+        for i in indices:
+            while len(hull) >= 2:
+                a, b = points[hull[-2]], points[hull[-1]]
+                if (b[0] - a[0]) * (points[i][1] - a[1]) - (b[1] - a[1]) * (points[i][0] - a[0]) > 0:
+                    break
+                hull.pop()
+            hull.append(i)
+        return hull[:-1]
+    return np.array(chain(order) + chain(order[::-1]), dtype=np.int64)
+
+def convex_cover(triangles, tolerance=1e-6):
+    """Covers a region of coplanar triangles with fewer triangles. If the region is a convex polygon,
+    i.e. its area equals the area of the convex hull of its vertices, it is returned as a fan over the
+    hull, ``k - 2`` triangles for a hull of ``k`` corners however finely the region is tessellated.
+    Otherwise, or if the fan is not smaller, the triangles are returned unchanged.
+
+    :param triangles: Triangles of one region as built by ``merge_coplanar`` (``N x 3 x 3``)
+    :type triangles: *numpy.array*
+
+    :rtype: *numpy.array*
+    """
+    triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    if len(triangles) < 3:
+        return triangles
+
+    crosses = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    area = 0.5 * np.linalg.norm(crosses, axis=1).sum()
+    normal = crosses.sum(axis=0)
+    if area == 0 or np.linalg.norm(normal) == 0:
+        return triangles
+    normal /= np.linalg.norm(normal)
+
+    u = np.cross(normal, np.eye(3)[np.argmin(np.abs(normal))])
+    u /= np.linalg.norm(u)
+    v = np.cross(normal, u)
+    vertices = np.unique(triangles.reshape(-1, 3), axis=0)
+    points = (vertices - vertices[0]) @ np.stack((u, v), axis=1)
+
+    hull = _convex_hull(points)
+    if len(hull) < 3 or len(hull) - 2 >= len(triangles):
+        return triangles
+    x, y = points[hull, 0], points[hull, 1]
+    hull_area = 0.5 * abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+    if abs(hull_area - area) > tolerance * hull_area:
+        return triangles
+
+    corners = vertices[hull]
+    return np.stack((np.repeat(corners[:1], len(hull) - 2, axis=0), corners[1:-1], corners[2:]), axis=1)
+
+def cover_regions(triangles, regions):
+    """Applies ``convex_cover`` to every region of ``triangles`` and weighs the covering triangles by the
+    number of original triangles each one stands for: the triangles of a region covered by a fan share
+    the region's triangle count in proportion to their area, an unchanged triangle stands for itself.
+
+    :param triangles: Triangles ordered by region (``N x 3 x 3``)
+    :type triangles: *numpy.array*
+    :param regions: Offsets of the regions into ``triangles``
+    :type regions: *numpy.array* of ``int``
+
+    :return: Covering triangles (``M x 3 x 3``) and their weights (``M``)
+    :rtype: ``tuple`` of *numpy.array*
+    """
+    triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    covers, weights = [np.empty((0, 3, 3))], [np.empty(0)]
+    for start, end in zip(regions[:-1], regions[1:]):
+        cover = convex_cover(triangles[start:end])
+        if len(cover) == end - start:
+            weight = np.ones(len(cover))
+        else:
+            areas = np.linalg.norm(np.cross(cover[:, 1] - cover[:, 0], cover[:, 2] - cover[:, 0]), axis=1)
+            weight = (end - start) * areas / areas.sum()
+        covers.append(cover)
+        weights.append(weight)
+    return np.concatenate(covers), np.concatenate(weights)
@@ -0,0 +1,303 @@
+"""Persistent queue of optimizations that runs ``optimizer.py`` workers under a concurrency limit and a
+memory budget. The queue is a JSON file in the workspace, shared by the add-on and the command line::
+
+    python -m core.scheduler submit /tmp/ anton
+    python -m core.scheduler list /tmp/
+    python -m core.scheduler run /tmp/ --max-jobs 2 --memory 16384
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from .manifest import RunManifest, MANIFEST_NAME
+from .problem import PROBLEM_NAME, read_problem
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+QUEUE_NAME = 'queue.json'
+PYTHON = 'python3'
+OPTIMIZER = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'optimizer.py')
+BYTES_PER_CELL = 1024
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+def memory_estimate(workspace_path, res, default_bytes_per_cell=BYTES_PER_CELL):
+    """Estimates the peak memory of an optimization at resolution ``res`` from the peak memory recorded in
+    the run manifest by the finished optimization in the workspace whose resolution is closest, scaled by
+    the ratio of the cell counts. Falls back to ``default_bytes_per_cell`` per cell without history.
+
+    :return: Estimate in bytes
+    :rtype: ``int``
+    """
+    best = None
+    for manifest_path in glob.glob(os.path.join(workspace_path, '*', 'output', MANIFEST_NAME)):
+        for run in RunManifest(manifest_path).results():
+            run_res = (run.get('parameters') or {}).get('res')
+            if not run_res or not run.get('peak_memory'):
+                continue
+            run_res = run_res[0] if isinstance(run_res, list) else run_res
+
+            if best is None or abs(run_res - res) < abs(best[0] - res):
+                best = (run_res, run['peak_memory'])
+
+    if best is None:
+        return int(default_bytes_per_cell * res ** 3)
+    return int(best[1] * (res / best[0]) ** 3)
+
+@contextlib.contextmanager
+def _locked(path):
+    if fcntl is None:
+        yield
+        return
+
+    with open(path + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def _start_time(pid):
+    """Start time of process ``pid`` in clock ticks since boot, ``None`` where it is not known."""
+    try:
+        with open('/proc/{}/stat'.format(pid), 'r') as f:
+            return int(f.read().rsplit(')', 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+def _alive(pid, start_time=None):
+    """Whether process ``pid`` runs. If ``start_time`` is known, the process also has to have started
+    then, so that a pid recycled by an unrelated process does not keep a job running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return start_time is None or _start_time(pid) == start_time
+
+class Scheduler:
+    """Job queue of a workspace. Submitting a job snapshots the problem file, so later edits of the problem
+    do not change queued jobs. ``schedule`` starts queued jobs in submission order while fewer than
+    ``max_jobs`` run and the memory estimates of the running jobs and the next one fit ``memory_budget``;
+    a job is always started when nothing runs, even if its estimate alone exceeds the budget. Workers run
+    in their own session, so they outlive the process that started them, and jobs started by an earlier
+    session are followed through their pid and its start time, and the run that records their job id
+    in the manifest.
+
+    :ivar workspace_path: Workspace holding the queue
+    :vartype workspace_path: ``str``
+    :ivar max_jobs: Number of optimizations run at once (``1``)
+    :vartype max_jobs: ``int``
+    :ivar memory_budget: Memory available to optimizations in bytes, unlimited if ``0``
+    :vartype memory_budget: ``int``
+
+    \\
+    """
+    def __init__(self, workspace_path, max_jobs=1, memory_budget=0):
+        self.workspace_path = workspace_path
+        self.max_jobs = max_jobs
+        self.memory_budget = memory_budget
+        self.path = os.path.join(workspace_path, QUEUE_NAME)
+        self.processes = {}
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def save(self, jobs):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(jobs, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        os.makedirs(self.workspace_path, exist_ok=True)
+        with _locked(self.path):
+            jobs = self.load()
+            yield jobs
+            self.save(jobs)
+
+    def submit(self, filename, problem_path=None, arguments=(), after=(), **extra):
+        """Queues an optimization of problem ``filename``, snapshotting its problem file.
+
+        :param arguments: Extra command line arguments of ``optimizer.py``
+        :type arguments: ``list`` of ``str``
+        :param after: Jobs that have to be done before this one starts; the job fails if one of them does not succeed
+        :type after: ``list`` of ``str``
+
+        :return: The queued job
+        :rtype: ``dict``
+        """
+        if problem_path is None:
+            problem_path = os.path.join(self.workspace_path, filename, PROBLEM_NAME)
+
+        job_id = '{}_{}'.format(filename, time.time_ns())
+        jobs_directory = os.path.join(self.workspace_path, filename, 'jobs')
+        os.makedirs(jobs_directory, exist_ok=True)
+        snapshot = os.path.join(jobs_directory, job_id + '.anton')
+        shutil.copy(problem_path, snapshot)
+
+        problem = read_problem(snapshot)
+        res = problem.parameters.get('res', 100)
+        job = {'id': job_id,
+                'filename': filename,
+                'problem_path': snapshot,
+                'res': res,
+                'max_iterations': problem.parameters.get('max_iterations'),
+                'memory': memory_estimate(self.workspace_path, res),
+                'arguments': list(arguments),
+                'after': list(after),
+                'state': QUEUED,
+                'submitted': time.time()}
+        job.update(extra)
+
+        with self.transaction() as jobs:
+            jobs.append(job)
+        return job
+
+    def cancel(self, job_id):
+        """Cancels a queued job or terminates a running one.
+
+        :return: ``True`` if the job was queued or running
+        :rtype: ``bool``
+        """
+        with self.transaction() as jobs:
+            for job in jobs:
+                if job['id'] != job_id or job['state'] not in (QUEUED, RUNNING):
+                    continue
+
+                if job['state'] == RUNNING:
+                    try:
+                        os.kill(job['pid'], signal.SIGTERM)
+                    except OSError:
+                        pass
+                job['state'] = CANCELLED
+                job['finished'] = time.time()
+                if os.path.isfile(job['problem_path']):
+                    os.remove(job['problem_path'])
+                return True
+        return False
+
+    def jobs(self):
+        return self.load()
+
+    def _finish(self, job):
+        """Updates a running job whose worker exited, reading its exit status if this scheduler started it
+        and its manifest otherwise."""
+        process = self.processes.pop(job['pid'], None)
+        if process is not None:
+            returncode = process.poll()
+        else:
+            run = RunManifest.of_problem(self.workspace_path, job['filename']).of_job(job['id'])
+            returncode = 0 if run is not None and 'end_time' in run else None
+
+        job['state'] = DONE if returncode == 0 else FAILED
+        job['returncode'] = returncode
+        job['finished'] = time.time()
+        if os.path.isfile(job['problem_path']):
+            os.remove(job['problem_path'])
+
+    def schedule(self):
+        """Collects finished workers and starts queued jobs as far as the limits allow.
+
+        :return: Jobs that are running afterwards
+        :rtype: ``list`` of ``dict``
+        """
+        with self.transaction() as jobs:
+            for job in jobs:
+                process = self.processes.get(job.get('pid'))
+                if job['state'] != RUNNING:
+                    if process is not None and process.poll() is not None:
+                        del self.processes[job['pid']]
+                    continue
+                if (process.poll() is not None) if process is not None else not _alive(job['pid'], job.get('pid_start')):
+                    self._finish(job)
+
+            states = {job['id']: job['state'] for job in jobs}
+            running = [job for job in jobs if job['state'] == RUNNING]
+            for job in jobs:
+                if len(running) >= self.max_jobs:
+                    break
+                if job['state'] != QUEUED:
+                    continue
+
+                dependencies = [states.get(job_id) for job_id in job.get('after', [])]
+                if any(state in (FAILED, CANCELLED, None) for state in dependencies):
+                    job.update(state=FAILED, returncode=None, finished=time.time())
+                    states[job['id']] = FAILED
+                    if os.path.isfile(job['problem_path']):
+                        os.remove(job['problem_path'])
+                    continue
+                if any(state != DONE for state in dependencies):
+                    continue
+                if running and self.memory_budget and sum(_job['memory'] for _job in running) + job['memory'] > self.memory_budget:
+                    break
+
+                process = subprocess.Popen([PYTHON, OPTIMIZER, self.workspace_path, job['filename'], job['problem_path'], '--job', job['id']]
+                                            + job.get('arguments', []), start_new_session=True)
+                self.processes[process.pid] = process
+                job.update(state=RUNNING, pid=process.pid, pid_start=_start_time(process.pid), started=time.time())
+                running.append(job)
+
+            return running
+
+    def run(self, interval=1.0):
+        """Schedules until no job is queued or running."""
+        while self.schedule() or any(job['state'] == QUEUED for job in self.jobs()):
+            time.sleep(interval)
+
+def main():
+    parser = argparse.ArgumentParser(description='Queues and runs anton optimizations.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    submit = subparsers.add_parser('submit', help='queue the problem of a workspace')
+    submit.add_argument('workspace_path', type=str)
+    submit.add_argument('filename', type=str)
+    submit.add_argument('--problem', type=str, default=None, help='problem file, <workspace>/<filename>/problem.anton by default')
+
+    listing = subparsers.add_parser('list', help='list the jobs of a workspace')
+    listing.add_argument('workspace_path', type=str)
+
+    cancel = subparsers.add_parser('cancel', help='cancel a queued or running job')
+    cancel.add_argument('workspace_path', type=str)
+    cancel.add_argument('job_id', type=str)
+
+    run = subparsers.add_parser('run', help='run queued jobs until the queue is empty')
+    run.add_argument('workspace_path', type=str)
+    run.add_argument('--max-jobs', type=int, default=1)
+    run.add_argument('--memory', type=int, default=0, help='memory budget in MB, unlimited if 0')
+
+    args = parser.parse_args()
+    scheduler = Scheduler(args.workspace_path, max_jobs=getattr(args, 'max_jobs', 1), memory_budget=getattr(args, 'memory', 0) * 2**20)
+
+    if args.command == 'submit':
+        print(scheduler.submit(args.filename, args.problem)['id'])
+    elif args.command == 'list':
+        for job in scheduler.jobs():
+            print('{:40s} {:10s} res {:4d} ~{:6.0f} MB'.format(job['id'], job['state'], job['res'], job['memory'] / 2**20))
+    elif args.command == 'cancel':
+        if not scheduler.cancel(args.job_id):
+            sys.exit('{}: no queued or running job'.format(args.job_id))
+    else:
+        scheduler.run()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+import time
+import numpy as np
+from scipy import sparse
+from scipy.ndimage import correlate
+from scipy.sparse.linalg import cg
+from .assembly import CORNERS, StiffnessAssembly, grid_nodes
+from .backend import GridBackend
+from .matrixfree import ElementOperator
+from .multigrid import MultigridPreconditioner
+
+FILTER_RADIUS = 1.5
+
+def element_stiffness(nu):
+    """Stiffness matrix of a unit hexahedral element of unit Young's modulus, integrated with ``2^3``
+    Gauss points. The ``24`` DOFs are the ``x``, ``y``, ``z`` displacements of the corners in the order of
+    ``CORNERS``.
+
+    :rtype: *numpy.array*
+    """
+    D = np.zeros((6, 6))
+    D[:3, :3] = nu
+    D[np.arange(3), np.arange(3)] = 1 - nu
+    D[np.arange(3, 6), np.arange(3, 6)] = (1 - 2 * nu) / 2
+    D /= (1 + nu) * (1 - 2 * nu)
+
+    KE = np.zeros((24, 24))
+    for point in np.indices((2, 2, 2)).reshape(3, -1).T:
+        xi = 0.5 + (point - 0.5) / np.sqrt(3)
+        factors = np.where(CORNERS == 1, xi, 1 - xi)
+        signs = np.where(CORNERS == 1, 1.0, -1.0)
+        gradients = np.stack([signs[:, k] * np.prod(np.delete(factors, k, axis=1), axis=1) for k in range(3)], axis=1)
+
+        B = np.zeros((6, 24))
+        for k in range(3):
+            B[k, k::3] = gradients[:, k]
+        B[3, 0::3], B[3, 1::3] = gradients[:, 1], gradients[:, 0]
+        B[4, 1::3], B[4, 2::3] = gradients[:, 2], gradients[:, 1]
+        B[5, 0::3], B[5, 2::3] = gradients[:, 2], gradients[:, 0]
+        KE += B.T @ D @ B / 8
+    return KE
+
+def filter_kernel(radius=FILTER_RADIUS):
+    """Cone weights ``max(0, radius - distance)`` of the cells around a cell."""
+    reach = int(np.ceil(radius)) - 1
+    offsets = np.indices((2 * reach + 1,) * 3) - reach
+    return np.maximum(0.0, radius - np.sqrt((offsets ** 2).sum(axis=0)))
+
+def _cg(A, b, x0, tolerance, max_iterations, M):
+    """Calls ``scipy.sparse.linalg.cg`` with the tolerance argument of the installed scipy, counting iterations."""
+    iterations = [0]
+    def count(_):
+        iterations[0] += 1
+    try:
+        x, _ = cg(A, b, x0=x0, rtol=tolerance, maxiter=max_iterations, M=M, callback=count)
+    except TypeError:
+        x, _ = cg(A, b, x0=x0, tol=tolerance, maxiter=max_iterations, M=M, callback=count)
+    return x, iterations[0]
+
+class SIMPOptimizer(GridBackend):
+    """Voxel SIMP optimizer in numpy and scipy, the backend of the native build. Every design space cell
+    is a trilinear hexahedral element whose Young's modulus is ``E * (minimum_stiffness + x^penalty *
+    (1 - minimum_stiffness))``. Each iteration assembles the global stiffness matrix from the element
+    DOF map ``edofmat`` into a sparsity pattern built once per domain (``core.assembly``), solves for
+    the displacements with a conjugate gradient (``cg_tolerance``, ``cg_max_iterations``)
+    preconditioned with Jacobi or, with ``preconditioner`` set to ``multigrid``, the geometric
+    multigrid V-cycle of ``core.multigrid``, warm started from the previous iteration, filters the
+    compliance sensitivities over a radius of ``1.5`` cells and updates the densities with the
+    optimality criteria under the ``volume_fraction`` constraint and a move limit of ``step_limit``.
+
+    Boundary conditions act on the nodes of the tagged cells that belong to the design space; a force
+    is spread evenly over its nodes. With ``fix_cells_at_dirichlet`` or ``fix_cells_near_force`` the
+    elements touching these nodes are held at ``fixed_cell_density``.
+
+    With ``matrix_free`` the matrix is never assembled: CG runs on the element operator of
+    ``core.matrixfree``, which skips the elements at or below ``minimum_density``.
+
+    :ivar edofmat: Element DOF mapping (``elements x 24``), not built with ``matrix_free``
+    :vartype edofmat: *numpy.array* of ``int``
+
+    \\
+    """
+    name = 'native'
+
+    def prepare(self):
+        parameters = self.parameters
+        res = self.res
+        self.elements = np.argwhere(self.domain)
+        self.KE = element_stiffness(parameters['nu'])
+
+        node_grid = (res + 1,) * 3
+        used, element_nodes = grid_nodes(self.elements, res)
+        self.number_of_dofs = 3 * len(used)
+
+        def nodes_of(cells):
+            corners = np.array(np.unravel_index(cells, (res,) * 3)).T[:, None, :] + CORNERS[None, :, :]
+            nodes = np.unique(np.ravel_multi_index(corners.reshape(-1, 3).T, node_grid))
+            position = np.searchsorted(used, nodes)
+            return position[(position < len(used)) & (used[np.minimum(position, len(used) - 1)] == nodes)]
+
+        fixed_dofs, boundary_nodes = [], []
+        for axis_to_fix, cells in self.fixed:
+            nodes = nodes_of(cells)
+            fixed_dofs.extend(3 * nodes + 'xyz'.index(axis) for axis in axis_to_fix)
+            if parameters['fix_cells_at_dirichlet']:
+                boundary_nodes.append(nodes)
+
+        self.forces = np.zeros(self.number_of_dofs)
+        for force, cells in self.loads:
+            nodes = nodes_of(cells)
+            if len(nodes):
+                for k in range(3):
+                    self.forces[3 * nodes + k] += force[k] / len(nodes)
+            if parameters['fix_cells_near_force']:
+                boundary_nodes.append(nodes)
+
+        fixed_dofs = np.unique(np.concatenate(fixed_dofs + [np.empty(0, dtype=np.int64)]))
+        self.free_dofs = np.setdiff1d(np.arange(self.number_of_dofs), fixed_dofs)
+        self.displacements = np.zeros(self.number_of_dofs)
+
+        passive = np.zeros(len(used), dtype=bool)
+        passive[np.concatenate(boundary_nodes + [np.empty(0, dtype=np.int64)])] = True
+        self.passive = passive[element_nodes].any(axis=1)
+        self.density[tuple(self.elements[self.passive].T)] = parameters['fixed_cell_density']
+
+        if parameters['matrix_free']:
+            self.operator = ElementOperator(element_nodes, self.free_dofs, self.number_of_dofs, self.KE)
+        else:
+            self.edofmat = (3 * element_nodes[:, :, None] + np.arange(3)).reshape(-1, 24)
+            self.assembly = StiffnessAssembly(self.edofmat, self.free_dofs, self.number_of_dofs, self.KE)
+        if parameters['preconditioner'] == 'multigrid':
+            self.multigrid = MultigridPreconditioner(self.elements, used, self.free_dofs, res, self.KE)
+        self.kernel = filter_kernel()
+        self.filter_weights = correlate(self.domain.astype(np.float64), self.kernel, mode='constant')
+
+    def stiffness(self, moduli, active=None):
+        """Stiffness matrix of the free DOFs for the element Young's moduli ``moduli``, or with
+        ``matrix_free`` the element operator skipping the elements where ``active`` is ``False``.
+        """
+        if self.parameters['matrix_free']:
+            return self.operator.update(moduli, active)
+        return self.assembly.assemble(moduli)
+
+    def element_energy(self, displacements):
+        """Products ``u_e^T KE u_e`` of every element for the displacements of all DOFs."""
+        if self.parameters['matrix_free']:
+            return self.operator.energy(displacements)
+        u = displacements[self.edofmat]
+        return np.einsum('ij,jk,ik->i', u, self.KE, u)
+
+    def preconditioner(self, K, moduli):
+        """Preconditioner of the CG solve with ``K``, the multigrid V-cycle on the element moduli
+        ``moduli`` or the inverse diagonal of ``K``.
+        """
+        if self.parameters['preconditioner'] == 'multigrid':
+            return self.multigrid.update(K, moduli)
+        diagonal = K.diagonal()
+        return sparse.diags(1.0 / np.where(diagonal > 0, diagonal, 1.0))
+
+    def solve(self, K, moduli):
+        """Solves ``K u = f`` on the free DOFs for the element moduli ``moduli``, warm started from
+        the previous displacements.
+
+        :return: Displacements of all DOFs
+        :rtype: *numpy.array*
+        """
+        parameters = self.parameters
+        forces = self.forces[self.free_dofs]
+        if self.parameters['matrix_free']:
+            forces = forces * (1 - K.orphans)
+        free, iterations = _cg(K, forces, self.displacements[self.free_dofs],
+                                parameters['cg_tolerance'], parameters['cg_max_iterations'], self.preconditioner(K, moduli))
+        self.log('CG iterations: {}'.format(iterations))
+
+        displacements = np.zeros(self.number_of_dofs)
+        displacements[self.free_dofs] = free
+        return displacements
+
+    def iterate(self, i):
+        parameters = self.parameters
+        penalty, E, minimum_stiffness = parameters['penalty'], parameters['E'], parameters['minimum_stiffness']
+        x = self.density[tuple(self.elements.T)]
+
+        start = time.time()
+        moduli = E * (minimum_stiffness + x ** penalty * (1 - minimum_stiffness))
+        K = self.stiffness(moduli, x > parameters['minimum_density'])
+        self.phases['assemble'] = time.time() - start
+
+        start = time.time()
+        self.displacements = self.solve(K, moduli)
+        self.phases['solve'] = time.time() - start
+
+        start = time.time()
+        energy = self.element_energy(self.displacements)
+        objective = float((moduli * energy).sum())
+        sensitivity = np.zeros((self.res,) * 3)
+        sensitivity[tuple(self.elements.T)] = -penalty * E * (1 - minimum_stiffness) * x ** (penalty - 1) * energy * x
+        sensitivity = correlate(sensitivity, self.kernel, mode='constant')[tuple(self.elements.T)]
+        sensitivity /= self.filter_weights[tuple(self.elements.T)] * np.maximum(x, 1e-3)
+        self.phases['sensitivity'] = time.time() - start
+
+        start = time.time()
+        self.density[tuple(self.elements.T)] = self.update(x, sensitivity)
+        self.phases['update'] = time.time() - start
+        return objective
+
+    def update(self, x, sensitivity):
+        """Optimality criteria update of the densities ``x`` with the bisection of the Lagrange multiplier."""
+        parameters = self.parameters
+        move, minimum_density = parameters['step_limit'], max(parameters['minimum_density'], 1e-3)
+        target = parameters['volume_fraction'] * len(x)
+        active = ~self.passive
+        scale = np.sqrt(np.maximum(-sensitivity, 0.0))
+
+        lower, upper = 0.0, 1e9
+        updated = x
+        while (upper - lower) / (upper + lower + 1e-30) > 1e-4:
+            multiplier = 0.5 * (lower + upper)
+            updated = np.where(active, np.clip(x * scale / np.sqrt(multiplier),
+                                                np.maximum(minimum_density, x - move), np.minimum(1.0, x + move)), x)
+            if updated.sum() > target:
+                lower = multiplier
+            else:
+                upper = multiplier
+        return updated
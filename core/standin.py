@@ -0,0 +1,82 @@
+import time
+import numpy as np
+from .backend import GridBackend
+
+def _neighbour_sum(grid):
+    """Sums the six face neighbours of every cell, cells outside the grid counting as zero."""
+    padded = np.pad(grid, 1)
+    return (padded[:-2, 1:-1, 1:-1] + padded[2:, 1:-1, 1:-1] + padded[1:-1, :-2, 1:-1]
+            + padded[1:-1, 2:, 1:-1] + padded[1:-1, 1:-1, :-2] + padded[1:-1, 1:-1, 2:])
+
+class StandinOptimizer(GridBackend):
+    """Deterministic stand-in for the optimizer that runs anywhere numpy does, so that the pipeline
+    around the optimizer can be timed and compared between machines. It is not a structural solver:
+    each iteration relaxes a scalar potential from the loaded cells to the fixed cells through the
+    penalized densities, takes its squared gradient as the sensitivity and applies an optimality
+    criteria update under the volume constraint. The cost per iteration grows with the number of
+    cells like a solver's does, and its run directory is the one every backend writes.
+
+    :ivar relaxation_sweeps: Jacobi sweeps of the potential per iteration (``8``)
+    :vartype relaxation_sweeps: ``int``
+
+    \\
+    """
+    name = 'standin'
+
+    def __init__(self, **kwargs):
+        self.relaxation_sweeps = kwargs.pop('relaxation_sweeps', 8)
+        super().__init__(**kwargs)
+
+    def prepare(self):
+        # Boundary conditions act on the nodes near the triangles, which the cells on either side share
+        def near(cells):
+            mask = np.zeros_like(self.domain)
+            mask.flat[cells] = True
+            return self.domain & (mask | (_neighbour_sum(mask.astype(np.int8)) > 0))
+
+        self.fixed_cells = np.zeros_like(self.domain)
+        for _, cells in self.fixed:
+            self.fixed_cells |= near(cells)
+        self.loaded_cells = np.zeros_like(self.domain)
+        for _, cells in self.loads:
+            self.loaded_cells |= near(cells)
+        self.loaded_cells &= ~self.fixed_cells
+        self.potential = np.where(self.loaded_cells, 1.0, 0.0)
+
+    def iterate(self, i):
+        parameters = self.parameters
+        volume_fraction, penalty = parameters['volume_fraction'], parameters['penalty']
+        step_limit, minimum_density = parameters['step_limit'], max(parameters['minimum_density'], 1e-3)
+        density, domain = self.density, self.domain
+        target = volume_fraction * domain.sum()
+
+        start = time.time()
+        stiffness = np.where(domain, density ** penalty, 0.0)
+        conductance = _neighbour_sum(stiffness) + 6 * stiffness
+        potential = self.potential
+        for _ in range(self.relaxation_sweeps):
+            potential = np.where(conductance > 0, (_neighbour_sum(stiffness * potential) + 6 * stiffness * potential)
+                                                    / np.maximum(conductance, 1e-12), 0.0)
+            potential[self.loaded_cells] = 1.0
+            potential[self.fixed_cells] = 0.0
+        self.potential = potential
+        self.phases['solve'] = time.time() - start
+
+        start = time.time()
+        energy = sum(np.square(np.gradient(potential, axis=axis)) for axis in range(3))
+        objective = float((stiffness * energy).sum())
+        sensitivity = np.where(domain, penalty * density ** (penalty - 1) * energy, 0.0)
+        sensitivity = np.where(domain, (_neighbour_sum(sensitivity) + sensitivity) / 7, 0.0)
+
+        lower, upper = 0.0, max(float(sensitivity.max()), 1e-12)
+        for _ in range(40):
+            multiplier = 0.5 * (lower + upper)
+            candidate = np.clip(density * np.sqrt(sensitivity / max(multiplier, 1e-30)),
+                                np.maximum(density - step_limit, minimum_density), np.minimum(density + step_limit, 1.0))
+            if candidate[domain].sum() > target:
+                lower = multiplier
+            else:
+                upper = multiplier
+        self.density = np.where(domain, candidate, 0.0)
+        self.phases['update'] = time.time() - start
+        return objective
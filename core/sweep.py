@@ -0,0 +1,155 @@
+"""Parameter sweeps that voxelize the design space and tag boundary conditions once per resolution::
+
+    python -m core.sweep /tmp/ anton --res 64 100 --volume-fraction 0.2 0.3 0.4 --penalty 3 4 --jobs 4
+    python -m core.sweep /tmp/ anton --compare anton_20201018-120000
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from .manifest import RunManifest
+from .problem import PROBLEM_NAME, read_problem, write_problem
+from .scheduler import Scheduler
+
+SWEEP_KEYS = ('res', 'volume_fraction', 'penalty', 'material')
+COMPARISON_NAME = 'comparison.csv'
+
+def expand_grid(grid):
+    """Expands ``grid``, a ``dict`` of parameter names and lists of values, into one ``dict`` per combination."""
+    keys = [key for key in SWEEP_KEYS if grid.get(key)]
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+def sweep_directory(workspace_path, filename, sweep_id):
+    return os.path.join(workspace_path, filename, 'sweeps', sweep_id)
+
+def submit_sweep(scheduler, filename, grid):
+    """Queues a sweep of problem ``filename`` over ``grid`` with ``scheduler``. For each resolution one job
+    imports the mesh, filters it and applies the boundary conditions, and saves the resulting domain; the
+    runs at that resolution then start from the saved domain with their parameters overridden, in
+    parallel as far as the scheduler's limits allow.
+
+    :param scheduler: Scheduler of the workspace
+    :type scheduler: *core.scheduler.Scheduler*
+    :param filename: Problem to sweep
+    :type filename: ``str``
+    :param grid: Values of ``res``, ``volume_fraction``, ``penalty`` and ``material``, a material being a
+        ``dict`` with ``name``, ``youngs`` and ``poisson``; missing parameters keep the problem's value
+    :type grid: ``dict``
+
+    :return: Identifier of the sweep
+    :rtype: ``str``
+
+    \\
+    """
+    workspace_path = scheduler.workspace_path
+    sweep_id = '{}_{}'.format(filename, time.strftime('%Y%m%d-%H%M%S'))
+    directory = sweep_directory(workspace_path, filename, sweep_id)
+    os.makedirs(directory, exist_ok=True)
+
+    base = read_problem(os.path.join(workspace_path, filename, PROBLEM_NAME), mmap=False)
+    members = expand_grid(grid)
+
+    def submit(problem_name, parameters, material, **kwargs):
+        problem = read_problem(os.path.join(workspace_path, filename, PROBLEM_NAME), mmap=False)
+        problem.parameters.update(parameters, sweep=sweep_id)
+        problem.material = material
+        path = os.path.join(directory, problem_name)
+        write_problem(path, problem)
+        job = scheduler.submit(filename, path, sweep=sweep_id, **kwargs)
+        os.remove(path)
+        return job
+
+    for res in sorted(set(member.get('res', base.parameters['res']) for member in members)):
+        domain = os.path.join(directory, 'domain_r{:04d}.tcb.zip'.format(res))
+        prepared = submit('domain_r{:04d}.anton'.format(res), {'res': res}, base.material, arguments=['--prepare', domain])
+
+        for i, member in enumerate(members):
+            if member.get('res', base.parameters['res']) != res:
+                continue
+            parameters = {key: value for key, value in member.items() if key != 'material'}
+            submit('member_{:04d}.anton'.format(i), dict(parameters, res=res), member.get('material', base.material),
+                    arguments=['--domain', domain], after=[prepared['id']], member=i)
+
+    with open(os.path.join(directory, 'sweep.json'), 'w') as f:
+        json.dump({'id': sweep_id, 'grid': grid, 'members': members}, f, indent=1)
+
+    return sweep_id
+
+def comparison(workspace_path, filename, sweep_id):
+    """Collects one row per finished run of the sweep from the run manifest: parameters, final objective,
+    volume as a fraction of the design space, iterations, stop reason and wall time. Every value comes
+    from the manifest, so the table is cheap to rebuild whenever a run of the sweep ends.
+
+    :rtype: ``list`` of ``dict``
+    """
+    rows = []
+    for run in RunManifest.of_problem(workspace_path, filename).runs():
+        parameters = run.get('parameters') or {}
+        if parameters.get('sweep') != sweep_id or run.get('stop_reason') == 'domain' or 'end_time' not in run:
+            continue
+
+        res = parameters['res'][0] if isinstance(parameters['res'], list) else parameters['res']
+        rows.append({'task_id': run['task_id'],
+                        'res': res,
+                        'volume_fraction': parameters.get('volume_fraction'),
+                        'penalty': parameters.get('penalty'),
+                        'youngs': parameters.get('E'),
+                        'poisson': parameters.get('nu'),
+                        'objective': run.get('objective'),
+                        'volume': run.get('volume'),
+                        'iterations': run.get('iterations'),
+                        'stop_reason': run.get('stop_reason'),
+                        'time': run['end_time'] - run['start_time']})
+    return rows
+
+def write_comparison(workspace_path, filename, sweep_id):
+    """Writes the comparison of a sweep as ``comparison.csv`` in its sweep directory.
+
+    :return: Path to the table
+    :rtype: ``str``
+    """
+    rows = comparison(workspace_path, filename, sweep_id)
+    path = os.path.join(sweep_directory(workspace_path, filename, sweep_id), COMPARISON_NAME)
+    fields = ['task_id', 'res', 'volume_fraction', 'penalty', 'youngs', 'poisson', 'objective', 'volume', 'iterations', 'stop_reason', 'time']
+
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweeps the parameters of an anton problem.')
+    parser.add_argument('workspace_path', type=str)
+    parser.add_argument('filename', type=str)
+    parser.add_argument('--res', type=int, nargs='+')
+    parser.add_argument('--volume-fraction', type=float, nargs='+')
+    parser.add_argument('--penalty', type=float, nargs='+')
+    parser.add_argument('--material', type=str, nargs='+', help='name:youngs:poisson')
+    parser.add_argument('--jobs', type=int, default=1, help='number of runs at once')
+    parser.add_argument('--memory', type=int, default=0, help='memory budget in MB, unlimited if 0')
+    parser.add_argument('--compare', type=str, metavar='SWEEP_ID', help='only write the comparison table of a sweep')
+    args = parser.parse_args()
+
+    if args.compare is None:
+        materials = None
+        if args.material:
+            materials = [dict(zip(('name', 'youngs', 'poisson'), (name, float(youngs), float(poisson))))
+                            for name, youngs, poisson in (material.split(':') for material in args.material)]
+
+        scheduler = Scheduler(args.workspace_path, max_jobs=args.jobs, memory_budget=args.memory * 2**20)
+        sweep_id = submit_sweep(scheduler, args.filename, {'res': args.res,
+                                                            'volume_fraction': args.volume_fraction,
+                                                            'penalty': args.penalty,
+                                                            'material': materials})
+        print(sweep_id)
+        scheduler.run()
+    else:
+        sweep_id = args.compare
+
+    print(write_comparison(args.workspace_path, args.filename, sweep_id))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import os
+import zipfile
+import numpy as np
+from .mesher import read_densities
+
+FEM_MEMBERS = ('coords.npy', 'densities.npy')
+
+class FEMFormatError(ValueError):
+    """Raised when a ``*.tcb.zip`` file was not written by ``write_fem``."""
+
+def read_fem(path):
+    """Reads the densities of a ``fem/*.tcb.zip`` file written by ``write_fem``, the format of the
+    native backends. The archive holds exactly the ``coords.npy`` and ``densities.npy`` arrays, so an
+    archive written by taichi, a single binary stream, is never mistaken for it and is left to
+    ``ti run convert_fem_solve``.
+
+    :param path: Path to the ``*.tcb.zip`` file
+    :type path: ``str``
+
+    :raises FEMFormatError: The file was not written by ``write_fem``
+
+    :return: Voxel coordinates (``N x 3``, ``int32``) and their densities (``N``, ``float64``)
+    :rtype: ``tuple`` of *numpy.array*
+
+    \\
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            if sorted(archive.namelist()) != sorted(FEM_MEMBERS):
+                raise FEMFormatError('{}: not written by write_fem'.format(path))
+    except zipfile.BadZipFile as error:
+        raise FEMFormatError('{}: {}'.format(path, error))
+
+    with np.load(path, allow_pickle=False) as arrays:
+        coords, densities = arrays['coords'], arrays['densities']
+    if coords.ndim != 2 or coords.shape[1:] != (3,) or densities.shape != (len(coords),):
+        raise FEMFormatError('{}: coordinates and densities do not match'.format(path))
+    return coords.astype(np.int32), densities.astype(np.float64)
+
+def write_fem(path, coords, densities):
+    """Writes voxel densities as a ``*.tcb.zip`` file that ``read_fem`` reads back. Coordinates are
+    voxel indices, as ``core.mesher.read_densities`` returns them for the output of
+    ``convert_fem_solve``.
+
+    :param path: Path to the ``*.tcb.zip`` file
+    :type path: ``str``
+    :param coords: Voxel coordinates (``N x 3``)
+    :type coords: *numpy.array*
+    :param densities: Voxel densities (``N``)
+    :type densities: *numpy.array*
+
+    \\
+    """
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, coords=np.asarray(coords, dtype=np.int32).reshape(-1, 3),
+                            densities=np.asarray(densities, dtype=np.float64).reshape(-1))
+
+def load_voxels(fem_file, density_file):
+    """Reads the densities of ``fem_file`` with ``read_fem`` if a native backend wrote it and converts
+    it with ``ti run convert_fem_solve`` into ``density_file`` otherwise.
+
+    :return: Voxel coordinates and densities, ``None`` if the conversion failed
+    :rtype: ``tuple`` of *numpy.array*
+    """
+    try:
+        return read_fem(fem_file)
+    except FEMFormatError:
+        pass
+
+    if os.path.isfile(density_file):
+        os.remove(density_file)
+
+    os.system("ti run convert_fem_solve {} {}".format(fem_file, density_file))
+
+    if not os.path.isfile(density_file):
+        return None
+
+    return read_densities(density_file)
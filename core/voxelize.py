@@ -0,0 +1,76 @@
+import numpy as np
+from .boundary import lattice_coordinates
+
+# Offsets of the rays from the cell centers, so that rays do not run through the edges and vertices of
+# meshes aligned with the grid
+RAY_OFFSET = (1.37e-4, 2.91e-4)
+
+def read_obj(path):
+    """Reads the vertices and faces of a Wavefront OBJ file, polygons being triangulated as fans.
+
+    :return: Vertices (``N x 3``, ``float64``) and triangles (``M x 3``, ``int64``, zero based)
+    :rtype: ``tuple`` of *numpy.array*
+    """
+    vertices, faces = [], []
+    with open(path, 'r') as f:
+        for line in f:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == 'v':
+                vertices.append([float(value) for value in fields[1:4]])
+            elif fields[0] == 'f':
+                polygon = [int(field.split('/')[0]) for field in fields[1:]]
+                polygon = [index - 1 if index > 0 else len(vertices) + index for index in polygon]
+                faces.extend([polygon[0], polygon[k], polygon[k + 1]] for k in range(1, len(polygon) - 1))
+
+    return np.array(vertices, dtype=np.float64).reshape(-1, 3), np.array(faces, dtype=np.int64).reshape(-1, 3)
+
+def write_obj(path, vertices, faces):
+    """Writes a triangle mesh as a Wavefront OBJ file."""
+    with open(path, 'w') as f:
+        f.write(''.join('v {:.6f} {:.6f} {:.6f}\n'.format(*vertex) for vertex in vertices))
+        f.write(''.join('f {} {} {}\n'.format(*(face + 1)) for face in faces))
+
+def voxelize(triangles, res, scale=0.1):
+    """Fills the cells of a ``res`` grid whose centers lie inside the closed mesh ``triangles``, placed
+    like ``TopoOpt.import_mesh`` places it. A ray is cast along ``z`` through every cell column and the
+    crossings with the mesh toggle the cells above them, all triangles being rasterized at once.
+
+    :param triangles: Triangles in object space (``N x 3 x 3``)
+    :type triangles: *numpy.array*
+    :param res: Resolution of the grid
+    :type res: ``int``
+
+    :return: Occupancy grid (``res x res x res``, ``bool``)
+    :rtype: *numpy.array*
+
+    \\
+    """
+    vertices = lattice_coordinates(np.asarray(triangles).reshape(-1, 3, 3), res, scale)
+    lower = np.clip(np.ceil(vertices[..., :2].min(axis=1) - 0.5), 0, res).astype(np.int64)
+    upper = np.clip(np.floor(vertices[..., :2].max(axis=1) - 0.5), -1, res - 1).astype(np.int64)
+    extent = np.maximum(upper - lower + 1, 0)
+
+    counts = extent.prod(axis=1)
+    triangle = np.repeat(np.arange(len(vertices)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    columns = lower[triangle] + np.stack((local // extent[triangle, 1], local % extent[triangle, 1]), axis=1)
+
+    a, b, c = (vertices[triangle, k] for k in range(3))
+    point = columns + 0.5 + np.array(RAY_OFFSET)
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    u = ((b[:, 0] - point[:, 0]) * (c[:, 1] - point[:, 1]) - (b[:, 1] - point[:, 1]) * (c[:, 0] - point[:, 0]))
+    v = ((c[:, 0] - point[:, 0]) * (a[:, 1] - point[:, 1]) - (c[:, 1] - point[:, 1]) * (a[:, 0] - point[:, 0]))
+    w = area - u - v
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        u, v, w = u / area, v / area, w / area
+    hit = (area != 0) & (u >= 0) & (v >= 0) & (w >= 0)
+
+    z = u[hit] * a[hit, 2] + v[hit] * b[hit, 2] + w[hit] * c[hit, 2]
+    first = np.clip(np.ceil(z - 0.5), 0, res).astype(np.int64)
+
+    crossings = np.zeros((res, res, res + 1), dtype=np.int32)
+    np.add.at(crossings, (columns[hit, 0], columns[hit, 1], first), 1)
+    return (np.cumsum(crossings[..., :-1], axis=2) & 1).astype(bool)
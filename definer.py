@@ -2,6 +2,7 @@ from collections import OrderedDict
 import bpy
 import numpy as np
 import os
+from .core.problem import Problem, PROBLEM_NAME, write_problem
 
 def get_grease_pencil(gpencil_obj_name='GPencil') -> bpy.types.GreasePencil:
     if gpencil_obj_name not in bpy.context.scene.objects:
@@ -74,6 +75,125 @@ def draw_arrow(gp_frame, p: tuple, norm: tuple, d: tuple, size: int, reverse: bo
 
     return gp_stroke
 
+ROLE_NATIVE = 0
+ROLE_FIXED = 1
+ROLE_NONDESIGNSPACE = 2
+ROLE_FORCE = 3
+
+def material_roles(materials):
+    """Maps every material slot to a role code once: ``ROLE_FIXED``, ``ROLE_NONDESIGNSPACE``,
+    ``ROLE_FORCE + k`` for the k-th distinct ``FORCE_{}`` material, ``ROLE_NATIVE`` otherwise.
+
+    :return: Role code of each slot and the name of each force material
+    :rtype: *numpy.array* of ``int``, ``list`` of ``str``
+    """
+    roles = np.full(max(len(materials), 1), ROLE_NATIVE, dtype=np.int32)
+    force_ids = []
+
+    for i, material in enumerate(materials):
+        name = material.name_full if material is not None else ''
+        if 'FIXED' in name:
+            roles[i] = ROLE_FIXED
+        elif 'NONDESIGNSPACE' in name:
+            roles[i] = ROLE_NONDESIGNSPACE
+        elif 'FORCE' in name:
+            if name not in force_ids:
+                force_ids.append(name)
+            roles[i] = ROLE_FORCE + force_ids.index(name)
+
+    return roles, force_ids
+
+def read_faces(mesh):
+    """Bulk-reads the first three corners of every polygon, the polygon normals and material indices
+    with ``foreach_get``.
+
+    :return: Corner coordinates (``F x 3 x 3``), face normals (``F x 3``) and material indices (``F``)
+    :rtype: ``tuple`` of *numpy.array*
+    """
+    number_of_faces = len(mesh.polygons)
+
+    co = np.empty(3 * len(mesh.vertices), dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    vertex_index = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', vertex_index)
+    loop_start = np.empty(number_of_faces, dtype=np.int32)
+    mesh.polygons.foreach_get('loop_start', loop_start)
+    normals = np.empty(3 * number_of_faces, dtype=np.float32)
+    mesh.polygons.foreach_get('normal', normals)
+    material_index = np.empty(number_of_faces, dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', material_index)
+
+    corners = vertex_index[loop_start[:, None] + np.arange(3)]
+    return co.reshape(-1, 3)[corners].astype(np.float64), normals.reshape(-1, 3), material_index
+
+def face_roles(mesh):
+    """Role code of every face, see ``material_roles``. Force codes are renumbered in the order in
+    which their first face appears.
+
+    :return: Corner coordinates, face normals, role of each face and the name of each force
+    :rtype: ``tuple``
+    """
+    coords, normals, material_index = read_faces(mesh)
+    slot_roles, force_ids = material_roles(mesh.materials)
+    roles = slot_roles[np.clip(material_index, 0, len(slot_roles) - 1)]
+
+    codes, first = np.unique(roles[roles >= ROLE_FORCE], return_index=True)
+    codes = codes[np.argsort(first)]
+    renumbered = np.arange(len(slot_roles) + ROLE_FORCE, dtype=np.int32)
+    renumbered[codes] = ROLE_FORCE + np.arange(len(codes))
+
+    return coords, normals, renumbered[roles], [force_ids[code - ROLE_FORCE] for code in codes]
+
+def group_directions(obj, group_names):
+    """Resolves the direction edge of several vertex groups in one pass, without selecting anything or
+    leaving object mode. Vertex-group membership is the one read without a bulk path: it lives in the
+    per-vertex ``MeshVertex.groups`` collections, which ``foreach_get`` can only read one vertex at a
+    time, ``VertexGroup`` has no accessor for its members, and vertex groups are not exposed in
+    ``Mesh.attributes``. The memberships of every vertex are therefore collected once, for all requested
+    groups, in a single comprehension; coordinates and edges are read with ``foreach_get`` and the edges
+    whose two vertices belong to a group are found with array masks.
+
+    :param obj: Mesh object holding the vertex groups
+    :type obj: *bpy.types.Object*
+    :param group_names: Names of the vertex groups, e.g. ``DIRECTION_1``
+    :type group_names: ``list`` of ``str``
+
+    :return: Unit vector from the second to the first vertex of the first edge of each group, ``None`` for
+        groups without an edge
+    :rtype: ``dict``
+    """
+    mesh = obj.data
+    columns = np.full(len(obj.vertex_groups), -1, dtype=np.int64)
+    for k, name in enumerate(group_names):
+        if name in obj.vertex_groups:
+            columns[obj.vertex_groups[name].index] = k
+
+    pairs = np.array([(index, group.group) for index, vertex in enumerate(mesh.vertices) for group in vertex.groups],
+                     dtype=np.int64).reshape(-1, 2)
+    pairs = pairs[columns[pairs[:, 1]] >= 0]
+    membership = np.zeros((len(mesh.vertices), len(group_names)), dtype=bool)
+    membership[pairs[:, 0], columns[pairs[:, 1]]] = True
+
+    co = np.empty(3 * len(mesh.vertices), dtype=np.float32)
+    mesh.vertices.foreach_get('co', co)
+    co = co.reshape(-1, 3).astype(np.float64)
+    edges = np.empty(2 * len(mesh.edges), dtype=np.int32)
+    mesh.edges.foreach_get('vertices', edges)
+    edges = edges.reshape(-1, 2)
+
+    in_group = membership[edges[:, 0]] & membership[edges[:, 1]]
+    directions = OrderedDict()
+    for k, name in enumerate(group_names):
+        if not in_group[:, k].any():
+            directions[name] = None
+            continue
+
+        edge = edges[np.argmax(in_group[:, k])]
+        vec = co[edge[0]] - co[edge[1]]
+        directions[name] = vec/np.linalg.norm(vec)
+
+    return directions
+
 class Anton_OT_DirectionUpdater(bpy.types.Operator):
     bl_idname = "anton.directionupdate"
     bl_label = ""
@@ -103,39 +223,20 @@ class Anton_OT_DirectionUpdater(bpy.types.Operator):
         else:
             scene.forced_direction_signs[self.force_id] = -1.0
 
-        if bpy.context.mode != 'EDIT':
-            bpy.ops.object.mode_set(mode='EDIT')
-
-        bpy.ops.mesh.select_all(action = 'DESELECT')
-
-        active_object.vertex_groups.active_index = active_object.vertex_groups['DIRECTION_{}'.format(str(self.force_id).split('_')[-1])].index
-        bpy.ops.object.vertex_group_select()
-
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-        for edge in active_object.data.edges:
-            if edge.select:
-                vertices = active_object.data.edges[edge.index].vertices[:]
-                vec = np.array(active_object.data.vertices[vertices[0]].co[:]) - np.array(active_object.data.vertices[vertices[1]].co[:])
-                vec_mag = np.linalg.norm(vec)
-                direction = vec/vec_mag
-                break
+        if active_object.mode == 'EDIT':
+            active_object.update_from_editmode()
 
-        bpy.ops.object.mode_set(mode='OBJECT')
-        centroids = list()
-        normals = list()
+        group_name = 'DIRECTION_{}'.format(str(self.force_id).split('_')[-1])
+        edge_direction = group_directions(active_object, [group_name])[group_name]
+        if edge_direction is not None:
+            direction = edge_direction
 
-        for face in active_object.data.polygons:
-            if 'FORCE' in active_object.data.materials[face.material_index].name_full:
-                if str(active_object.data.materials[face.material_index].name_full) == self.force_id:
-                    face_indices.append(face.index)
+        coords, face_normals, roles, force_ids = face_roles(active_object.data)
+        if self.force_id in force_ids:
+            face_indices = np.flatnonzero(roles == ROLE_FORCE + force_ids.index(self.force_id)).tolist()
 
-                    centroid = (1/3) * (np.array(active_object.data.vertices[face.vertices[0]].co) \
-                                 + np.array(active_object.data.vertices[face.vertices[1]].co) \
-                                  + np.array(active_object.data.vertices[face.vertices[2]].co))
-
-                    centroids.append(centroid)
-                    normals.append(face.normal)
+        centroids = coords[face_indices].mean(axis=1)
+        normals = face_normals[face_indices]
 
 
         if len(centroids) > 0 and np.linalg.norm(direction) > 0:
@@ -181,7 +282,7 @@ class Anton_OT_Definer(bpy.types.Operator):
 
     def execute(self, context):
         """Defines the problem after creation of a tetrahedral finite element mesh and stores
-        the mesh variables as a binary numpy file which is accessed by ``Anton_OT_Processor``
+        the boundary conditions in the problem file which is accessed by ``Anton_OT_Processor``
 
         :ivar nodes: Cartesian position of nodes
         :vartype nodes: *numpy.array* of ``float``
@@ -205,71 +306,27 @@ class Anton_OT_Definer(bpy.types.Operator):
         scene = context.scene
         active_object = bpy.data.objects[scene.anton.filename]
 
-        fixed_faces = []
-        non_design_faces = []
-        forced_faces = OrderedDict()
-        forced_directions = []
-
         if scene.anton.force_directioned:
-            bpy.ops.object.mode_set(mode='OBJECT')
-            for face in active_object.data.polygons:
-                if 'FIXED' in active_object.data.materials[face.material_index].name_full:
-                    coords = []
-                    for _vertex_id in active_object.data.polygons[face.index].vertices[:]:
-                        coords.append(active_object.data.vertices[_vertex_id].co[:])
-
-                    fixed_faces.append(coords)
-
-                elif 'NONDESIGNSPACE' in active_object.data.materials[face.material_index].name_full:
-                    coords = []
-                    for _vertex_id in active_object.data.polygons[face.index].vertices[:]:
-                        coords.append(active_object.data.vertices[_vertex_id].co[:])
-
-                    non_design_faces.append(coords)
+            if active_object.mode == 'EDIT':
+                active_object.update_from_editmode()
 
-                elif 'FORCE' in active_object.data.materials[face.material_index].name_full:
-                    force_id = str(active_object.data.materials[face.material_index].name_full)
-                    coords = []
-                    for _vertex_id in active_object.data.polygons[face.index].vertices[:]:
-                        coords.append(active_object.data.vertices[_vertex_id].co[:])
+            coords, _, roles, force_ids = face_roles(active_object.data)
+            fixed_faces = coords[roles == ROLE_FIXED]
+            non_design_faces = coords[roles == ROLE_NONDESIGNSPACE]
+            forced_faces = OrderedDict((_force_id, coords[roles == ROLE_FORCE + i]) for i, _force_id in enumerate(force_ids))
 
-                    if force_id not in forced_faces.keys():
-                        forced_faces[force_id] = [coords]
-                    else:
-                        forced_faces[force_id].append(coords)
-
-            if bpy.context.mode != 'EDIT':
-                bpy.ops.object.mode_set(mode='EDIT')
-
-            for i in range(scene.anton.number_of_forces):
-                bpy.ops.mesh.select_all(action = 'DESELECT')
-
-                active_object.vertex_groups.active_index = active_object.vertex_groups['DIRECTION_{}'.format(i+1)].index
-                bpy.ops.object.vertex_group_select()
-
-                bpy.ops.object.mode_set(mode='OBJECT')
-
-                for edge in active_object.data.edges:
-                    if edge.select:
-                        coords = []
-                        for _vertex_id in active_object.data.edges[edge.index].vertices[:]:
-                            coords.append(active_object.data.vertices[_vertex_id].co[:])
-
-                        forced_directions.append(self.compute_direction(coords))
-
-                bpy.ops.object.mode_set(mode='EDIT')
-
-            bpy.ops.object.mode_set(mode='OBJECT')
+            forced_directions = group_directions(active_object, ['DIRECTION_{}'.format(_force_id.split('_')[-1]) for _force_id in forced_faces])
+            if any(direction is None for direction in forced_directions.values()):
+                scene.anton.defined = False
+                self.report({'ERROR'}, 'Assign direction to each specified force with vertex groups.')
+                return {'CANCELLED'}
 
-            forces = []
             force_vectors = []
-            for i, _force_id in enumerate(forced_faces):
-                forces.append(forced_faces[_force_id])
-                force_vectors.append(scene.forced_magnitudes[_force_id] * scene.forced_direction_signs[_force_id] * forced_directions[i])
+            for _force_id in forced_faces:
+                force_vectors.append(scene.forced_magnitudes[_force_id] * scene.forced_direction_signs[_force_id] * forced_directions['DIRECTION_{}'.format(_force_id.split('_')[-1])])
 
-            np.save(os.path.join(scene.anton.workspace_path, scene.anton.filename, 'fixed.npy'), np.array(fixed_faces), allow_pickle=True)
-            np.save(os.path.join(scene.anton.workspace_path, scene.anton.filename, 'forces.npy'), np.array(forces), allow_pickle=True)
-            np.save(os.path.join(scene.anton.workspace_path, scene.anton.filename, 'force_vectors.npy'), np.array(force_vectors), allow_pickle=True)
+            write_problem(os.path.join(scene.anton.workspace_path, scene.anton.filename, PROBLEM_NAME),
+                            Problem.from_faces(fixed_faces, list(forced_faces.values()), force_vectors))
 
             self.report({'INFO'}, 'Fixed: {}, Non Design Space: {}, Force: {}'.format(
                                                                                 len(fixed_faces),
@@ -284,11 +341,5 @@ class Anton_OT_Definer(bpy.types.Operator):
             self.report({'ERROR'}, 'Forces yet to be defined')
             return {'CANCELLED'}
 
-    @staticmethod
-    def compute_direction(points):
-        vec = np.array(points[0]) - np.array(points[1])
-        vec_mag = np.linalg.norm(vec)
-        return vec/vec_mag
-
 
 
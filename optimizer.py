@@ -3,15 +3,43 @@ import sys
 import os
 import numpy as np
 import shutil
-from taichi.dynamics import Simulation
-
-import taichi as tc
+import time
 import argparse
-from taichi.misc.util import get_unique_task_id
 
-class TopoOpt(Simulation):
+try:
+  import taichi as tc
+  from taichi.dynamics import Simulation
+  from taichi.misc.util import get_unique_task_id
+except ImportError:
+  tc = None
+  Simulation = object
+
+from core.backend import Backend, StopRule
+from core.manifest import RunManifest, MANIFEST_NAME
+from core.problem import load_problem, read_problem
+from core.regions import cover_regions
+from core.tcb import FEMFormatError, load_voxels, read_fem
+from core.metrics import MetricsLog, METRICS_NAME
+from core.simp import SIMPOptimizer
+from core.standin import StandinOptimizer
+
+STOP_PARAMETERS = ('stop_tolerance', 'stop_patience', 'min_iterations', 'time_budget')
+# Handled by TopoOpt itself and recorded in the manifest, never passed to the native simulation
+LOCAL_PARAMETERS = STOP_PARAMETERS + ('continue_from', 'overrides', 'sweep', 'continuation', 'job', 'backend', 'matrix_free', 'preconditioner')
+# Parameters a sweep varies between runs that share a domain
+SWEEP_OVERRIDES = ('volume_fraction', 'penalty', 'E', 'nu')
+
+class TopoOpt(Backend, Simulation):
+  """Backend on taichi's narrow-band ``spgrid_topo_opt`` solver. Boundary conditions go through its
+  per-triangle actions, each of which scans the grid, so their setup time grows with the number of
+  triangles; the one-pass cell tagging of ``core.boundary`` only serves the grid backends."""
+  name = 'taichi'
+
   def __init__(self, **kwargs):
+    if tc is None:
+      raise ImportError('the taichi backend needs taichi with spgrid_topo_opt')
     res = kwargs['res']
+    self.res = res
     self.snapshot_period = kwargs.get('snapshot_period', 0)
     script_fn = os.path.join(os.getcwd(), sys.argv[0])
     suffix = ''
@@ -35,14 +63,10 @@ class TopoOpt(Simulation):
 
     suffix += '_r{:04d}'.format(res[0])
 
-    parser = argparse.ArgumentParser(description='Topology Optimization.')
-    parser.add_argument('options', metavar='Option', type=str, nargs='*',
-                        help='An option to override')
-    parser.add_argument('-c', type=str, help='iteration to start from')
-
-    args = parser.parse_args()
+    continue_from = kwargs.get('continue_from')
+    overrides = kwargs.get('overrides') or {}
 
-    if args.c is not None:
+    if continue_from is not None:
       suffix += '_continue'
 
     self.task_id = get_unique_task_id()
@@ -61,6 +85,11 @@ class TopoOpt(Simulation):
     os.makedirs(self.fem_directory, exist_ok=True)
     os.makedirs(self.fem_obj_directory, exist_ok=True)
     self.max_iterations = kwargs.get('max_iterations', 20)
+    self.stop_tolerance = kwargs.get('stop_tolerance', 0.0)
+    self.stop_patience = kwargs.get('stop_patience', 1)
+    self.min_iterations = kwargs.get('min_iterations', 10)
+    self.time_budget = kwargs.get('time_budget', 0)
+    self.phases = {}
 
     self.log_fn = os.path.join(self.working_directory, 'log.txt')
     tc.start_memory_monitoring(os.path.join(self.working_directory, 'memory_usage.txt'), interval=0.1)
@@ -68,20 +97,18 @@ class TopoOpt(Simulation):
     tc.redirect_print_to_log()
     tc.trace("log_fn = {}", self.log_fn)
 
-    shutil.copy(sys.argv[0], self.working_directory + "/")
-    print(args)
-    super().__init__(name='spgrid_topo_opt', **kwargs)
+    self.manifest = RunManifest(os.path.join(os.path.dirname(self.working_directory), MANIFEST_NAME))
+    self.manifest.start(self.task_id, self.suffix, self.working_directory,
+                        {key: value for key, value in kwargs.items() if key != 'working_directory'})
 
-    if args.c is not None:
-      print(args.options)
-      print(args.c)
+    shutil.copy(sys.argv[0], self.working_directory + "/")
+    super().__init__(name='spgrid_topo_opt', **{key: value for key, value in kwargs.items() if key not in LOCAL_PARAMETERS})
 
+    if continue_from is not None:
       last_iter = self.general_action(action='load_state',
-                                      filename=args.c)
-      for o in args.options:
-        o = o.split('=')
-        assert(len(o) == 2)
-        self.override_parameter(o[0], o[1])
+                                      filename=continue_from)
+      for key, value in overrides.items():
+        self.override_parameter(key, value)
 
       self.i_start = int(last_iter) + 1
       tc.info("\n*** Restarting from iter {}", self.i_start)
@@ -94,6 +121,19 @@ class TopoOpt(Simulation):
     if kwargs.get('check_log_file', True):
       assert(os.path.exists(self.log_fn))
 
+  def save_domain(self, fn):
+    """Saves the populated and filtered grid with its boundary conditions, before any iteration."""
+    self.general_action('save_state', filename=fn)
+    self.manifest.end(self.task_id, 0, stop_reason='domain')
+
+  def load_domain(self, fn, overrides):
+    """Starts from a grid saved by ``save_domain`` instead of importing the mesh and tagging boundary
+    conditions again, with the parameters in ``overrides`` replaced."""
+    self.general_action(action='load_state', filename=fn)
+    for key, value in overrides.items():
+      self.override_parameter(key, value)
+    self.i_start = 0
+
   def get_fem_file_name(self, iter):
     return "{}/{:05}.tcb.zip".format(self.fem_directory, iter)
 
@@ -101,36 +141,82 @@ class TopoOpt(Simulation):
     return "{}/{:05}.tcb.zip".format(self.snapshot_directory, iter)
 
   def iterate(self, i):
+    """Runs iteration ``i``, recording the seconds spent in the native iteration and in saving the
+    snapshot in ``self.phases``."""
     tc.trace("Starting Iteration {}...".format(i))
+    start = time.time()
     objective = float(self.general_action("iterate", iter=i))
+    self.phases['iterate'] = time.time() - start
     tc.trace("\n**** Task {}".format(self.task_id))
 
     tc.trace("\n**** Iteration {} finished.\n*** (objective = {:6.3f})".format(i, objective))
     tc.core.print_profile_info()
 
     if self.snapshot_period != 0 and i % self.snapshot_period == 0:
+      start = time.time()
       self.general_action('save_state',
                           filename=self.get_snapshot_file_name(i))
+      self.phases['snapshot'] = time.time() - start
 
     return objective
 
   def run(self):
+    """Iterates until ``max_iterations``, or earlier once the relative change of the objective over the
+    last four iterations stayed below a nonzero ``stop_tolerance`` for ``stop_patience`` iterations after
+    ``min_iterations``, or once a nonzero ``time_budget`` of seconds has passed. An early stop saves a final
+    snapshot, and the reason is recorded in the manifest. Every iteration appends a record to
+    ``metrics.jsonl``."""
     objectives = []
     blklog = open("{}/blocks.log".format(self.working_directory), "w")
+    metrics = MetricsLog(os.path.join(self.working_directory, METRICS_NAME))
+    stop = StopRule(self.stop_tolerance, self.stop_patience, self.min_iterations, self.time_budget)
+    stop_reason = 'max_iterations'
 
+    i = self.i_start - 1
+    self.last_iteration = None
     for i in range(self.i_start, self.max_iterations):
-      blklog.write(self.get_block_counts() + '\n')
+      start = time.time()
+      blocks = self.get_block_counts()
+      self.phases = {'block_counts': time.time() - start}
+      blklog.write(blocks + '\n')
       blklog.flush()
 
       obj = float(self.iterate(i))
       objectives.append(obj)
-      if i > 10 and len(objectives) >= 4:
-        r = abs((objectives[-1] + objectives[-2] - objectives[-3] - objectives[-4]) / (objectives[-1] + objectives[-2]))
-        tc.trace("r = {:4.2f}%", r * 100)
-        if r < 5e-3:
-          tc.trace("*************** Should stop now,  Final objective: {}", objectives[-1])
+      self.last_iteration = i
+      metrics.write(i, obj, blocks, self.phases)
+
+      reason = stop.update(i, obj)
+      if stop.change is not None:
+        tc.trace("r = {:4.2f}%", stop.change * 100)
+      if reason == 'converged':
+        tc.trace("*************** Converged, final objective: {}", objectives[-1])
+      elif reason == 'time_budget':
+        tc.trace("*************** Time budget exhausted, final objective: {}", objectives[-1])
+      if reason is not None:
+        stop_reason = reason
+        break
 
     blklog.close()
+    metrics.close()
+
+    if stop_reason != 'max_iterations' and not (self.snapshot_period != 0 and i % self.snapshot_period == 0):
+      self.general_action('save_state', filename=self.get_snapshot_file_name(i))
+
+    self.manifest.end(self.task_id, i + 1, objective=objectives[-1] if objectives else None, volume=self.final_volume(),
+                      stop_reason=stop_reason)
+
+  def final_volume(self):
+    """Mean density of the cells of the last written densities, the volume fraction of the design space,
+    decoded once here so that readers of the manifest never have to run ``convert_fem_solve``."""
+    if self.last_iteration is None:
+      return None
+    fem_file = self.get_fem_file_name(self.last_iteration)
+    voxels = load_voxels(fem_file, fem_file[:-len('.tcb.zip')] + '.densities.txt')
+    if voxels is None or len(voxels[1]) == 0:
+      tc.warn("Cannot read the final volume from {}", fem_file)
+      return None
+    return float(np.mean(voxels[1]))
 
   def dump(self, i):
     self.general_action('save_density', fn=self.get_snapshot_file_name(i))
@@ -156,6 +242,35 @@ class TopoOpt(Simulation):
   def add_customplane_load(self, force, p0, p1, p2, thresh=0.00001):
     self.general_action(action='add_customplane_load', force=tuple(force), p0=tuple(p0), p1=tuple(p1), p2=tuple(p2), scale=self.scale, epsilon=thresh)
 
+  def add_customplane_dirichlet_bcs(self, axis_to_fix, triangles, thresh=0.00001, regions=None):
+    """Fixes the nodes near all of ``triangles``. ``spgrid_topo_opt`` only takes one triangle per action
+    and scans the grid for each, so the number of actions is kept down: a convex region of ``regions``
+    is handed over as the fan of its outline (``core.regions.convex_cover``), which covers the same
+    surface with fewer triangles, and repeated triangles are dropped. The fan only fixes the same nodes
+    if taichi selects the nodes near that surface; its epsilon test has not been checked against this,
+    and nodes on the outline may differ by rounding."""
+    triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    if regions is not None:
+      triangles, _ = cover_regions(triangles, regions)
+    if len(triangles):
+      _, first = np.unique(triangles.reshape(len(triangles), -1), axis=0, return_index=True)
+      triangles = triangles[np.sort(first)]
+    for p0, p1, p2 in triangles:
+      self.add_customplane_dirichlet_bc(axis_to_fix=axis_to_fix, p0=p0, p1=p1, p2=p2, thresh=thresh)
+
+  def add_customplane_loads(self, force, triangles, thresh=0.00001, regions=None):
+    """Applies ``force`` to the nodes near all of ``triangles``, with convex regions handed over as the
+    fan of their outline like the fixed triangles. Every action carries a force, so the region's
+    ``n`` triangles carried ``n`` times ``force``; the fan triangles split that total in proportion to
+    their area (``core.regions.cover_regions``). This keeps the total load if taichi applies the force
+    of an action once, spread over the nodes it finds, which has not been checked against taichi."""
+    triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    weights = np.ones(len(triangles))
+    if regions is not None:
+      triangles, weights = cover_regions(triangles, regions)
+    for (p0, p1, p2), weight in zip(triangles, weights):
+      self.add_customplane_load(force=tuple(weight * np.asarray(force, dtype=np.float64)), p0=p0, p1=p1, p2=p2, thresh=thresh)
+
   def add_plane_load(self, force, axis_to_search=None, axis=None, extreme=1, bound1=(-1, -1, -1), bound2=(1, 1, 1)):
     if axis_to_search is None:
       assert axis is not None
@@ -176,116 +291,169 @@ class TopoOpt(Simulation):
     kwargs = tc.visual.asset_manager.asset_ptr_to_id(kwargs)
     self.general_action(action='populate_grid', domain_type=domain_type, **kwargs)
 
+  def filter_domain(self):
+    self.general_action(action='voxel_connectivity_filtering')
+
   def override_parameter(self, key, val):
     self.general_action(action='override', key=key, val=val)
 
   def load_density_from_fem(self, fn):
     self.general_action(action='load_density_from_fem', fn=fn)
 
+  def load_initial_density(self, fn, res=None):
+    """Starts from the densities of a ``*.tcb.zip`` file written by taichi at the same resolution.
+    ``load_density_from_fem`` is only known to read taichi's own files, so densities written by a
+    native backend or at another resolution ``res`` end the run with an error rather than letting it
+    start from the uniform density; a coarse-to-fine continuation needs the native backend."""
+    if res is not None and res != self.res[0]:
+      sys.exit('{}: written at resolution {}, the taichi backend cannot upsample it to {}'.format(fn, res, self.res[0]))
+    try:
+      read_fem(fn)
+    except FEMFormatError:
+      pass
+    else:
+      sys.exit('{}: written by a native backend, the taichi backend cannot read it'.format(fn))
+    tc.info("Initial density from {}", fn)
+    self.load_density_from_fem(fn)
+
+  def save_final_density(self, fn):
+    """Copies the densities of the last iteration to ``fn``, e.g. for the next stage of a continuation."""
+    if self.last_iteration is not None:
+      shutil.copy(self.get_fem_file_name(self.last_iteration), fn)
+
   def get_block_counts(self):
     return self.general_action(action='get_block_counts')
 
+def legacy_parameters(argv):
+  """Parses the positional arguments passed by earlier versions of the add-on."""
+  parameters = {'max_iterations': int(argv[3]),
+                'res': int(argv[4]),
+                'volume_fraction': float(argv[5]),
+                'penalty': float(argv[6]),
+                'fix_cells_near_force': argv[7].lower() == 'true',
+                'fix_cells_at_dirichlet': argv[8].lower() == 'true',
+                'fixed_cell_density': float(argv[9]),
+                'wireframe': argv[12].lower() == 'wireframe',
+                'wireframe_grid_size': int(argv[13]),
+                'wireframe_thickness': int(argv[14]),
+                #ADVANCED PARAMS
+                'minimum_density': float(argv[15]),
+                'minimum_stiffness': float(argv[16]),
+                'fraction_to_keep': float(argv[17]),
+                'cg_tolerance': float(argv[18]),
+                'active_threshold': float(argv[19]),
+                'cg_max_iterations': int(argv[20]),
+                'boundary_smoothing_iters': int(argv[21]),
+                'smoothing_iters': int(argv[22]),
+                'objective_threshold': float(argv[23]),
+                'step_limit': float(argv[24]),
+                'exclude_fixed_cells': argv[25].lower() == 'true',
+                'fixed_epsilon': float(argv[26]),
+                'forced_epsilon': float(argv[27]),
+                'advanced': argv[28].lower() == 'true'}
+  material = {'youngs': float(argv[10]), 'poisson': float(argv[11])}
+  return material, parameters
+
+BACKENDS = {'taichi': TopoOpt, 'native': SIMPOptimizer, 'standin': StandinOptimizer}
+
+ADVANCED_PARAMETERS = ('minimum_density', 'minimum_stiffness', 'fraction_to_keep', 'cg_tolerance', 'active_threshold',
+                       'cg_max_iterations', 'boundary_smoothing_iters', 'smoothing_iters', 'objective_threshold',
+                       'step_limit', 'exclude_fixed_cells')
+
 if __name__ == "__main__":
 
   version = 1
 
-  workspace_path = sys.argv[1]
-  filename = sys.argv[2]
-  max_iter = int(sys.argv[3])
-  n = int(sys.argv[4])
-  volume_fraction = float(sys.argv[5])
-  penalty = float(sys.argv[6])
-  is_forced = sys.argv[7].lower() == 'true'
-  is_fixed = sys.argv[8].lower() == 'true'
-  nds_density = float(sys.argv[9])
+  if len(sys.argv) == 29 and not any(arg.startswith('-') for arg in sys.argv[1:]):
+    workspace_path, filename = sys.argv[1], sys.argv[2]
+    problem = load_problem(os.path.join(workspace_path, filename))
+    material, parameters = legacy_parameters(sys.argv)
+    args = argparse.Namespace(c=None, o=None, prepare=None, domain=None, initial_density=None, final_density=None, backend=None, job=None)
+  else:
+    parser = argparse.ArgumentParser(description='Topology Optimization.')
+    parser.add_argument('workspace_path', type=str)
+    parser.add_argument('filename', type=str)
+    parser.add_argument('problem', type=str, nargs='?', help='problem file, <workspace>/<filename>/problem.anton by default')
+    parser.add_argument('-c', type=str, help='state to continue from')
+    parser.add_argument('-o', type=str, action='append', help='key=value option to override when continuing')
+    parser.add_argument('--prepare', type=str, help='save the domain with its boundary conditions to this file and exit')
+    parser.add_argument('--domain', type=str, help='start from a domain saved with --prepare')
+    parser.add_argument('--initial-density', type=str, help='start from the densities of this fem file')
+    parser.add_argument('--initial-res', type=int, help='resolution of the run that wrote --initial-density, upsampled if coarser')
+    parser.add_argument('--final-density', type=str, help='copy the densities of the last iteration to this file')
+    parser.add_argument('--backend', type=str, choices=sorted(BACKENDS), help="solver, the problem's backend parameter by default")
+    parser.add_argument('--job', type=str, help='id of the scheduler job running this optimization, recorded in the manifest')
+    args = parser.parse_args()
+
+    workspace_path, filename = args.workspace_path, args.filename
+    problem = read_problem(args.problem) if args.problem else load_problem(os.path.join(workspace_path, filename))
+    material, parameters = problem.material, problem.parameters
 
-  youngs = float(sys.argv[10])
-  poisson = float(sys.argv[11])
+  backend = args.backend or parameters.get('backend') or ('taichi' if tc is not None else 'native')
+  if backend != 'taichi' and args.c is not None:
+    sys.exit('-c continues a taichi state and needs the taichi backend')
 
-  wireframe = sys.argv[12].lower() == 'wireframe'
   narrow_band = True
 
-  wgridsize = int(sys.argv[13])
-  wthickness = int(sys.argv[14])
-
-  #ADVANCED PARAMS
-  mindens = float(sys.argv[15])
-  minstiff = float(sys.argv[16])
-  frac2keep = float(sys.argv[17])
-  cgtolerance = float(sys.argv[18])
-  activthresh = float(sys.argv[19])
-  cgmaxiterations = int(sys.argv[20])
-  boundarysmoothingiters = int(sys.argv[21])
-  interiorsmoothingiters = int(sys.argv[22])
-  objthresh = float(sys.argv[23])
-  steplimit = float(sys.argv[24])
-  exfixed = sys.argv[25].lower() == 'true'
-  fixed_epsilon = float(sys.argv[26])
-  forced_epsilon = float(sys.argv[27])
-  advanced = sys.argv[28].lower() == 'true'
-
-  fixed_faces = np.load(os.path.join(workspace_path, filename, 'fixed.npy'), allow_pickle=True)
-  force_faces = np.load(os.path.join(workspace_path, filename, 'forces.npy'), allow_pickle=True)
-  force_vectors = np.load(os.path.join(workspace_path, filename, 'force_vectors.npy'), allow_pickle=True)
-
-  if advanced:
-    opt = TopoOpt(working_directory=workspace_path,
-                  filename=filename,
-                  res=(n, n, n),
-                  scale=0.1,
-                  version=version,
-                  wireframe=wireframe,
-                  volume_fraction=volume_fraction,
-                  penalty=penalty,
-                  use_youngs=True,
-                  E=youngs,
-                  nu=poisson,
-                  max_iterations=max_iter,
-                  wireframe_grid_size=wgridsize,
-                  wireframe_thickness=wthickness,
-                  grid_update_start=5 if narrow_band else 1000000,
-                  fix_cells_near_force=is_forced,
-                  fix_cells_at_dirichlet=is_fixed,
-                  fixed_cell_density=nds_density,
-                  minimum_density=mindens,
-                  minimum_stiffness=minstiff,
-                  fraction_to_keep=frac2keep,
-                  cg_tolerance=cgtolerance,
-                  active_threshold=activthresh,
-                  cg_max_iterations=cgmaxiterations,
-                  boundary_smoothing_iters=boundarysmoothingiters,
-                  smoothing_iters=interiorsmoothingiters,
-                  objective_threshold=objthresh,
-                  step_limit=steplimit,
-                  exclude_fixed_cells=exfixed)
+  n = parameters['res']
+  kwargs = dict(working_directory=workspace_path,
+                filename=filename,
+                res=(n, n, n),
+                scale=0.1,
+                version=version,
+                wireframe=parameters['wireframe'],
+                volume_fraction=parameters['volume_fraction'],
+                penalty=parameters['penalty'],
+                use_youngs=True,
+                E=material['youngs'],
+                nu=material['poisson'],
+                max_iterations=parameters['max_iterations'],
+                wireframe_grid_size=parameters['wireframe_grid_size'],
+                wireframe_thickness=parameters['wireframe_thickness'],
+                grid_update_start=5 if narrow_band else 1000000,
+                fix_cells_near_force=parameters['fix_cells_near_force'],
+                fix_cells_at_dirichlet=parameters['fix_cells_at_dirichlet'],
+                fixed_cell_density=parameters['fixed_cell_density'],
+                stop_tolerance=parameters.get('stop_tolerance', 0.0),
+                stop_patience=parameters.get('stop_patience', 1),
+                min_iterations=parameters.get('min_iterations', 10),
+                time_budget=parameters.get('time_budget', 0),
+                sweep=parameters.get('sweep'),
+                continuation=parameters.get('continuation'),
+                job=args.job,
+                backend=backend,
+                matrix_free=parameters.get('matrix_free', False),
+                preconditioner=parameters.get('preconditioner', 'jacobi'))
+
+  if parameters['advanced']:
+    kwargs.update((key, parameters[key]) for key in ADVANCED_PARAMETERS)
+
+  if args.c is not None:
+    kwargs.update(continue_from=args.c, overrides=dict(o.split('=', 1) for o in args.o or []))
+
+  opt = BACKENDS[backend](**kwargs)
+
+  if args.domain is not None:
+    opt.load_domain(args.domain, {key: kwargs[key] for key in SWEEP_OVERRIDES})
   else:
-    opt = TopoOpt(working_directory=workspace_path,
-                  filename=filename,
-                  res=(n, n, n),
-                  scale=0.1,
-                  version=version,
-                  wireframe=wireframe,
-                  volume_fraction=volume_fraction,
-                  penalty=penalty,
-                  use_youngs=True,
-                  E=youngs,
-                  nu=poisson,
-                  max_iterations=max_iter,
-                  wireframe_grid_size=wgridsize,
-                  wireframe_thickness=wthickness,
-                  grid_update_start=5 if narrow_band else 1000000,
-                  fix_cells_near_force=is_forced,
-                  fix_cells_at_dirichlet=is_fixed,
-                  fixed_cell_density=nds_density)
-
-  opt.import_mesh(filename=os.path.join(workspace_path, filename, filename + '.obj'), adaptive=False)
-  opt.general_action(action='voxel_connectivity_filtering')
-
-  for _face in fixed_faces:
-    opt.add_customplane_dirichlet_bc(axis_to_fix="xyz", p0=_face[0], p1=_face[1], p2=_face[2], thresh=fixed_epsilon)
-
-  for i, _force in enumerate(force_faces):
-    for _face in _force:
-      opt.add_customplane_load(force=force_vectors[i], p0=_face[0], p1=_face[1], p2=_face[2], thresh=forced_epsilon)
+    opt.import_mesh(filename=os.path.join(workspace_path, filename, filename + '.obj'), adaptive=False)
+    opt.filter_domain()
+
+    opt.add_customplane_dirichlet_bcs(axis_to_fix="xyz", triangles=problem.fixed, thresh=parameters['fixed_epsilon'],
+                                      regions=problem.fixed_regions)
+
+    for i in range(problem.number_of_forces):
+      opt.add_customplane_loads(force=tuple(problem.force_vectors[i]), triangles=problem.force(i), thresh=parameters['forced_epsilon'],
+                                regions=problem.force_region_offsets(i))
+
+    if args.prepare is not None:
+      opt.save_domain(args.prepare)
+      sys.exit(0)
+
+  if args.initial_density is not None:
+    opt.load_initial_density(args.initial_density, args.initial_res)
 
   opt.run()
+
+  if args.final_density is not None:
+    opt.save_final_density(args.final_density)
@@ -37,6 +37,10 @@ class Anton_PT_Panel(bpy.types.Panel):
 
         rowsub = layout.row(align=True)
         rowsub.prop(scene.anton, "res")
+        rowsub.prop(scene.anton, "backend", text='')
+        if scene.anton.backend == 'NATIVE':
+            rowsub.prop(scene.anton, "matrix_free")
+            rowsub.prop(scene.anton, "preconditioner", text='')
 
         row = layout.row(align=True)
         row.prop(scene.anton, "mode", icon='NONE', expand=True,
@@ -66,6 +70,16 @@ class Anton_PT_Panel(bpy.types.Panel):
 
         rowsub = layout.row(align=True)
         rowsub.prop(scene.anton, 'number_of_iterations')
+        rowsub.prop(scene.anton, 'early_stop')
+
+        if scene.anton.early_stop:
+            rowsub = layout.row(align=True)
+            rowsub.prop(scene.anton, 'stop_tolerance')
+            rowsub.prop(scene.anton, 'stop_patience')
+            rowsub.prop(scene.anton, 'min_iterations')
+
+        rowsub = layout.row(align=True)
+        rowsub.prop(scene.anton, 'time_budget')
 
         rowsub = layout.row(align=True)
         rowsub.alignment = 'CENTER'
@@ -90,17 +104,60 @@ class Anton_PT_Panel(bpy.types.Panel):
             rowsub.alignment = 'CENTER'
             rowsub.prop(scene.anton, "exclude_fixed_cells")
 
+        rowsub = layout.row(align=True)
+        rowsub.prop(scene.anton, 'continuation_schedule')
+
+        rowsub = layout.row(align=True)
+        rowsub.prop(scene.anton, 'max_jobs')
+        rowsub.prop(scene.anton, 'memory_budget')
         rowsub = layout.row(align=True)
         rowsub.operator('anton.process')
+        rowsub.operator('anton.monitor', icon='TIME')
+
+        rowsub = layout.row(align=True)
+        rowsub.prop(scene.anton, 'sweep_volumina_ratios')
+        rowsub.prop(scene.anton, 'sweep_penalty_exponents')
+        rowsub = layout.row(align=True)
+        rowsub.prop(scene.anton, 'sweep_resolutions')
+        rowsub.prop(scene.anton, 'sweep_materials')
+        rowsub = layout.row(align=True)
+        rowsub.operator('anton.sweep')
+
+        if scene.anton.running:
+            rowsub = layout.row(align=True)
+            rowsub.label(text='Iteration {}/{}'.format(scene.anton.progress_iteration, scene.anton.progress_max_iterations))
+            rowsub.label(text='Objective {:.4g}'.format(scene.anton.progress_objective))
+            rowsub.operator('anton.cancel', icon='CANCEL')
+            if scene.anton.progress_blocks:
+                rowsub = layout.row(align=True)
+                rowsub.label(text='Blocks {}'.format(scene.anton.progress_blocks))
+            if scene.anton.queued_jobs:
+                rowsub = layout.row(align=True)
+                rowsub.label(text='{} queued'.format(scene.anton.queued_jobs))
 
         row = layout.row()
         row.label(text=" ")
 
+        rowsub = layout.row(align=True)
+        rowsub.prop(scene.anton, "run")
         rowsub = layout.row(align=True)
         rowsub.prop(scene.anton, "density_out")
         rowsub.prop(scene.anton, 'viz_iteration')
         rowsub = layout.row(align=True)
+        rowsub.alignment = 'CENTER'
+        rowsub.prop(scene.anton, "scalar_field")
+        rowsub.prop(scene.anton, "export_stl")
+        if scene.anton.export_stl:
+            rowsub.prop(scene.anton, "binary_stl")
+        rowsub = layout.row(align=True)
+        rowsub.prop(scene.anton, "brick_size")
+        rowsub.prop(scene.anton, "voxel_cache_size")
+        rowsub = layout.row(align=True)
         rowsub.operator('anton.visualize')
+        rowsub = layout.row(align=True)
+        rowsub.prop(scene.anton, "batch_every")
+        rowsub.prop(scene.anton, "load_sequence")
+        rowsub.operator('anton.batchvisualize')
 
         row = layout.row()
         row.label(text=" ")
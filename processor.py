@@ -1,6 +1,70 @@
 import bpy
 import os
-import subprocess
+import re
+from .core.problem import update_parameters
+from .core.manifest import RunManifest
+from .core.scheduler import Scheduler, RUNNING, QUEUED, DONE, CANCELLED
+from .core.sweep import submit_sweep, write_comparison
+from .core.continuation import submit_continuation
+
+_iteration_pattern = re.compile(r'Iteration (\d+) finished')
+_objective_pattern = re.compile(r'objective = *([-+0-9.eE]+|nan|inf)')
+
+_schedulers = {}
+_progress = {}
+_monitoring = False
+
+def scheduler(scene):
+    """Returns the scheduler of the scene's workspace with the limits set in the panel. Schedulers are kept
+    for the session so that they can collect the exit status of the workers they started."""
+    workspace_path = scene.anton.workspace_path
+    if workspace_path not in _schedulers:
+        _schedulers[workspace_path] = Scheduler(workspace_path)
+
+    _scheduler = _schedulers[workspace_path]
+    _scheduler.max_jobs = scene.anton.max_jobs
+    _scheduler.memory_budget = scene.anton.memory_budget * 2**20
+    return _scheduler
+
+def _read_lines(progress, name):
+    """Reads the lines appended to file ``name`` of the run directory since the last call, leaving a
+    line that is still being written for the next call."""
+    try:
+        with open(os.path.join(progress['directory'], name), 'rb') as f:
+            f.seek(progress['offsets'].get(name, 0))
+            data = f.read()
+    except OSError:
+        return []
+
+    data = data[:data.rfind(b'\n') + 1]
+    progress['offsets'][name] = progress['offsets'].get(name, 0) + len(data)
+    return data.decode(errors='replace').splitlines()
+
+def poll_progress(workspace_path, job):
+    """Reads what the running optimizer appended to its ``log.txt`` and ``blocks.log`` since the last call.
+
+    :return: Last finished iteration, its objective and the last block counts, ``None`` where nothing new was logged
+    :rtype: ``tuple``
+    """
+    progress = _progress.setdefault(job['id'], {'directory': None, 'offsets': {}})
+    if progress['directory'] is None:
+        run = RunManifest.of_problem(workspace_path, job['filename']).of_job(job['id'])
+        if run is None:
+            return None, None, None
+        progress['directory'] = run['directory']
+
+    iteration = objective = blocks = None
+    text = '\n'.join(_read_lines(progress, 'log.txt'))
+    for match in _iteration_pattern.finditer(text):
+        iteration = int(match.group(1)) + 1
+    for match in _objective_pattern.finditer(text):
+        objective = float(match.group(1))
+
+    lines = _read_lines(progress, 'blocks.log')
+    if lines:
+        blocks = lines[-1]
+
+    return iteration, objective, blocks
 
 class Anton_OT_Processor(bpy.types.Operator):
     bl_idname = 'anton.process'
@@ -173,41 +237,229 @@ class Anton_OT_Processor(bpy.types.Operator):
 
         scene = context.scene
         if scene.anton.defined:
-            subprocess.call(["python3", os.path.join(os.path.dirname(os.path.realpath(__file__)), "optimizer.py"),
-                                scene.anton.workspace_path,
-                                scene.anton.filename,
-                                "{}".format(scene.anton.number_of_iterations),
-                                "{}".format(scene.anton.res),
-                                "{}".format(scene.anton.volumina_ratio),
-                                "{}".format(scene.anton.penalty_exponent),
-                                "{}".format(scene.anton.include_forced),
-                                "{}".format(scene.anton.include_fixed),
-                                "{}".format(scene.anton.nds_density),
-                                "{}".format(self.material_library[scene.anton.material]['YOUNGS']),
-                                "{}".format(self.material_library[scene.anton.material]['POISSON']),
-                                "{}".format(scene.anton.mode),
-                                "{}".format(scene.anton.wireframe_gridsize),
-                                "{}".format(scene.anton.wireframe_thickness),
-                                "{}".format(scene.anton.minimum_density),
-                                "{}".format(scene.anton.minimum_stiffness),
-                                "{}".format(scene.anton.fraction_to_keep),
-                                "{}".format(scene.anton.cg_tolerance),
-                                "{}".format(scene.anton.active_threshold),
-                                "{}".format(scene.anton.cg_max_iterations),
-                                "{}".format(scene.anton.boundary_smoothing_iters),
-                                "{}".format(scene.anton.smoothing_iters),
-                                "{}".format(scene.anton.objective_threshold),
-                                "{}".format(scene.anton.step_limit),
-                                "{}".format(scene.anton.exclude_fixed_cells),
-                                "{}".format(scene.anton.fixed_threshold),
-                                "{}".format(scene.anton.forced_threshold),
-                                "{}".format(scene.anton.advanced_params)])
-
-            scene.anton.optimized = True
-            self.report({'INFO'}, 'Exported results to {}'.format(os.path.join(scene.anton.workspace_path, scene.anton.filename)))
+            update_parameters(os.path.join(scene.anton.workspace_path, scene.anton.filename),
+                                material={'name': scene.anton.material,
+                                            'youngs': self.material_library[scene.anton.material]['YOUNGS'],
+                                            'poisson': self.material_library[scene.anton.material]['POISSON']},
+                                parameters=self.solver_parameters(scene))
+
+            try:
+                schedule = [int(value) for value in scene.anton.continuation_schedule.split(',') if value.strip()]
+            except ValueError as error:
+                self.report({'ERROR'}, 'Invalid continuation schedule: {}'.format(error))
+                return {'CANCELLED'}
+
+            if len(schedule) > 1:
+                _, jobs = submit_continuation(scheduler(scene), scene.anton.filename, schedule)
+                job = jobs[-1]
+            else:
+                job = scheduler(scene).submit(scene.anton.filename)
+
+            if _monitoring:
+                self.report({'INFO'}, 'Queued optimization {}'.format(job['id']))
+            else:
+                bpy.ops.anton.monitor()
+                self.report({'INFO'}, 'Submitted optimization {}'.format(job['id']))
             return {'FINISHED'}
 
         else:
             scene.anton.optimized = False
             self.report({'ERROR'}, 'Problem ill-posed')
             return {'CANCELLED'}
+
+    @staticmethod
+    def solver_parameters(scene):
+        """Collects the solver parameters set in the panel under the names ``optimizer.py`` reads from the problem file.
+
+        :rtype: ``dict``
+        """
+        return {'max_iterations': scene.anton.number_of_iterations,
+                'stop_tolerance': scene.anton.stop_tolerance if scene.anton.early_stop else 0.0,
+                'stop_patience': scene.anton.stop_patience,
+                'min_iterations': scene.anton.min_iterations,
+                'time_budget': scene.anton.time_budget * 60,
+                'res': scene.anton.res,
+                'volume_fraction': scene.anton.volumina_ratio,
+                'penalty': scene.anton.penalty_exponent,
+                'fix_cells_near_force': scene.anton.include_forced,
+                'fix_cells_at_dirichlet': scene.anton.include_fixed,
+                'fixed_cell_density': scene.anton.nds_density,
+                'wireframe': scene.anton.mode == 'WIREFRAME',
+                'wireframe_grid_size': scene.anton.wireframe_gridsize,
+                'wireframe_thickness': scene.anton.wireframe_thickness,
+                'minimum_density': scene.anton.minimum_density,
+                'minimum_stiffness': scene.anton.minimum_stiffness,
+                'fraction_to_keep': scene.anton.fraction_to_keep,
+                'cg_tolerance': scene.anton.cg_tolerance,
+                'active_threshold': scene.anton.active_threshold,
+                'cg_max_iterations': scene.anton.cg_max_iterations,
+                'boundary_smoothing_iters': scene.anton.boundary_smoothing_iters,
+                'smoothing_iters': scene.anton.smoothing_iters,
+                'objective_threshold': scene.anton.objective_threshold,
+                'step_limit': scene.anton.step_limit,
+                'exclude_fixed_cells': scene.anton.exclude_fixed_cells,
+                'fixed_epsilon': scene.anton.fixed_threshold,
+                'forced_epsilon': scene.anton.forced_threshold,
+                'advanced': scene.anton.advanced_params,
+                'backend': scene.anton.backend.lower(),
+                'matrix_free': scene.anton.matrix_free,
+                'preconditioner': scene.anton.preconditioner.lower()}
+
+class Anton_OT_Sweep(bpy.types.Operator):
+    bl_idname = 'anton.sweep'
+    bl_label = 'Sweep'
+    bl_description = 'Optimize every combination of the sweep parameters, voxelizing once per resolution'
+
+    def execute(self, context):
+        """Queues a parameter sweep over the comma separated ``sweep_*`` values with the other settings of
+        **Generate**. The comparison table is written to the sweep directory as its runs finish.
+
+        :return: ``FINISHED`` if successful, ``CANCELLED`` otherwise
+
+        \\
+        """
+        scene = context.scene
+        if not scene.anton.defined:
+            self.report({'ERROR'}, 'Problem ill-posed')
+            return {'CANCELLED'}
+
+        try:
+            grid = {'volume_fraction': [float(value) for value in scene.anton.sweep_volumina_ratios.split(',') if value.strip()],
+                    'penalty': [float(value) for value in scene.anton.sweep_penalty_exponents.split(',') if value.strip()],
+                    'res': [int(value) for value in scene.anton.sweep_resolutions.split(',') if value.strip()],
+                    'material': [{'name': name.strip(),
+                                    'youngs': Anton_OT_Processor.material_library[name.strip()]['YOUNGS'],
+                                    'poisson': Anton_OT_Processor.material_library[name.strip()]['POISSON']}
+                                    for name in scene.anton.sweep_materials.split(',') if name.strip()]}
+        except (ValueError, KeyError) as error:
+            self.report({'ERROR'}, 'Invalid sweep value: {}'.format(error))
+            return {'CANCELLED'}
+
+        update_parameters(os.path.join(scene.anton.workspace_path, scene.anton.filename),
+                            material={'name': scene.anton.material,
+                                        'youngs': Anton_OT_Processor.material_library[scene.anton.material]['YOUNGS'],
+                                        'poisson': Anton_OT_Processor.material_library[scene.anton.material]['POISSON']},
+                            parameters=Anton_OT_Processor.solver_parameters(scene))
+
+        sweep_id = submit_sweep(scheduler(scene), scene.anton.filename, grid)
+        if not _monitoring:
+            bpy.ops.anton.monitor()
+
+        self.report({'INFO'}, 'Queued sweep {}'.format(sweep_id))
+        return {'FINISHED'}
+
+class Anton_OT_Monitor(bpy.types.Operator):
+    bl_idname = 'anton.monitor'
+    bl_label = 'Monitor'
+    bl_description = 'Runs queued optimizations of the workspace in the background and shows their progress'
+
+    _timer = None
+    _watched = None
+
+    def execute(self, context):
+        """Watches the job queue of the workspace from a timer until no job is queued or running.
+
+        :return: ``RUNNING_MODAL`` if there are jobs to watch, ``CANCELLED`` otherwise
+
+        \\
+        """
+        global _monitoring
+        if _monitoring:
+            return {'CANCELLED'}
+
+        self._watched = {}
+        if not self.tick(context):
+            return {'CANCELLED'}
+
+        _monitoring = True
+        self._timer = context.window_manager.event_timer_add(0.5, window=context.window)
+        context.window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        global _monitoring
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        if not self.tick(context):
+            _monitoring = False
+            context.window_manager.event_timer_remove(self._timer)
+            return {'FINISHED'}
+
+        return {'PASS_THROUGH'}
+
+    def tick(self, context):
+        """Starts queued jobs as far as ``max_jobs`` and ``memory_budget`` allow and streams the iteration,
+        objective and block counts of the scene's running job into the panel. Jobs that ended are reported
+        with their exit status, and the results are marked optimized only if a job of the scene succeeded.
+
+        :return: ``True`` while jobs are queued or running
+        :rtype: ``bool``
+        """
+        scene = context.scene
+        _scheduler = scheduler(scene)
+        running = _scheduler.schedule()
+        jobs = {job['id']: job for job in _scheduler.jobs()}
+
+        for job in running:
+            self._watched.setdefault(job['id'], job)
+
+        for job_id in [job_id for job_id in self._watched if jobs.get(job_id, {}).get('state') != RUNNING]:
+            del self._watched[job_id]
+            _progress.pop(job_id, None)
+            job = jobs.get(job_id)
+            if job is None:
+                continue
+
+            if job['state'] == DONE:
+                if job['filename'] == scene.anton.filename:
+                    scene.anton.optimized = True
+                if job.get('sweep') is not None:
+                    write_comparison(scene.anton.workspace_path, job['filename'], job['sweep'])
+                self.report({'INFO'}, 'Exported results to {}'.format(os.path.join(scene.anton.workspace_path, job['filename'])))
+            elif job['state'] == CANCELLED:
+                self.report({'WARNING'}, 'Optimization {} cancelled'.format(job_id))
+            else:
+                self.report({'ERROR'}, 'Optimization {} failed with status {}'.format(job_id, job.get('returncode')))
+
+        current = next((job for job in running if job['filename'] == scene.anton.filename), running[0] if running else None)
+        scene.anton.running = current is not None
+        scene.anton.queued_jobs = sum(job['state'] == QUEUED for job in jobs.values())
+
+        if current is not None:
+            if scene.anton.progress_job != current['id']:
+                scene.anton.progress_job = current['id']
+                scene.anton.progress_iteration = 0
+                scene.anton.progress_objective = 0.0
+                scene.anton.progress_blocks = ''
+                scene.anton.progress_max_iterations = current.get('max_iterations') or 0
+
+            iteration, objective, blocks = poll_progress(scene.anton.workspace_path, current)
+            if iteration is not None:
+                scene.anton.progress_iteration = iteration
+            if objective is not None:
+                scene.anton.progress_objective = objective
+            if blocks is not None:
+                scene.anton.progress_blocks = blocks
+
+        for area in context.screen.areas if context.screen else []:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+        return current is not None or scene.anton.queued_jobs > 0
+
+class Anton_OT_Cancel(bpy.types.Operator):
+    bl_idname = 'anton.cancel'
+    bl_label = 'Cancel'
+    bl_description = 'Stops the optimization shown in the panel, queued optimizations start afterwards'
+
+    def execute(self, context):
+        """Cancels the job whose progress is shown; ``Anton_OT_Monitor`` picks up its end on the next tick.
+
+        :return: ``FINISHED`` if the job was queued or running, ``CANCELLED`` otherwise
+        """
+        if not scheduler(context.scene).cancel(context.scene.anton.progress_job):
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
@@ -1,5 +1,22 @@
 import bpy
 from bpy.props import StringProperty, IntProperty, FloatProperty, EnumProperty, BoolProperty
+from datetime import datetime
+from .core.manifest import RunManifest
+
+# Blender does not keep the strings of dynamic enum items alive, hence the module-level list
+_run_items = []
+
+def run_items(self, context):
+    """Lists the runs of the active problem from its manifest, newest first."""
+    _run_items.clear()
+    _run_items.append(('LATEST', 'Latest', 'Most recent run'))
+
+    for run in reversed(RunManifest.of_problem(self.workspace_path, self.filename).results()):
+        _run_items.append((run['task_id'],
+                            '{} ({} it.)'.format(run['task_id'], run.get('iterations', '...')),
+                            '{} started {}'.format(run['suffix'], datetime.fromtimestamp(run['start_time']).strftime('%Y-%m-%d %H:%M'))))
+
+    return _run_items
 
 class ForcePropertyGroup(bpy.types.PropertyGroup):
         """
@@ -60,6 +77,12 @@ class AntonPropertyGroup(bpy.types.PropertyGroup):
         :vartype metaballrad: ``float``
         :ivar metaballsens: Sensitivity of metaballs (``0.7``)
         :vartype metaballsens: ``float``
+        :ivar backend: Solver of the optimization, taichi's narrow-band solver or the numpy/scipy SIMP solver (``TAICHI``)
+        :vartype backend: ``str``
+        :ivar matrix_free: Solve the native solver's displacements without assembling the stiffness matrix (``False``)
+        :vartype matrix_free: ``bool``
+        :ivar preconditioner: Preconditioner of the native solver's CG solve, Jacobi or a geometric multigrid V-cycle (``JACOBI``)
+        :vartype preconditioner: ``str``
         :ivar volumina_ratio: Ratio between the design space and solution space (``0.4``)
         :vartype volumina_ratio: ``float``
         :ivar penalty_exponent: Penalization factor for densities (``3.0``)
@@ -67,8 +90,62 @@ class AntonPropertyGroup(bpy.types.PropertyGroup):
 
         :ivar number_of_iterations: Number of optimization iterations (``30``)
         :vartype number_of_iterations: ``int``
+        :ivar sweep_volumina_ratios: Volume fractions of a parameter sweep, comma separated
+        :vartype sweep_volumina_ratios: ``str``
+        :ivar sweep_penalty_exponents: Penalty exponents of a parameter sweep, comma separated
+        :vartype sweep_penalty_exponents: ``str``
+        :ivar sweep_resolutions: Resolutions of a parameter sweep, comma separated
+        :vartype sweep_resolutions: ``str``
+        :ivar sweep_materials: Materials of a parameter sweep, comma separated
+        :vartype sweep_materials: ``str``
+        :ivar continuation_schedule: Resolutions to optimize on in turn, coarsest first, comma separated
+        :vartype continuation_schedule: ``str``
+        :ivar early_stop: Stop the optimization once the objective converged? (``False``)
+        :vartype early_stop: ``bool``
+        :ivar stop_tolerance: Relative change of the objective over four iterations below which it counts as converged (``0.005``)
+        :vartype stop_tolerance: ``float``
+        :ivar stop_patience: Number of consecutive converged iterations before stopping (``1``)
+        :vartype stop_patience: ``int``
+        :ivar min_iterations: Number of iterations before the optimization may stop early (``10``)
+        :vartype min_iterations: ``int``
+        :ivar time_budget: Wall-clock budget of the optimization in minutes, unlimited if ``0`` (``0.0``)
+        :vartype time_budget: ``float``
+        :ivar running: Is an optimization running in the background?
+        :vartype running: ``bool``
+        :ivar queued_jobs: Number of optimizations waiting in the workspace queue
+        :vartype queued_jobs: ``int``
+        :ivar max_jobs: Number of optimizations run at once (``1``)
+        :vartype max_jobs: ``int``
+        :ivar memory_budget: Memory available to optimizations in MB, unlimited if ``0`` (``0``)
+        :vartype memory_budget: ``int``
+        :ivar progress_job: Job whose progress is shown
+        :vartype progress_job: ``str``
+        :ivar progress_iteration: Last finished iteration of the running optimization
+        :vartype progress_iteration: ``int``
+        :ivar progress_max_iterations: Number of iterations of the running optimization
+        :vartype progress_max_iterations: ``int``
+        :ivar progress_objective: Last objective of the running optimization
+        :vartype progress_objective: ``float``
+        :ivar progress_blocks: Last block counts of the running optimization
+        :vartype progress_blocks: ``str``
         :ivar viz_iteration: Which iteration to visualize? (``30``)
         :vartype viz_iteration: ``int``
+        :ivar scalar_field: Surface the density field instead of the voxel occupancy? (``False``)
+        :vartype scalar_field: ``bool``
+        :ivar brick_size: Edge length of the bricks surfaced in parallel (``128``)
+        :vartype brick_size: ``int``
+        :ivar voxel_cache_size: Disk budget of the per-run voxel cache in MB (``2048``)
+        :vartype voxel_cache_size: ``int``
+        :ivar run: Run to visualize, the latest one by default
+        :vartype run: ``enum``
+        :ivar batch_every: Export every n-th iteration with **Render All** (``1``)
+        :vartype batch_every: ``int``
+        :ivar load_sequence: Load exported iterations as a frame-keyed sequence? (``True``)
+        :vartype load_sequence: ``bool``
+        :ivar export_stl: Also write the generated mesh as STL? (``False``)
+        :vartype export_stl: ``bool``
+        :ivar binary_stl: Write generated meshes as binary STL? (``True``)
+        :vartype binary_stl: ``bool``
         :ivar keyframes: Total number of keyframes (``30``)
         :vartype keyframes: ``int``
         :ivar slices: Number of instantiation points (``3``)
@@ -82,6 +159,13 @@ class AntonPropertyGroup(bpy.types.PropertyGroup):
 
         initialized : BoolProperty(default=False)
         optimized : BoolProperty(default=False)
+        running : BoolProperty(default=False)
+        queued_jobs : IntProperty(default=0)
+        progress_job : StringProperty()
+        progress_iteration : IntProperty(default=0)
+        progress_max_iterations : IntProperty(default=0)
+        progress_objective : FloatProperty(default=0.0)
+        progress_blocks : StringProperty()
         force_directioned : BoolProperty(default=False)
         defined : BoolProperty(default=False)
 
@@ -128,6 +212,27 @@ class AntonPropertyGroup(bpy.types.PropertyGroup):
                 default='NARROW'
         )
 
+        backend : EnumProperty(
+                name='Solver',
+                items=[
+                        ('TAICHI', 'Taichi', "Narrow-band topology optimization with taichi's spgrid_topo_opt"),
+                        ('NATIVE', 'Native', 'Voxel SIMP topology optimization with numpy and scipy')],
+                default='TAICHI'
+        )
+
+        matrix_free : BoolProperty(
+                name='Matrix-free',
+                default=False,
+                description='Solve the native displacements element by element without assembling the stiffness matrix, for large resolutions')
+
+        preconditioner : EnumProperty(
+                name='Preconditioner',
+                items=[
+                        ('JACOBI', 'Jacobi', 'Precondition the native CG solve with the inverse diagonal'),
+                        ('MULTIGRID', 'Multigrid', 'Precondition the native CG solve with a geometric multigrid V-cycle, for high resolutions and contrasts')],
+                default='JACOBI'
+        )
+
         nds_density : FloatProperty(
                 name="",
                 default=0.1,
@@ -188,6 +293,74 @@ class AntonPropertyGroup(bpy.types.PropertyGroup):
                 min=1,
                 description="Number of optimization iterations")
 
+        sweep_volumina_ratios : StringProperty(
+                name="Volume",
+                default="",
+                description="Volume fractions to sweep, comma separated, the current one if empty")
+
+        sweep_penalty_exponents : StringProperty(
+                name="Penalty",
+                default="",
+                description="Penalty exponents to sweep, comma separated, the current one if empty")
+
+        sweep_resolutions : StringProperty(
+                name="Resolution",
+                default="",
+                description="Resolutions to sweep, comma separated, the current one if empty")
+
+        sweep_materials : StringProperty(
+                name="Materials",
+                default="",
+                description="Materials to sweep, comma separated, the current one if empty")
+
+        continuation_schedule : StringProperty(
+                name="Schedule",
+                default="",
+                description="Resolutions to optimize on in turn, coarsest first, comma separated, e.g. 64,128,256. Single resolution if empty")
+
+        max_jobs : IntProperty(
+                name="Jobs",
+                default=1,
+                min=1,
+                description="Number of optimizations run at once")
+
+        memory_budget : IntProperty(
+                name="Memory (MB)",
+                default=0,
+                min=0,
+                description="Memory available to optimizations, unlimited if 0")
+
+        early_stop : BoolProperty(
+                name='Early Stop',
+                default=False,
+                description='Stop the optimization once the objective converged')
+
+        stop_tolerance : FloatProperty(
+                name="",
+                default=0.005,
+                min=0.0,
+                max=1.0,
+                precision=4,
+                description="Relative change of the objective below which it counts as converged")
+
+        stop_patience : IntProperty(
+                name="",
+                default=1,
+                min=1,
+                description="Number of consecutive converged iterations before stopping")
+
+        min_iterations : IntProperty(
+                name="",
+                default=10,
+                min=0,
+                description="Number of iterations before the optimization may stop early")
+
+        time_budget : FloatProperty(
+                name="",
+                default=0.0,
+                min=0.0,
+                description="Wall-clock budget of the optimization in minutes, unlimited if 0")
+
         viz_iteration : IntProperty(
                 name="",
                 default=30,
@@ -202,6 +375,49 @@ class AntonPropertyGroup(bpy.types.PropertyGroup):
                 precision=2,
                 description="Ratio between the design space and solution space")
 
+        scalar_field : BoolProperty(
+                name='Smooth',
+                default=False,
+                description='Surface the density field at the density threshold instead of the voxel occupancy')
+
+        brick_size : IntProperty(
+                name="Brick",
+                default=128,
+                min=0,
+                description="Edge length of the bricks surfaced in parallel, 0 surfaces the whole grid at once")
+
+        voxel_cache_size : IntProperty(
+                name="Cache (MB)",
+                default=2048,
+                min=0,
+                description="Disk budget of the per-run voxel cache")
+
+        run : EnumProperty(
+                name='Run',
+                items=run_items,
+                description="Run to visualize")
+
+        batch_every : IntProperty(
+                name="Every",
+                default=1,
+                min=1,
+                description="Export every n-th iteration with Render All")
+
+        load_sequence : BoolProperty(
+                name='Sequence',
+                default=True,
+                description='Load the exported iterations as a frame-keyed sequence')
+
+        export_stl : BoolProperty(
+                name='Export STL',
+                default=False,
+                description='Also write the generated mesh to an STL file in the workspace')
+
+        binary_stl : BoolProperty(
+                name='Binary STL',
+                default=True,
+                description='Write generated meshes as binary STL files')
+
 
         #ADVANCED PARAMS
         minimum_density : FloatProperty(
@@ -2,6 +2,64 @@ import bpy
 import numpy as np
 import os
 import glob
+from .core.mesher import march, object_space, read_stl, write_stl
+from .core.cache import VoxelCache
+from .core.tcb import load_voxels
+from .core.batch import export_iterations
+from .core.manifest import RunManifest
+
+def mesh_from_arrays(name, vertices, faces, smooth=False):
+    """Builds a mesh object with shared vertices straight from ``vertices``/``faces`` arrays with bulk
+    ``foreach_set`` calls, links it to the active collection and makes it the active object.
+
+    :return: The created object
+    :rtype: *bpy.types.Object*
+    """
+    number_of_faces = len(faces)
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(vertices))
+    mesh.vertices.foreach_set('co', np.asarray(vertices, dtype=np.float32).ravel())
+    mesh.loops.add(3 * number_of_faces)
+    mesh.loops.foreach_set('vertex_index', np.asarray(faces, dtype=np.int32).ravel())
+    mesh.polygons.add(number_of_faces)
+    mesh.polygons.foreach_set('loop_start', np.arange(0, 3 * number_of_faces, 3, dtype=np.int32))
+    mesh.polygons.foreach_set('loop_total', np.full(number_of_faces, 3, dtype=np.int32))
+    mesh.polygons.foreach_set('use_smooth', np.full(number_of_faces, smooth, dtype=bool))
+    mesh.update(calc_edges=True)
+    mesh.validate()
+
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.collection.objects.link(obj)
+    bpy.ops.object.select_all(action='DESELECT')
+    obj.select_set(True)
+    bpy.context.view_layer.objects.active = obj
+
+    return obj
+
+def selected_run(scene):
+    """Returns the directory of the run picked in the panel, the latest run by default. Runs are looked
+    up in the problem's manifest; for the latest run of a problem optimized before the manifest
+    existed, the most recently modified run directory is used.
+
+    :raises LookupError: The picked run is not in the manifest, or the problem has no run
+    """
+    manifest = RunManifest.of_problem(scene.anton.workspace_path, scene.anton.filename)
+
+    if scene.anton.run != 'LATEST':
+        run = manifest.get(scene.anton.run)
+        if run is None:
+            raise LookupError('Run {} is not in the manifest of {}.'.format(scene.anton.run, scene.anton.filename))
+        return run['directory']
+
+    run = manifest.latest()
+    if run is not None:
+        return run['directory']
+
+    directories = glob.glob(os.path.join(scene.anton.workspace_path, scene.anton.filename, 'output', '*/'))
+    if not directories:
+        raise LookupError('{} has no optimization results.'.format(scene.anton.filename))
+    return max(directories, key=os.path.getmtime)
 
 class Anton_OT_Visualizer(bpy.types.Operator):
     bl_idname = 'anton.visualize'
@@ -26,98 +84,124 @@ class Anton_OT_Visualizer(bpy.types.Operator):
         scene = context.scene
 
         if scene.anton.optimized:
-            last_modified = max(glob.glob(os.path.join(scene.anton.workspace_path, scene.anton.filename, 'output', '*/')), key=os.path.getmtime)
+            try:
+                last_modified = selected_run(scene)
+            except LookupError as error:
+                self.report({'ERROR'}, str(error))
+                return {'CANCELLED'}
+
             viz_file = os.path.join(last_modified, 'fem', "{:05d}.tcb.zip".format(scene.anton.viz_iteration - 1))
             density_file = os.path.join(scene.anton.workspace_path, scene.anton.filename, '{:05d}.densities.txt'.format(scene.anton.viz_iteration - 1))
             stl_file = os.path.join(scene.anton.workspace_path, scene.anton.filename, '{}_{:05d}.stl'.format(scene.anton.filename, scene.anton.viz_iteration))
 
-            os.system("ti run convert_fem_solve {} {}".format(viz_file, density_file))
+            if not os.path.isfile(viz_file):
+                self.report({'ERROR'}, 'Iteration {} has not been generated.'.format(scene.anton.viz_iteration))
+                return {'CANCELLED'}
+
+            cache = VoxelCache(os.path.join(last_modified, 'voxels'), budget=scene.anton.voxel_cache_size * 2**20)
+            voxels = cache.get(scene.anton.viz_iteration - 1, viz_file)
+
+            if voxels is None:
+                voxels = load_voxels(viz_file, density_file)
+                if voxels is None:
+                    return {'CANCELLED'}
+
+                voxels = cache.put(scene.anton.viz_iteration - 1, viz_file, *voxels)
 
-            if os.path.isfile(density_file):
-                self.marchthecubes(inp_path=density_file, output_path=stl_file, resolution=scene.anton.res, density_thresh=scene.anton.density_out)
+            vertices, faces, _ = self.marchthecubes(*voxels, output_path=stl_file if scene.anton.export_stl else None,
+                                                    resolution=scene.anton.res, density_thresh=scene.anton.density_out,
+                                                    binary=scene.anton.binary_stl, scalar_field=scene.anton.scalar_field,
+                                                    brick_size=scene.anton.brick_size)
 
-                bpy.ops.import_mesh.stl(filepath=stl_file, global_scale=1)
+            mesh_from_arrays('{}_{:05d}'.format(scene.anton.filename, scene.anton.viz_iteration), vertices, faces,
+                                smooth=scene.anton.scalar_field)
+            if not scene.anton.scalar_field:
                 bpy.ops.object.modifier_add(type='CORRECTIVE_SMOOTH')
                 bpy.context.object.modifiers["CorrectiveSmooth"].factor = 1
                 bpy.context.object.modifiers["CorrectiveSmooth"].iterations = 1
                 bpy.context.object.modifiers["CorrectiveSmooth"].scale = 0
 
-                self.report({'INFO'}, 'Imported iteration: {}'.format(scene.anton.viz_iteration))
-                return {'FINISHED'}
-            else:
-                return {'CANCELLED'}
+            self.report({'INFO'}, 'Imported iteration: {}'.format(scene.anton.viz_iteration))
+            return {'FINISHED'}
         else:
             self.report({'ERROR'}, 'Generate results before visualization!')
             return {'CANCELLED'}
 
     @staticmethod
-    def marchthecubes(inp_path, output_path, resolution=100, density_thresh=0.1):
-        from skimage import measure
-        import re
+    def marchthecubes(coords, densities, output_path=None, resolution=100, density_thresh=0.1, binary=True, scalar_field=False, brick_size=0):
+        """Surfaces the voxels ``coords`` with their ``densities`` and scales the mesh back to object space.
+        The mesh is written to ``output_path`` as STL if one is given.
 
-        section_pattern = re.compile(r'base_coordinates: \[(?P<X>[.eE\+\-\d]*), (?P<Y>[.eE\+\-\d]*), (?P<Z>[.eE\+\-\d]*)\]')
-        coord_pattern = re.compile(r'\[(?P<X>[.eE\+\-\d]*),(?P<Y>[.eE\+\-\d]*),(?P<Z>[.eE\+\-\d]*)\]:\s(?P<DENSITY>[.eE\+\-\d]*)')
+        :return: Vertices, faces and vertex normals
+        :rtype: ``tuple`` of *numpy.array*
 
-        verts = []
-        densities = []
+        \\
+        """
+        vertices, faces, normals = march(coords, densities, density_thresh=density_thresh, scalar_field=scalar_field,
+                                            brick_size=brick_size)
+        vertices = object_space(vertices, resolution)
 
-        with open(inp_path, 'r') as f:
-            base_coord = np.array([0, 0, 0], dtype=np.int)
-            line = f.readline()
+        if output_path is not None:
+            write_stl(output_path, vertices, faces, normals, binary=binary)
 
-            while(line):
-                section_match = section_pattern.search(line)
-                coord_match = coord_pattern.search(line)
-                if section_match:
-                    base_coord = np.array(list(map(int, [section_match.group('X'), section_match.group('Y'), section_match.group('Z')]))) - 8
+        return vertices, faces, normals
 
-                if coord_match:
-                    _coord = base_coord + np.array(list(map(int, [coord_match.group('X'), coord_match.group('Y'), coord_match.group('Z')])))
-                    if float(coord_match.group('DENSITY')) >= density_thresh:
-                        verts.append(_coord)
-                        densities.append(float(coord_match.group('DENSITY')))
+class Anton_OT_BatchVisualizer(bpy.types.Operator):
+    bl_idname = 'anton.batchvisualize'
+    bl_label = 'Render All'
+    bl_description = 'Exports every n-th iteration of the selected run and loads them as a frame sequence'
 
-                line = f.readline()
+    def execute(self, context):
+        """Converts and surfaces every ``batch_every``-th iteration of the selected run in parallel worker
+        processes with the ``res``, ``density_out`` and ``scalar_field`` settings of **Render**, writing one
+        STL per iteration. With ``load_sequence`` the meshes are loaded and keyed so that each one is
+        only visible from the frame of its iteration until the next exported iteration.
 
-        pts = np.array(verts, dtype=np.int)
-        lower_bound = np.floor(np.min(pts, axis=0)) - 2
-        upper_bound = np.ceil(np.max(pts, axis=0)) + 2
+        :return: ``FINISHED`` if successful, ``CANCELLED`` otherwise
 
-        grid, _, _ = np.mgrid[lower_bound[0]:upper_bound[0]:1,
-                                lower_bound[1]:upper_bound[1]:1,
-                                lower_bound[2]:upper_bound[2]:1]
+        \\
+        """
+        scene = context.scene
 
-        data_indices = np.array(np.ceil((pts - lower_bound)/1), dtype=np.int)
-        data = 0.0 * grid
-        # mask??
+        if not scene.anton.optimized:
+            self.report({'ERROR'}, 'Generate results before visualization!')
+            return {'CANCELLED'}
 
-        for _index in data_indices:
-            try:
-                data[_index[0]][_index[1]][_index[2]] = 1
-            except:
-                pass
-            
-        vertices, faces, normals, _ = measure.marching_cubes(data)
-        vertices = vertices + lower_bound + 0.5
-        vertices = 10 * vertices/resolution - 5
-
-        with open(output_path, 'w') as f:
-            f.write('GENERATED BY ANTON\n')
-            for i, tri in enumerate(faces):
-                normal = normals[tri[0]] + normals[tri[1]] + normals[tri[2]]
-                f.write('facet normal {} {} {}\n'.format(
-                                                        normal[0],
-                                                        normal[1],
-                                                        normal[2]))
-
-                f.write('outer loop\n')
-                for vertex_id in tri:
-                    f.write('vertex {} {} {}\n'.format(
-                                                        vertices[vertex_id][0],
-                                                        vertices[vertex_id][1],
-                                                        vertices[vertex_id][2]))
-
-                f.write('endloop\n')
-                f.write('endfacet\n')
-
-            f.write('endsolid\n')
+        try:
+            run_directory = selected_run(scene)
+        except LookupError as error:
+            self.report({'ERROR'}, str(error))
+            return {'CANCELLED'}
+
+        exported = [(iteration, path) for iteration, path in export_iterations(
+                                                                run_directory,
+                                                                os.path.join(scene.anton.workspace_path, scene.anton.filename, 'sequence'),
+                                                                every=scene.anton.batch_every,
+                                                                resolution=scene.anton.res,
+                                                                density_thresh=scene.anton.density_out,
+                                                                scalar_field=scene.anton.scalar_field,
+                                                                binary=scene.anton.binary_stl,
+                                                                name=scene.anton.filename) if path is not None]
+
+        if len(exported) == 0:
+            self.report({'ERROR'}, 'No iteration could be exported.')
+            return {'CANCELLED'}
+
+        if scene.anton.load_sequence:
+            frames = [iteration for iteration, _ in exported] + [exported[-1][0] + scene.anton.batch_every]
+            for i, (iteration, path) in enumerate(exported):
+                vertices, faces = read_stl(path)
+                obj = mesh_from_arrays('{}_{:05d}'.format(scene.anton.filename, iteration), vertices, faces,
+                                        smooth=scene.anton.scalar_field)
+
+                for frame, hidden in ((frames[0], i > 0), (frames[i], False), (frames[i + 1], True)):
+                    obj.hide_viewport = hidden
+                    obj.hide_render = hidden
+                    obj.keyframe_insert(data_path='hide_viewport', frame=frame)
+                    obj.keyframe_insert(data_path='hide_render', frame=frame)
+
+            scene.frame_start = frames[0]
+            scene.frame_end = frames[-1] - 1
+
+        self.report({'INFO'}, 'Exported iterations: {}'.format([iteration for iteration, _ in exported]))
+        return {'FINISHED'}